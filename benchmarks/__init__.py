@@ -0,0 +1,8 @@
+"""
+Benchmarks for the banking layer.
+
+    python -m benchmarks.generate out.xlsx --customers 1000 --txns 50
+    python -m benchmarks.run --scales 100x20,1000x20 --out results.json
+    python -m benchmarks.compare baseline.json results.json
+    python -m benchmarks.bench_login --users 100000
+"""
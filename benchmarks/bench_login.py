@@ -0,0 +1,67 @@
+"""
+Logins/sec: full-sheet boolean-mask scan (the old validate_login) vs the credential index.
+
+    python -m benchmarks.bench_login --users 100000 --logins 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from src import auth
+
+
+def _scan_login(df: pd.DataFrame, user_id: str, password: str):
+    match = df[(df["user_id"] == user_id) & (df["password"] == password)]
+    if match.empty:
+        return False, None
+    return True, str(match.iloc[0]["customer_id"])
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--logins", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    df = pd.DataFrame({
+        "user_id": [f"user{i:07d}" for i in range(args.users)],
+        "password": [f"pw{i:07d}" for i in range(args.users)],
+        "customer_id": [f"CUST{i:07d}" for i in range(args.users)],
+    })
+    rng = random.Random(args.seed)
+    probes = [rng.randrange(args.users) for _ in range(args.logins)]
+
+    start = time.perf_counter()
+    for i in probes:
+        ok, _ = _scan_login(df, f"user{i:07d}", f"pw{i:07d}")
+        assert ok
+    scan = args.logins / (time.perf_counter() - start)
+
+    # build the index from the same frame, bypassing storage
+    auth.read_sheet = lambda _name: df
+    auth.find_rows = lambda _name, where: df[df["user_id"] == where["user_id"]]
+    auth.data_version = lambda *_: ("bench",)
+    start = time.perf_counter()
+    auth._refresh_index()
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in probes:
+        ok, _ = auth.validate_login(f"user{i:07d}", f"pw{i:07d}")
+        assert ok
+    indexed = args.logins / (time.perf_counter() - start)
+
+    print(f"users={args.users} verifier={auth.PASSWORD_VERIFIER}")
+    print(f"scan:    {scan:12,.0f} logins/s")
+    print(f"index:   {indexed:12,.0f} logins/s  (built in {build:.2f}s)")
+    print(f"speedup: {indexed / scan:12,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare two benchmark runs (benchmarks.run JSON) and flag regressions.
+
+A scenario regresses when its metric grew by more than --threshold (relative) and by
+more than --min-ms (absolute, so sub-millisecond noise is ignored). Exit status is 1
+when anything regressed, so this can gate CI.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import List
+
+
+def compare(base: dict, new: dict, metric: str, threshold: float, min_ms: float) -> List[dict]:
+    rows = []
+    for scale, res in new.get("scales", {}).items():
+        old_res = base.get("scales", {}).get(scale)
+        if old_res is None:
+            continue
+        for name, stats in res["scenarios"].items():
+            old = old_res["scenarios"].get(name)
+            if old is None:
+                continue
+            before, after = old[metric], stats[metric]
+            change = (after - before) / before if before else 0.0
+            rows.append({
+                "scale": scale,
+                "scenario": name,
+                "before": before,
+                "after": after,
+                "change": change,
+                "regressed": change > threshold and (after - before) * 1000 > min_ms,
+            })
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Flag regressions between two benchmark runs.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="median", choices=["first", "min", "median", "p95", "mean"])
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown, 0.2 = 20%%")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        new = json.load(f)
+
+    rows = compare(base, new, args.metric, args.threshold, args.min_ms)
+    if not rows:
+        print("No common scales/scenarios to compare.")
+        sys.exit(2)
+
+    for r in rows:
+        flag = "REGRESSION" if r["regressed"] else ""
+        print(
+            f"{r['scale']:>12} {r['scenario']:<24} {r['before'] * 1000:10.2f} ms -> "
+            f"{r['after'] * 1000:10.2f} ms  {r['change']:+7.1%}  {flag}"
+        )
+
+    regressed = [r for r in rows if r["regressed"]]
+    print(f"\n{len(regressed)} regression(s) in {len(rows)} comparisons ({args.metric}, threshold {args.threshold:.0%}).")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
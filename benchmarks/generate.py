@@ -0,0 +1,121 @@
+"""
+Deterministic synthetic bank: a workbook in the exact schema of data/state_bank_db.xlsx
+with `customers` accounts and `txns` transactions per customer. Same seed, same bytes
+of data (ids, dates, amounts, balances).
+
+    python -m benchmarks.generate out.xlsx --customers 1000 --txns 50 --seed 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.config import SHEET_LOGIN, SHEET_CUSTOMERS, SHEET_TXNS
+
+
+CITIES = ["Delhi", "Mumbai", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune", "Jaipur"]
+ACCOUNT_TYPES = ["Savings", "Current"]
+REASONS = ["salary", "rent", "groceries", "transfer", "bill payment", "shopping", ""]
+
+START = pd.Timestamp("2025-01-01 09:00:00")
+
+
+def customer_id(i: int) -> str:
+    return f"CUST{i + 1:07d}"
+
+
+def user_id(i: int) -> str:
+    return f"user{i + 1:07d}"
+
+
+def password(i: int) -> str:
+    return f"pw{i + 1:07d}"
+
+
+def build_frames(customers: int, txns_per_customer: int, seed: int = 7) -> Dict[str, pd.DataFrame]:
+    """Return {sheet_name: DataFrame} for a bank of the given size."""
+    rng = np.random.default_rng(seed)
+    idx = np.arange(customers)
+    cids = np.array([customer_id(i) for i in idx], dtype=object)
+
+    login = pd.DataFrame({
+        "user_id": [user_id(i) for i in idx],
+        "password": [password(i) for i in idx],
+        "customer_id": cids,
+    })
+
+    n = customers * txns_per_customer
+    owner = np.repeat(idx, txns_per_customer)
+    is_deposit = rng.random(n) < 0.55
+    amount = rng.integers(1, 500, n) * 100
+
+    # opening balance covers every withdrawal, so no running balance goes negative
+    withdrawn = np.bincount(owner, weights=np.where(is_deposit, 0, amount), minlength=customers)
+    opening = (withdrawn + rng.integers(50, 500, customers) * 100).astype(np.int64)
+
+    customers_df = pd.DataFrame({
+        "customer_id": cids,
+        "customer_name": [f"Customer {i + 1}" for i in idx],
+        "account_no": [f"SBP{i + 10001}" for i in idx],
+        "account_type": rng.choice(ACCOUNT_TYPES, customers),
+        "email": [f"customer{i + 1}@email.com" for i in idx],
+        "phone": 9000000000 + idx,
+        "city": rng.choice(CITIES, customers),
+        "opening_balance": opening,
+    })
+
+    # per customer: increasing timestamps, a few hours to a few days apart
+    gaps = rng.integers(600, 3 * 86400, n).reshape(customers, txns_per_customer)
+    offsets = gaps.cumsum(axis=1).ravel()
+    dates = START + pd.to_timedelta(offsets, unit="s")
+
+    signed = np.where(is_deposit, amount, -amount)
+    running = pd.Series(signed).groupby(owner).cumsum().to_numpy() + opening[owner]
+
+    txns = pd.DataFrame({
+        "txn_id": [f"TXN{i + 1:06d}" for i in range(n)],
+        "customer_id": cids[owner],
+        "txn_date": dates.strftime("%Y-%m-%d %H:%M:%S"),
+        "txn_type": np.where(is_deposit, "DEPOSIT", "WITHDRAW"),
+        "amount": amount.astype(np.int64),
+        "reason": rng.choice(REASONS, n),
+        "balance_after_txn": running.astype(np.int64),
+    })
+    # the workbook holds transactions in posting order, not grouped by customer
+    txns = txns.sort_values(["txn_date", "customer_id"], kind="mergesort").reset_index(drop=True)
+    txns["txn_id"] = [f"TXN{i + 1:06d}" for i in range(n)]
+
+    return {SHEET_LOGIN: login, SHEET_CUSTOMERS: customers_df, SHEET_TXNS: txns}
+
+
+def write_workbook(path: str, customers: int, txns_per_customer: int, seed: int = 7) -> Dict[str, int]:
+    """Write the synthetic bank to an .xlsx workbook. Returns {sheet_name: row_count}."""
+    frames = build_frames(customers, txns_per_customer, seed)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, df in frames.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return {name: len(df) for name, df in frames.items()}
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic bank workbook.")
+    parser.add_argument("path", help="output .xlsx path")
+    parser.add_argument("--customers", type=int, default=1_000)
+    parser.add_argument("--txns", type=int, default=50, help="transactions per customer")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    counts = write_workbook(args.path, args.customers, args.txns, args.seed)
+    for name, n in counts.items():
+        print(f"{name}: {n} rows")
+    print(f"Wrote {args.path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Timed scenarios for the banking layer at several bank sizes, written as JSON.
+
+Each scale (CUSTOMERSxTXNS_PER_CUSTOMER) gets a freshly generated workbook and runs in
+its own subprocess with SBP_DATA_FILE pointing at it, so process-wide caches and
+sidecar files never leak between scales or into data/.
+
+    python -m benchmarks.run --scales 100x20,1000x20,5000x20 --repeat 50 --out results.json
+    python -m benchmarks.compare baseline.json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+SCENARIOS = [
+    "validate_login",
+    "calculate_balance",
+    "get_transactions",
+    "deposit",
+    "withdraw",
+    "generate_statement_pdf",
+]
+
+
+def parse_scale(text: str) -> tuple:
+    customers, txns = text.lower().split("x")
+    return int(customers), int(txns)
+
+
+def _timed(fn: Callable[[int], object], repeat: int) -> dict:
+    """
+    Run fn(i) once cold, then `repeat` times. Seconds: `first` is the cold call
+    (caches empty), the rest summarise the warm calls.
+    """
+    start = time.perf_counter()
+    fn(0)
+    first = time.perf_counter() - start
+
+    samples: List[float] = []
+    for i in range(1, repeat + 1):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        "first": first,
+        "runs": len(samples),
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def _worker(customers: int, repeat: int, seed: int, only: List[str]) -> Dict[str, dict]:
+    """Runs inside the per-scale subprocess (SBP_DATA_FILE already set)."""
+    from src import auth, banking
+    from src.pdf_statement import generate_statement_pdf
+    from benchmarks.generate import customer_id, user_id, password
+
+    rng = random.Random(seed)
+    picks = [rng.randrange(customers) for _ in range(repeat + 1)]
+
+    def login(i):
+        ok, _ = auth.validate_login(user_id(picks[i]), password(picks[i]))
+        assert ok
+
+    def balance(i):
+        banking.calculate_balance(customer_id(picks[i]))
+
+    def transactions(i):
+        banking.get_transactions(customer_id(picks[i]))
+
+    def deposit(i):
+        banking.deposit(customer_id(picks[i]), 100.0, "benchmark")
+
+    def withdraw(i):
+        banking.withdraw(customer_id(picks[i]), 100.0, "benchmark")
+
+    def statement(i):
+        cid = customer_id(picks[i])
+        ledger = banking.LedgerSnapshot()
+        generate_statement_pdf(
+            ledger.get_customer(cid), ledger.get_transactions(cid), ledger.calculate_balance(cid)
+        )
+
+    fns = {
+        "validate_login": login,
+        "calculate_balance": balance,
+        "get_transactions": transactions,
+        "deposit": deposit,
+        "withdraw": withdraw,
+        "generate_statement_pdf": statement,
+    }
+    results = {}
+    for name in SCENARIOS:
+        if only and name not in only:
+            continue
+        # the statement renders a whole PDF per call; keep its run short
+        results[name] = _timed(fns[name], repeat if name != "generate_statement_pdf" else max(1, repeat // 10))
+
+    from src.journal import stop_compactor
+    stop_compactor()
+    return results
+
+
+def run_scale(scale: str, repeat: int, seed: int, workdir: str, only: List[str]) -> dict:
+    from benchmarks.generate import write_workbook
+
+    customers, txns = parse_scale(scale)
+    scale_dir = os.path.join(workdir, scale)
+    os.makedirs(scale_dir, exist_ok=True)
+    path = os.path.join(scale_dir, "bank.xlsx")
+
+    start = time.perf_counter()
+    rows = write_workbook(path, customers, txns, seed)
+    generate_seconds = time.perf_counter() - start
+
+    env = dict(os.environ, SBP_DATA_FILE=path)
+    cmd = [
+        sys.executable, "-m", "benchmarks.run", "--worker", scale,
+        "--repeat", str(repeat), "--seed", str(seed),
+    ]
+    if only:
+        cmd += ["--only", ",".join(only)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Scale {scale} failed:\n{proc.stderr}")
+
+    return {
+        "customers": customers,
+        "txns_per_customer": txns,
+        "rows": rows,
+        "workbook_bytes": os.path.getsize(path),
+        "generate_seconds": generate_seconds,
+        "scenarios": json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the banking layer.")
+    parser.add_argument("--scales", default="100x20,1000x20,5000x20",
+                        help="comma separated CUSTOMERSxTXNS_PER_CUSTOMER")
+    parser.add_argument("--repeat", type=int, default=50, help="warm calls per scenario")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", default="", help="comma separated scenario names")
+    parser.add_argument("--out", default="", help="write results JSON here (default: stdout)")
+    parser.add_argument("--workdir", default="", help="keep generated workbooks here")
+    parser.add_argument("--worker", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    only = [s for s in args.only.split(",") if s]
+    unknown = set(only) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    if args.worker:
+        customers, _ = parse_scale(args.worker)
+        print(json.dumps(_worker(customers, args.repeat, args.seed, only)))
+        return
+
+    import pandas as pd
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="sbp-bench-")
+    results = {
+        "meta": {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "scales": {},
+    }
+    try:
+        for scale in [s.strip() for s in args.scales.split(",") if s.strip()]:
+            res = run_scale(scale, args.repeat, args.seed, workdir, only)
+            results["scales"][scale] = res
+            for name, stats in res["scenarios"].items():
+                print(
+                    f"{scale:>12} {name:<24} first {stats['first'] * 1000:9.2f} ms"
+                    f"  median {stats['median'] * 1000:9.2f} ms  p95 {stats['p95'] * 1000:9.2f} ms",
+                    file=sys.stderr,
+                )
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
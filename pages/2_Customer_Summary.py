@@ -1,5 +1,5 @@
 import streamlit as st
-from src.banking import get_customer, calculate_balance
+from src.banking import LedgerSnapshot
 from src.config import BANK_NAME, CURRENCY, LOGO_PATH
 
 st.title("📊 Customer Summary")
@@ -11,9 +11,10 @@ if not st.session_state.get("logged_in"):
 
 customer_id = st.session_state.get("customer_id")
 
-# --- Fetch data ---
-cust = get_customer(customer_id)
-bal = calculate_balance(customer_id)
+# --- Fetch data (one snapshot per rerun) ---
+ledger = LedgerSnapshot()
+cust = ledger.get_customer(customer_id)
+bal = ledger.calculate_balance(customer_id)
 
 # --- Header card ---
 col1, col2 = st.columns([1, 4], vertical_alignment="center")
@@ -1,6 +1,6 @@
 import streamlit as st
 from src.validators import validate_positive_amount
-from src.banking import deposit, calculate_balance, get_customer
+from src.banking import LedgerSnapshot
 from src.config import BANK_NAME, CURRENCY
 
 st.title("➕ Deposit Money")
@@ -11,11 +11,12 @@ if not st.session_state.get("logged_in"):
     st.stop()
 
 customer_id = st.session_state.get("customer_id")
-cust = get_customer(customer_id)
+ledger = LedgerSnapshot()
+cust = ledger.get_customer(customer_id)
 
 st.caption(f"{BANK_NAME} • Deposits for **{cust['customer_name']}** ({cust['account_no']})")
 
-bal = calculate_balance(customer_id)
+bal = ledger.calculate_balance(customer_id)
 st.metric("Current Balance", f"{CURRENCY}{bal['current_balance']:,.2f}")
 
 st.divider()
@@ -31,10 +32,11 @@ if submitted:
         st.error(msg)
         st.stop()
 
-    txn = deposit(customer_id, amount, reason)
+    txn = ledger.deposit(customer_id, amount, reason)
+    ledger.commit()
     st.success(f"Deposit successful! Transaction ID: **{txn['txn_id']}**")
 
     # show updated balance
-    bal2 = calculate_balance(customer_id)
+    bal2 = ledger.calculate_balance(customer_id)
     st.metric("Updated Balance", f"{CURRENCY}{bal2['current_balance']:,.2f}")
     st.info("Go to **Mini Statement** page to view/download statement.")
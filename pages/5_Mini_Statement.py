@@ -1,9 +1,11 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 
-from src.banking import get_customer, get_transactions, calculate_balance
+from src.banking import LedgerSnapshot
 from src.pdf_statement import generate_statement_pdf
+from src.statement_cache import statement_cache, statement_key
+from src.archive import cutoff as archive_cutoff
+from src.checkpoints import store_version as checkpoint_version
 from src.config import BANK_NAME
 
 st.title("🧾 Mini Statement")
@@ -14,21 +16,15 @@ if not st.session_state.get("logged_in"):
     st.stop()
 
 customer_id = st.session_state.get("customer_id")
-cust = get_customer(customer_id)
-bal = calculate_balance(customer_id)
+ledger = LedgerSnapshot()
+cust = ledger.get_customer(customer_id)
+bal = ledger.calculate_balance(customer_id)
 
 st.caption(f"{BANK_NAME} • Statement for **{cust['customer_name']}** ({cust['account_no']})")
 st.metric("Current Balance", f"₹{bal['current_balance']:,.2f}")
 
 st.divider()
 
-# --- Load all txns ---
-txns = get_transactions(customer_id)
-
-# Ensure datetime conversion for filtering
-if not txns.empty:
-    txns["txn_date"] = pd.to_datetime(txns["txn_date"], errors="coerce")
-
 # --- Filters ---
 st.subheader("Filters")
 
@@ -44,19 +40,21 @@ with col2:
 with col3:
     txn_type = st.selectbox("Type", ["ALL", "DEPOSIT", "WITHDRAW"])
 
-filtered = txns.copy()
-if not filtered.empty:
-    # date range filter
-    start_dt = datetime.combine(date_from, datetime.min.time())
-    end_dt = datetime.combine(date_to, datetime.max.time())
+# date range + type filter, served from the per-customer time index (latest first)
+start_dt = datetime.combine(date_from, datetime.min.time())
+end_dt = datetime.combine(date_to, datetime.max.time())
+filtered = ledger.get_transactions_between(customer_id, start_dt, end_dt, txn_type)
 
-    filtered = filtered[(filtered["txn_date"] >= start_dt) & (filtered["txn_date"] <= end_dt)]
-
-    # type filter
-    if txn_type != "ALL":
-        filtered = filtered[filtered["txn_type"] == txn_type]
+# opening/closing balances of the selected period (all types, not just the filter)
+period = ledger.period_balances(customer_id, start_dt, end_dt)
+st.caption(
+    f"Opening balance on {date_from}: **₹{period['opening_balance']:,.2f}** • "
+    f"Closing balance on {date_to}: **₹{period['closing_balance']:,.2f}**"
+)
 
-    filtered = filtered.sort_values("txn_date", ascending=False)
+archived_before = archive_cutoff()
+if archived_before is not None and start_dt < archived_before:
+    st.caption(f"Includes archived history (before {archived_before:%d %b %Y}).")
 
 st.divider()
 
@@ -67,8 +65,8 @@ if filtered.empty:
 else:
     show_df = filtered.copy()
     show_df["txn_date"] = show_df["txn_date"].dt.strftime("%Y-%m-%d %H:%M:%S")
-    show_df["amount"] = pd.to_numeric(show_df["amount"], errors="coerce").fillna(0.0)
-    show_df["balance_after_txn"] = pd.to_numeric(show_df["balance_after_txn"], errors="coerce").fillna(0.0)
+    show_df["amount"] = show_df["amount"].fillna(0.0)
+    show_df["balance_after_txn"] = show_df["balance_after_txn"].fillna(0.0)
 
     show_df = show_df[["txn_id", "txn_date", "txn_type", "amount", "reason", "balance_after_txn"]]
     st.dataframe(show_df, use_container_width=True)
@@ -81,12 +79,23 @@ st.subheader("Download Statement")
 period_from = datetime.combine(date_from, datetime.min.time())
 period_to = datetime.combine(date_to, datetime.max.time())
 
-pdf_bytes = generate_statement_pdf(
-    customer=cust,
-    txns=filtered if not filtered.empty else filtered,
-    balances=bal,
-    period_from=period_from,
-    period_to=period_to,
+# Reruns (widget changes, navigation) reuse the cached PDF; it is only rendered
+# again when the customer details, period, type filter, ledger data or the
+# archive / checkpoints behind the period balances changed.
+cache_key = statement_key(
+    customer_id, period_from, period_to, txn_type,
+    data_version=(bal.get("last_txn_id"), bal.get("version"), archive_cutoff(), checkpoint_version()),
+    customer=cust.to_dict(),
+)
+pdf_bytes = statement_cache.get_or_render(
+    cache_key,
+    lambda: generate_statement_pdf(
+        customer=cust,
+        txns=filtered,
+        balances=period,
+        period_from=period_from,
+        period_to=period_to,
+    ),
 )
 
 filename = f"statement_{cust['account_no']}_{date_from}_to_{date_to}.pdf"
@@ -98,3 +107,9 @@ st.download_button(
     mime="application/pdf",
     use_container_width=True
 )
+
+cache = statement_cache.stats()
+st.caption(
+    f"Statement cache: {cache['hit_rate']:.0%} hit rate • "
+    f"{cache['renders']} renders, avg {cache['avg_render_seconds'] * 1000:,.0f} ms"
+)
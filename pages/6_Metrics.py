@@ -0,0 +1,111 @@
+import streamlit as st
+import pandas as pd
+
+from src import metrics
+from src.banking import posting_writer, ledger_client
+from src.excel_db import cache_stats
+from src.locks import lock_stats
+from src.statement_cache import statement_cache
+from src.config import ADMIN_USER_IDS, METRICS_FILE_PATH
+
+st.title("📈 Metrics")
+
+# --- Access control (admins only: SBP_ADMIN_USERS=user1,user2) ---
+if not st.session_state.get("logged_in"):
+    st.error("❌ Please login first from the Login page.")
+    st.stop()
+
+if st.session_state.get("user_id") not in ADMIN_USER_IDS:
+    st.error("❌ This page is for administrators (set SBP_ADMIN_USERS).")
+    st.stop()
+
+on = st.toggle("Collect metrics", value=metrics.enabled(), help="Same as starting with SBP_METRICS=1")
+if on != metrics.enabled():
+    metrics.enable(on)
+
+if not metrics.enabled():
+    st.info("Metrics are off. Turn them on above; timings appear as pages are used.")
+    st.stop()
+
+snap = metrics.snapshot()
+
+# --- Histograms (latency in ms; size histograms as counts) ---
+st.subheader("Latency")
+if snap["histograms"]:
+    rows = []
+    for h in snap["histograms"]:
+        scale = 1 if h["name"] in metrics.HISTOGRAM_BUCKETS else 1000
+        rows.append({
+            "metric": h["name"],
+            "labels": ", ".join(f"{k}={v}" for k, v in h["labels"].items()),
+            "unit": "count" if scale == 1 else "ms",
+            "calls": h["count"],
+            "avg": h["sum"] / h["count"] * scale if h["count"] else 0.0,
+            "p50": h["p50"] * scale,
+            "p95": h["p95"] * scale,
+            "p99": h["p99"] * scale,
+            "total": h["sum"] * scale,
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+else:
+    st.caption("No timed calls recorded yet.")
+
+# --- Counters and gauges ---
+st.subheader("Counters")
+if snap["counters"] or snap["gauges"]:
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "metric": c["name"],
+                "labels": ", ".join(f"{k}={v}" for k, v in c["labels"].items()),
+                "value": c["value"],
+            }
+            for c in snap["counters"] + snap["gauges"]
+        ]),
+        use_container_width=True,
+        hide_index=True,
+    )
+else:
+    st.caption("No counters recorded yet.")
+
+# --- Caches and locks ---
+st.subheader("Caches & Locks")
+c1, c2 = st.columns(2)
+with c1:
+    st.caption("Parsed sheet cache")
+    st.json(cache_stats())
+    st.caption("Statement PDF cache")
+    st.json(statement_cache.stats())
+with c2:
+    st.caption("Lock wait / hold (seconds)")
+    st.json(lock_stats())
+    st.caption("Posting queue (group commits)")
+    st.json(posting_writer().stats())
+
+client = ledger_client()
+if client is not None:
+    st.caption(f"Ledger daemon ({client.path})")
+    st.json(client.stats())
+
+st.divider()
+
+# --- Export ---
+text = metrics.render_prometheus()
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button(
+        "⬇️ Download Prometheus text",
+        data=text,
+        file_name="sbp_metrics.prom",
+        mime="text/plain",
+        use_container_width=True,
+    )
+with col2:
+    if st.button("💾 Write metrics file now", use_container_width=True):
+        st.success(f"Wrote {metrics.export()}")
+
+st.caption(f"Also written every few seconds to {METRICS_FILE_PATH}.")
+
+if st.button("Reset metrics"):
+    metrics.reset()
+    st.rerun()
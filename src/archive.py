@@ -0,0 +1,327 @@
+# src/archive.py
+"""
+Hot/cold tiering of transaction_details.
+
+`python -m src.cli archive --horizon-days 365` moves every transaction dated
+before the cutoff (the first day of the month ARCHIVE_HORIZON_DAYS ago) out of the
+hot store into one compressed, read-only segment per month:
+
+    data/state_bank_db.xlsx.archive/manifest.json
+    data/state_bank_db.xlsx.archive/txns-2025-03.csv.gz
+
+Segments are gzip CSV in the storage text format (no pyarrow needed) and are never
+rewritten; rows reaching an already archived month later go into an extra part
+(txns-2025-03.1.csv.gz). The manifest records the cutoff, the segments and per
+customer carry-forward totals, so balances never need the archived rows again.
+
+Hot reads ignore anything dated before the cutoff. That also keeps a run that
+died between writing the manifest and rewriting the hot store correct: those rows
+are already in the segments and carry, and the next run drops them from the hot
+store.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .config import (
+    ARCHIVE_DIR, ARCHIVE_HORIZON_DAYS, ARCHIVE_CACHE_MAX_BYTES, SHEET_CUSTOMERS, SHEET_TXNS
+)
+from .excel_db import read_sheet, overwrite_sheet, file_lock
+from .locks import lock, LEDGER
+from .schema import coerce, to_storage
+
+
+MANIFEST = "manifest.json"
+COLUMNS = ["txn_id", "customer_id", "txn_date", "txn_type", "amount", "reason", "balance_after_txn"]
+
+_manifest_state: Dict = {"key": None, "data": None}
+_manifest_lock = threading.Lock()
+
+
+def _manifest_path() -> str:
+    return os.path.join(ARCHIVE_DIR, MANIFEST)
+
+
+def _file_key() -> Optional[tuple]:
+    try:
+        st = os.stat(_manifest_path())
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def read_manifest() -> Optional[dict]:
+    """The archive manifest (cached per file version), or None if nothing was archived."""
+    key = _file_key()
+    if key is None:
+        return None
+
+    with _manifest_lock:
+        if _manifest_state["key"] == key:
+            return _manifest_state["data"]
+
+    with open(_manifest_path(), "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    with _manifest_lock:
+        _manifest_state["key"] = key
+        _manifest_state["data"] = data
+    return data
+
+
+def _write_manifest(data: dict) -> None:
+    tmp = _manifest_path() + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, _manifest_path())
+
+
+def cutoff() -> Optional[pd.Timestamp]:
+    """Transactions dated before this live in the archive (None: nothing archived)."""
+    data = read_manifest()
+    return pd.Timestamp(data["cutoff"]) if data else None
+
+
+def hot_only(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows the archive already holds (dated before the cutoff)."""
+    cut = cutoff()
+    if cut is None or df.empty or "txn_date" not in df.columns:
+        return df
+    archived = (df["txn_date"] < cut).to_numpy()  # NaT compares False: undated rows stay hot
+    return df[~archived] if archived.any() else df
+
+
+def check_postable(rows: List[dict]) -> None:
+    """Postings dated before the cutoff would be hidden from every read: refuse them."""
+    data = read_manifest()
+    if not data:
+        return
+    # "YYYY-MM-DD HH:MM:SS" compares chronologically as text
+    early = [r for r in rows if r.get("txn_date") and str(r["txn_date"]) < data["cutoff"]]
+    if early:
+        raise ValueError(
+            f"Transaction dated {early[0]['txn_date']} falls in an archived period (before {data['cutoff']})."
+        )
+
+
+def carry_forward(customer_id: Optional[str] = None):
+    """
+    Archived totals of one customer ({total_deposit, total_withdraw, count,
+    last_txn_id, closing_balance} or None), or of everyone as a dict when
+    customer_id is None.
+    """
+    data = read_manifest()
+    carry = data.get("carry", {}) if data else {}
+    if customer_id is None:
+        return carry
+    return carry.get(str(customer_id))
+
+
+def max_txn_number() -> int:
+    """Highest txn sequence number among archived rows (0 if none)."""
+    data = read_manifest()
+    return int(data.get("max_txn_number", 0)) if data else 0
+
+
+# --- Segments ---
+
+class _SegmentCache:
+    """Parsed segments by file name; segments are immutable, so entries never go stale."""
+
+    def __init__(self, max_bytes: int = ARCHIVE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # file -> (frame, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> pd.DataFrame:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                return entry[0]
+
+        df = coerce(SHEET_TXNS, pd.read_csv(os.path.join(ARCHIVE_DIR, name), dtype=str))
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if size <= self.max_bytes and name not in self._entries:
+                self._entries[name] = (df, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+        return df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+segment_cache = _SegmentCache()
+
+
+def _empty() -> pd.DataFrame:
+    return coerce(SHEET_TXNS, pd.DataFrame(columns=COLUMNS))
+
+
+def read_between(
+    start: datetime,
+    end: datetime,
+    customer_id: Optional[str] = None,
+    txn_type: str = "ALL",
+) -> pd.DataFrame:
+    """
+    Archived transactions with start <= txn_date <= end (latest first), optionally
+    of one customer / txn_type. Only segments of the overlapping months are opened.
+    """
+    data = read_manifest()
+    if not data:
+        return _empty()
+
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    frames = []
+    for seg in data["segments"]:
+        period = pd.Period(seg["period"], freq="M")
+        if period.end_time < start or period.start_time > end:
+            continue
+        df = segment_cache.get(seg["file"])
+        mask = (df["txn_date"] >= start) & (df["txn_date"] <= end)
+        if customer_id is not None:
+            mask &= df["customer_id"] == customer_id
+        if txn_type and txn_type != "ALL":
+            mask &= df["txn_type"] == txn_type
+        if mask.any():
+            frames.append(df[mask])
+
+    if not frames:
+        return _empty()
+    # each segment has its own categories: re-type the combined columns
+    out = coerce(SHEET_TXNS, pd.concat(frames, ignore_index=True))
+    return out.sort_values(["txn_date", "txn_id"], ascending=False)
+
+
+def _write_segment(period: str, part: int, df: pd.DataFrame) -> str:
+    name = f"txns-{period}.csv.gz" if part == 0 else f"txns-{period}.{part}.csv.gz"
+    path = os.path.join(ARCHIVE_DIR, name)
+    tmp = path + ".tmp"
+    df = df.sort_values(["customer_id", "txn_date", "txn_id"], kind="mergesort")
+    to_storage(SHEET_TXNS, df.reindex(columns=COLUMNS)).to_csv(
+        tmp, index=False, compression={"method": "gzip", "mtime": 0}
+    )
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    # a file from a run that died before its manifest write is simply replaced
+    os.replace(tmp, path)
+    os.chmod(path, 0o444)
+    return name
+
+
+def _month_start(ts: pd.Timestamp) -> pd.Timestamp:
+    return pd.Timestamp(year=ts.year, month=ts.month, day=1)
+
+
+def _archived_ids(data: dict, rows: pd.DataFrame) -> set:
+    """txn_ids of `rows` that are already in a segment of their month."""
+    if rows.empty:
+        return set()
+    months = set(rows["txn_date"].dt.strftime("%Y-%m"))
+    ids = set()
+    for seg in data["segments"]:
+        if seg["period"] in months:
+            ids.update(segment_cache.get(seg["file"])["txn_id"].astype(str))
+    return ids
+
+
+def _add_carry(carry: dict, cold: pd.DataFrame, openings: Dict[str, float]) -> None:
+    from .sequence import txn_number
+
+    amounts = cold["amount"].fillna(0)
+    cids = cold["customer_id"].astype(str)
+    deposits = amounts.where(cold["txn_type"] == "DEPOSIT", 0.0).groupby(cids).sum()
+    withdraws = amounts.where(cold["txn_type"] == "WITHDRAW", 0.0).groupby(cids).sum()
+    counts = cids.value_counts()
+    nums = cold["txn_id"].map(txn_number)
+    last_ids = cold["txn_id"].astype(str).loc[nums.groupby(cids).idxmax()]
+    last_ids.index = cids.loc[last_ids.index]
+
+    for cid in counts.index:
+        entry = carry.get(cid) or {"total_deposit": 0.0, "total_withdraw": 0.0, "count": 0, "last_txn_id": None}
+        entry["total_deposit"] += float(deposits[cid])
+        entry["total_withdraw"] += float(withdraws[cid])
+        entry["count"] += int(counts[cid])
+        if txn_number(last_ids[cid]) > txn_number(entry["last_txn_id"]):
+            entry["last_txn_id"] = last_ids[cid]
+        entry["closing_balance"] = openings.get(cid, 0.0) + entry["total_deposit"] - entry["total_withdraw"]
+        carry[cid] = entry
+
+
+def archive_closed_periods(horizon_days: int = ARCHIVE_HORIZON_DAYS, now: Optional[datetime] = None) -> dict:
+    """
+    Move transactions dated before the first day of the month `horizon_days` ago
+    into monthly segments. Runs under the LEDGER and DATA locks after folding the
+    journal in. The cutoff never moves back. Returns {"cutoff", "rows", "segments",
+    "hot_rows"}.
+    """
+    from .journal import compact
+    from .sequence import max_txn_number as highest
+    from . import parquet_mirror
+
+    if horizon_days < 0:
+        raise ValueError("Archive horizon must be 0 days or more.")
+    target = _month_start(pd.Timestamp(now or datetime.now()) - pd.Timedelta(days=horizon_days))
+
+    with lock(LEDGER), file_lock():
+        compact()
+        old = read_manifest()
+        data = json.loads(json.dumps(old)) if old else {"cutoff": None, "segments": [], "carry": {}}
+        old_cut = pd.Timestamp(data["cutoff"]) if data["cutoff"] else None
+        cut = max(target, old_cut) if old_cut is not None else target
+
+        txns = read_sheet(SHEET_TXNS)
+        archived = (txns["txn_date"] < cut).to_numpy()
+        cold = txns[archived]
+        if old_cut is not None:
+            # left behind by a run that stopped before rewriting the hot store
+            done = _archived_ids(data, cold[cold["txn_date"] < old_cut])
+            cold = cold[~cold["txn_id"].astype(str).isin(done)]
+
+        written: List[str] = []
+        if not cold.empty:
+            os.makedirs(ARCHIVE_DIR, exist_ok=True)
+            for period, part in cold.groupby(cold["txn_date"].dt.strftime("%Y-%m")):
+                n = sum(1 for s in data["segments"] if s["period"] == period)
+                name = _write_segment(period, n, part)
+                data["segments"].append({"period": period, "file": name, "rows": len(part)})
+                written.append(name)
+
+            customers = read_sheet(SHEET_CUSTOMERS)
+            openings = dict(zip(
+                customers["customer_id"].astype(str),
+                pd.to_numeric(customers["opening_balance"], errors="coerce").fillna(0.0).astype(float),
+            ))
+            _add_carry(data["carry"], cold, openings)
+            data["max_txn_number"] = max(int(data.get("max_txn_number", 0)), highest(cold))
+
+        if cut != old_cut or written:
+            os.makedirs(ARCHIVE_DIR, exist_ok=True)
+            data["cutoff"] = cut.strftime("%Y-%m-%d %H:%M:%S")
+            data["segments"].sort(key=lambda s: (s["period"], s["file"]))
+            _write_manifest(data)
+
+        if archived.any():
+            overwrite_sheet(SHEET_TXNS, txns[~archived])
+            # the mirror still holds the archived rows; rebuild-mirror drops them
+            parquet_mirror.mark_stale()
+
+    return {"cutoff": cut, "rows": len(cold), "segments": written, "hot_rows": int((~archived).sum())}
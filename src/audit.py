@@ -0,0 +1,246 @@
+# src/audit.py
+"""
+Ledger reconciliation: checks every stored balance_after_txn against
+opening_balance plus the signed amounts before it, for all customers in one
+vectorized pass (no per-customer Python loop):
+
+    python -m src.cli audit --workers 4 --report audit.csv
+
+Rows are chained in posting order (txn_id sequence, then txn_date): ids are
+handed out in commit order under the customer's lock, while txn_date is stamped
+when a posting is staged and has one-second resolution.
+
+Findings, one report row each:
+    chain_break       stored balance != previous balance +/- this amount (where drift starts)
+    balance_drift     customer whose stored balances stray from the recomputed chain
+                      (first such row; the count is in the summary)
+    store_drift       balance store (src/balances.py) disagrees with the chain's end
+    duplicate_txn_id  txn_id used more than once
+    negative_balance  stored balance_after_txn below zero
+    unknown_customer  transaction of a customer_id not in customer_details
+
+By default the audit covers the hot store and starts each chain from the
+archive's carry-forward balance; include_archive re-reads the segments and
+chains whole histories from opening_balance.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import AUDIT_TOLERANCE, SHEET_CUSTOMERS, SHEET_TXNS
+from .excel_db import read_sheet
+from .journal import stored_with_journal
+from . import archive
+from .sequence import TXN_PREFIX
+
+
+ISSUE_COLUMNS = ["issue", "customer_id", "txn_id", "txn_date", "expected", "stored", "difference"]
+
+# inputs of a parallel audit, inherited by the forked workers instead of pickled
+_shared: Dict = {}
+
+
+def _arrays(txns: pd.DataFrame, codes: np.ndarray, start: np.ndarray, pos: np.ndarray) -> Dict[str, np.ndarray]:
+    """Parallel numpy arrays of the columns the chain needs (`start`: per customer code)."""
+    ids = txns["txn_id"].astype("str")
+    tail = ids.str.slice(len(TXN_PREFIX))
+    numbered = (ids.str.startswith(TXN_PREFIX) & tail.str.isdigit()).fillna(False)
+    amounts = txns["amount"].fillna(0).to_numpy(dtype="float64")
+    deposit = (txns["txn_type"] == "DEPOSIT").to_numpy(dtype=bool)
+    withdraw = (txns["txn_type"] == "WITHDRAW").to_numpy(dtype=bool)
+    return {
+        "code": codes,
+        # ids that are not TXNnnnnnn sort before the numbered ones, by date
+        "num": tail.where(numbered, "-1").astype("int64").to_numpy(),
+        "date": txns["txn_date"].to_numpy(dtype="datetime64[ns]").astype(np.int64),
+        "signed": np.where(deposit, amounts, np.where(withdraw, -amounts, 0.0)),
+        "stored": txns["balance_after_txn"].to_numpy(dtype="float64", na_value=np.nan),
+        "start": start[codes],
+        "pos": pos,
+    }
+
+
+def _chain(part: Dict[str, np.ndarray], tolerance: float) -> Dict[str, np.ndarray]:
+    """
+    Recompute the running balance of every customer in `part` (see _arrays) and
+    return only the findings, by original row position.
+    """
+    order = np.lexsort((part["date"], part["num"], part["code"]))
+    code = part["code"][order]
+    signed = part["signed"][order]
+    stored = part["stored"][order]
+    start = part["start"][order]
+    pos = part["pos"][order]
+
+    n = len(code)
+    first = np.ones(n, dtype=bool)
+    first[1:] = code[1:] != code[:-1]
+    heads = np.flatnonzero(first)
+    group = np.cumsum(first) - 1
+
+    # grouped cumsum: one running sum, minus what was summed before each group
+    total = np.cumsum(signed)
+    expected = start + total - (total - signed)[heads][group]
+
+    known = ~np.isnan(stored)
+    drift = known & (np.abs(stored - expected) > tolerance)
+
+    # a step that does not add up and leaves the chain is where drift starts
+    # (the row after a single bad balance does not add up either, but is back on it)
+    prev = np.empty(n)
+    prev[1:] = stored[:-1]
+    prev[first] = start[first]
+    breaks = drift & ~np.isnan(prev) & (np.abs(prev + signed - stored) > tolerance)
+
+    drifting = np.flatnonzero(drift)
+    first_drift = drifting[np.r_[True, code[drifting[1:]] != code[drifting[:-1]]]] if len(drifting) else drifting
+    tails = np.r_[heads[1:] - 1, n - 1] if n else heads
+    return {
+        "break_pos": pos[breaks],
+        "break_expected": expected[breaks],
+        "drift_pos": pos[first_drift],
+        "drift_expected": expected[first_drift],
+        "drift_rows": np.array([len(drifting)]),
+        "negative_pos": pos[known & (stored < -tolerance)],
+        "end_code": code[tails],
+        "end_expected": expected[tails],
+    }
+
+
+def _chain_part(i: int, parts: int, tolerance: float) -> Dict[str, np.ndarray]:
+    """Worker: audit the customers with code % parts == i of the shared frame."""
+    txns, codes, start = _shared["txns"], _shared["codes"], _shared["start"]
+    sel = np.flatnonzero(codes % parts == i)
+    return _chain(_arrays(txns.iloc[sel], codes[sel], start, sel), tolerance)
+
+
+def audit_frames(
+    txns: pd.DataFrame,
+    customers: pd.DataFrame,
+    carry: Optional[dict] = None,
+    store: Optional[Dict[str, float]] = None,
+    workers: Optional[int] = None,
+    tolerance: float = AUDIT_TOLERANCE,
+) -> dict:
+    """
+    Audit typed transaction / customer frames. `carry` (archive carry-forward by
+    customer) moves each chain's start past archived history; `store` maps
+    customer_id -> current_balance to compare the chain ends with. With workers > 1
+    customers are split across that many forked processes (where the platform can
+    fork; elsewhere the audit runs in this process).
+    Returns {"rows", "customers", "mismatched_rows", "issues" (DataFrame)}.
+    """
+    carry = carry or {}
+    codes, uniques = pd.factorize(txns["customer_id"], use_na_sentinel=False)
+    codes = codes.astype(np.int64)
+    uniques = pd.Index(uniques).astype(str)
+
+    openings = pd.Series(
+        pd.to_numeric(customers["opening_balance"], errors="coerce").fillna(0.0).to_numpy(dtype="float64"),
+        index=customers["customer_id"].astype(str),
+    )
+    openings = openings[~openings.index.duplicated()]
+    carried = pd.Series(
+        {cid: c["total_deposit"] - c["total_withdraw"] for cid, c in carry.items()}, dtype="float64"
+    )
+    start = (openings.reindex(uniques).fillna(0.0) + carried.reindex(uniques).fillna(0.0)).to_numpy()
+
+    if workers and workers > 1 and len(txns) and "fork" in multiprocessing.get_all_start_methods():
+        _shared.update(txns=txns, codes=codes, start=start)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                futures = [pool.submit(_chain_part, i, workers, tolerance) for i in range(workers)]
+                # the txn_id check needs every row: do it here while the workers run
+                duplicated = txns["txn_id"].duplicated(keep=False).to_numpy()
+                results = [f.result() for f in futures]
+        finally:
+            _shared.clear()
+        chained = {k: np.concatenate([r[k] for r in results]) for k in results[0]}
+    else:
+        chained = _chain(_arrays(txns, codes, start, np.arange(len(txns))), tolerance)
+        duplicated = txns["txn_id"].duplicated(keep=False).to_numpy()
+
+    issues: List[pd.DataFrame] = []
+
+    def rows(issue: str, positions: np.ndarray, expected=None) -> None:
+        if not len(positions):
+            return
+        sub = txns.iloc[positions]
+        stored = sub["balance_after_txn"].to_numpy(dtype="float64", na_value=np.nan)
+        exp = expected if expected is not None else np.full(len(positions), np.nan)
+        issues.append(pd.DataFrame({
+            "issue": issue,
+            "customer_id": sub["customer_id"].astype(str).to_numpy(),
+            "txn_id": sub["txn_id"].astype(str).to_numpy(),
+            "txn_date": sub["txn_date"].to_numpy(),
+            "expected": exp,
+            "stored": stored,
+            "difference": stored - exp,
+        }))
+
+    rows("chain_break", chained["break_pos"], chained["break_expected"])
+    rows("balance_drift", chained["drift_pos"], chained["drift_expected"])
+
+    if store is not None:
+        ends = pd.Series(chained["end_expected"], index=uniques[chained["end_code"]])
+        stored_end = pd.Series(store, dtype="float64").reindex(ends.index)
+        off = stored_end.notna() & ((stored_end - ends).abs() > tolerance)
+        if off.any():
+            issues.append(pd.DataFrame({
+                "issue": "store_drift",
+                "customer_id": ends.index[off],
+                "txn_id": None,
+                "txn_date": pd.NaT,
+                "expected": ends[off].to_numpy(),
+                "stored": stored_end[off].to_numpy(),
+                "difference": (stored_end - ends)[off].to_numpy(),
+            }))
+
+    rows("duplicate_txn_id", np.flatnonzero(duplicated))
+    rows("negative_balance", np.sort(chained["negative_pos"]))
+    rows("unknown_customer", np.flatnonzero(~uniques.isin(openings.index)[codes]))
+
+    report = pd.concat(issues, ignore_index=True) if issues else pd.DataFrame(columns=ISSUE_COLUMNS)
+    return {
+        "rows": len(txns),
+        "customers": len(uniques),
+        "mismatched_rows": int(chained["drift_rows"].sum()),
+        "issues": report,
+    }
+
+
+def run_audit(include_archive: bool = False, workers: Optional[int] = None) -> dict:
+    """
+    Audit the live ledger: storage + journal (+ archive segments), against the
+    customer sheet and the balance store. Adds "seconds" to audit_frames' result.
+    """
+    from .balances import get_balance
+
+    t0 = time.perf_counter()
+    customers = read_sheet(SHEET_CUSTOMERS)
+    txns = stored_with_journal()
+    carry = None
+    if include_archive:
+        cold = archive.read_between(pd.Timestamp.min, pd.Timestamp.max)
+        if not cold.empty:
+            txns = pd.concat([cold, archive.hot_only(txns)], ignore_index=True)
+    else:
+        txns = archive.hot_only(txns)
+        carry = archive.carry_forward()
+
+    store = {}
+    for cid in customers["customer_id"].astype(str):
+        entry = get_balance(cid)
+        if entry is not None:
+            store[cid] = float(entry["current_balance"])
+
+    result = audit_frames(txns, customers, carry=carry, store=store, workers=workers)
+    result["seconds"] = time.perf_counter() - t0
+    return result
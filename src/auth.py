@@ -1,17 +1,145 @@
 # src/auth.py
 
 from __future__ import annotations
+import base64
+import hashlib
+import hmac
+import os
+import threading
 import pandas as pd
-from typing import Optional, Tuple
+from typing import Dict, Optional, Set, Tuple
 
-from .excel_db import read_sheet
-from .config import SHEET_LOGIN
+from .excel_db import read_sheet, find_rows, data_version
+from .config import SHEET_LOGIN, PASSWORD_VERIFIER, PASSWORD_HASH_ITERATIONS
+
+
+HASH_PREFIX = "pbkdf2_sha256"
+
+
+def make_password_hash(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    """Salted PBKDF2-SHA256 in the form pbkdf2_sha256$<iterations>$<salt>$<hash>."""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return "$".join([
+        HASH_PREFIX,
+        str(iterations),
+        base64.b64encode(salt).decode("ascii"),
+        base64.b64encode(digest).decode("ascii"),
+    ])
+
+
+def _check_hash(password: str, stored: str) -> bool:
+    try:
+        _, iterations, salt, digest = stored.split("$")
+        expected = base64.b64decode(digest)
+        actual = hashlib.pbkdf2_hmac(
+            "sha256", password.encode("utf-8"), base64.b64decode(salt), int(iterations)
+        )
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def _verify(password: str, verifier: str) -> bool:
+    if verifier.startswith(HASH_PREFIX + "$"):
+        return _check_hash(password, verifier)
+    return hmac.compare_digest(password.encode("utf-8"), verifier.encode("utf-8"))
+
+
+# --- Credential index ---
+# user_id -> (verifier, customer_id). The verifier is the sheet value in "plain" mode
+# or when the sheet already holds a hash. In "pbkdf2" mode a plain sheet password is
+# never kept: a user starts without a verifier (None), and the first login that
+# matches their sheet row leaves a salted hash behind.
+#
+# A new data version (on Excel: any write to the workbook, e.g. a compaction) only
+# costs a keyed digest of the login sheet; the index is rebuilt when that digest
+# changes. Verifiers derived earlier are carried over, but since the sheet may have
+# changed their password, those users are "unconfirmed": their next login is checked
+# against the sheet row first (one PBKDF2, like any pbkdf2 login).
+
+_index: Dict[str, Tuple[Optional[str], str]] = {}
+_unconfirmed: Set[str] = set()  # users whose next login is checked against their sheet row
+_index_version = None
+_index_digest: Optional[bytes] = None
+_index_lock = threading.Lock()
+_DIGEST_KEY = os.urandom(16)  # per process: the digest says nothing about any password
+
+
+def _sheet_digest(df: pd.DataFrame) -> bytes:
+    """One keyed digest over the whole sheet: tells whether it changed, not which row."""
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.blake2b(rows.tobytes(), key=_DIGEST_KEY, digest_size=16).digest()
+
+
+def _build_index(df: pd.DataFrame) -> Tuple[Dict[str, Tuple[Optional[str], str]], Set[str]]:
+    """New index from the sheet, keeping the verifiers of users still in it."""
+    index, unconfirmed = {}, set()
+    if not {"user_id", "password", "customer_id"}.issubset(df.columns):
+        return index, unconfirmed
+    for user_id, password, customer_id in zip(
+        df["user_id"].astype(str).str.strip(),
+        df["password"].fillna("").astype(str).str.strip(),
+        df["customer_id"].astype(str),
+    ):
+        if user_id in index:
+            continue  # first row wins
+        if PASSWORD_VERIFIER == "pbkdf2" and not password.startswith(HASH_PREFIX + "$"):
+            old = _index.get(user_id)
+            index[user_id] = (old[0] if old is not None else None, customer_id)
+            unconfirmed.add(user_id)
+        else:
+            index[user_id] = (password, customer_id)
+    return index, unconfirmed
+
+
+def _refresh_index() -> Dict[str, Tuple[Optional[str], str]]:
+    global _index, _unconfirmed, _index_version, _index_digest
+
+    version = data_version(SHEET_LOGIN)
+    if version is not None and version == _index_version:
+        return _index
+
+    with _index_lock:
+        if version is not None and version == _index_version:
+            return _index
+
+        df = read_sheet(SHEET_LOGIN)
+        digest = _sheet_digest(df)
+        if digest != _index_digest:
+            _index, _unconfirmed = _build_index(df)
+            _index_digest = digest
+        _index_version = version
+        return _index
+
+
+def _confirm(user_id: str, password: str, entry: Tuple[Optional[str], str]) -> bool:
+    """
+    Check an unconfirmed user against their sheet row. On success keep their verifier
+    if the password still matches it, else derive a new salted hash.
+    """
+    rows = find_rows(SHEET_LOGIN, {"user_id": user_id})
+    if rows.empty:
+        return False
+    stored = rows["password"].iloc[0]
+    stored = "" if pd.isna(stored) else str(stored).strip()
+    if not hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8")):
+        return False
+
+    verifier = entry[0]
+    if verifier is None or not _verify(password, verifier):
+        verifier = make_password_hash(password)
+    with _index_lock:
+        if _index.get(user_id) is entry:
+            _index[user_id] = (verifier, entry[1])
+            _unconfirmed.discard(user_id)
+    return True
 
 
 def validate_login(user_id: str, password: str) -> Tuple[bool, Optional[str]]:
     """
     Returns: (is_valid, customer_id)
-    Plain text check (as requested).
+    O(1) lookup in the in-memory credential index; see PASSWORD_VERIFIER in config.
     """
     user_id = (user_id or "").strip()
     password = (password or "").strip()
@@ -19,18 +147,17 @@ def validate_login(user_id: str, password: str) -> Tuple[bool, Optional[str]]:
     if not user_id or not password:
         return False, None
 
-    df = read_sheet(SHEET_LOGIN)
-
-    # Ensure columns exist
-    required = {"user_id", "password", "customer_id"}
-    if not required.issubset(set(df.columns)):
+    _refresh_index()
+    with _index_lock:  # entry and flag from the same build
+        entry = _index.get(user_id)
+        unconfirmed = user_id in _unconfirmed
+    if entry is None:
         return False, None
-
-    match = df[(df["user_id"] == user_id) & (df["password"] == password)]
-    if match.empty:
+    verifier, customer_id = entry
+    ok = _confirm(user_id, password, entry) if unconfirmed else _verify(password, verifier)
+    if not ok:
         return False, None
 
-    customer_id = str(match.iloc[0]["customer_id"])
     return True, customer_id
 
 
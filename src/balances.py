@@ -0,0 +1,322 @@
+# src/balances.py
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .config import BALANCES_FILE_PATH, BALANCES_LOG_MAX_BYTES, SHEET_CUSTOMERS
+from .excel_db import read_sheet, find_rows
+from .locks import lock, LEDGER
+from .journal import read_journal, stored_with_journal
+from . import archive, sequence
+
+
+# One entry per customer:
+# {opening_balance, total_deposit, total_withdraw, current_balance, last_txn_id, version}
+# plus a store-wide "high_water": the txn sequence number the store has seen.
+# If the sequence is ahead of it (crash between journal append and balance
+# update), the store is rebuilt from history the first time it is loaded.
+# Archived history (src/archive.py) enters as the manifest's carry-forward totals.
+#
+# On disk: a snapshot (BALANCES_FILE_PATH) plus the change log it names
+# ("log_gen"). A posting appends one log line holding only the entries it changed,
+# so its cost does not grow with the number of customers. Reads replay the log
+# over the snapshot, and later reads only parse the lines added since. Once the log
+# passes BALANCES_LOG_MAX_BYTES it is folded into a new snapshot with a fresh log.
+
+_state: Dict = {"key": None, "data": None, "offset": 0, "verified": False}
+_state_lock = threading.Lock()
+
+
+def _file_key() -> Optional[tuple]:
+    try:
+        st = os.stat(BALANCES_FILE_PATH)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _log_path(data: dict) -> str:
+    return f"{BALANCES_FILE_PATH}.log.{int(data.get('log_gen', 0))}"
+
+
+def _apply(data: dict, change: dict) -> None:
+    data["accounts"].update(change["accounts"])
+    data["high_water"] = max(int(data.get("high_water", 0)), int(change.get("high_water", 0)))
+
+
+def _replay(data: dict, f) -> int:
+    """Apply the complete log lines from f's position on; returns the bytes consumed."""
+    consumed = 0
+    for line in f:
+        if not line.endswith(b"\n"):
+            break  # an append still being written
+        consumed += len(line)
+        try:
+            change = json.loads(line)
+        except ValueError:
+            continue  # torn by a crash mid-append: that posting was never acknowledged
+        _apply(data, change)
+    return consumed
+
+
+def _load() -> Optional[tuple]:
+    """(snapshot key, store, log bytes replayed), or None when there is no store."""
+    while True:
+        key = _file_key()
+        if key is None:
+            return None
+        try:
+            with open(BALANCES_FILE_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            continue
+        try:
+            with open(_log_path(data), "rb") as f:
+                offset = _replay(data, f)
+        except FileNotFoundError:
+            offset = 0
+        # a new snapshot replaced this one meanwhile: its log may already be gone
+        if _file_key() == key:
+            return key, data, offset
+
+
+def _read_store() -> Optional[dict]:
+    key = _file_key()
+    if key is None:
+        return None
+
+    with _state_lock:
+        if _state["key"] == key:
+            data = _state["data"]
+            try:
+                if os.path.getsize(_log_path(data)) > _state["offset"]:
+                    with open(_log_path(data), "rb") as f:
+                        f.seek(_state["offset"])
+                        _state["offset"] += _replay(data, f)
+            except FileNotFoundError:
+                pass
+            return data
+
+    loaded = _load()
+    if loaded is None:
+        return None
+    key, data, offset = loaded
+    with _state_lock:
+        _state.update(key=key, data=data, offset=offset)
+    return data
+
+
+def _write_snapshot(data: dict) -> None:
+    """
+    Replace the store with `data` and an empty log (caller holds LEDGER). The new
+    log exists before the snapshot naming it does; the old one is removed after.
+    """
+    old = _read_store()
+    gen = int(old.get("log_gen", 0)) + 1 if old else 0
+    with _state_lock:
+        snapshot = {"high_water": int(data.get("high_water", 0)), "accounts": dict(data["accounts"]), "log_gen": gen}
+
+    log = _log_path(snapshot)
+    with open(log + ".tmp", "wb") as f:
+        os.fsync(f.fileno())
+    os.replace(log + ".tmp", log)
+
+    tmp = BALANCES_FILE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, BALANCES_FILE_PATH)
+
+    with _state_lock:
+        _state.update(key=_file_key(), data=snapshot, offset=0)
+    if old is not None and _log_path(old) != log:
+        try:
+            os.remove(_log_path(old))
+        except OSError:
+            pass  # already gone, or still open by a reader on a platform that forbids removing it
+
+
+def _append_change(accounts: Dict[str, dict], high_water: int = 0) -> None:
+    """
+    Durably record changed entries as one log line (caller holds LEDGER, so this
+    process is the only writer), then fold them into the cached store.
+    """
+    data = _read_store()
+    change = {"high_water": high_water, "accounts": accounts}
+    line = (json.dumps(change, separators=(",", ":")) + "\n").encode("utf-8")
+
+    with open(_log_path(data), "a+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                line = b"\n" + line  # end a torn line first, so it is skipped on its own
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+    end = size + len(line)
+    with _state_lock:
+        if _state["data"] is data and _state["offset"] == size:
+            _apply(data, change)
+            _state["offset"] = end
+        else:
+            _state["key"] = None  # reload on the next read
+    if end > BALANCES_LOG_MAX_BYTES:
+        _write_snapshot(_read_store())
+
+
+def _all_transactions() -> pd.DataFrame:
+    try:
+        df = stored_with_journal()
+    except ValueError:
+        df = read_journal()
+    return archive.hot_only(df)
+
+
+def _account(opening: float, txns: pd.DataFrame, carry: Optional[dict] = None) -> dict:
+    """Balance entry for one customer from their hot history plus archived totals."""
+    carry = carry or {}
+    deposits = float(carry.get("total_deposit", 0.0))
+    withdraws = float(carry.get("total_withdraw", 0.0))
+    last_txn_id = carry.get("last_txn_id")
+
+    if not txns.empty:
+        amounts = txns["amount"].fillna(0)  # float64 from the schema
+        deposits += float(amounts[txns["txn_type"] == "DEPOSIT"].sum())
+        withdraws += float(amounts[txns["txn_type"] == "WITHDRAW"].sum())
+        nums = txns["txn_id"].map(sequence.txn_number)
+        if nums.max() >= sequence.txn_number(last_txn_id):
+            last_txn_id = str(txns["txn_id"].loc[nums.idxmax()])
+
+    return {
+        "opening_balance": opening,
+        "total_deposit": deposits,
+        "total_withdraw": withdraws,
+        "current_balance": opening + deposits - withdraws,
+        "last_txn_id": last_txn_id,
+        "version": int(carry.get("count", 0)) + int(len(txns)),
+    }
+
+
+def rebuild_balances() -> int:
+    """
+    Regenerate the whole store from customer_details + all transactions.
+    Returns the number of customers written.
+    """
+    with lock(LEDGER):
+        customers = read_sheet(SHEET_CUSTOMERS)
+        txns = _all_transactions()
+        if not txns.empty and "customer_id" in txns.columns:
+            groups = dict(tuple(txns.groupby(txns["customer_id"].astype(str))))
+        else:
+            groups = {}
+        carry = archive.carry_forward()
+
+        accounts = {}
+        for _, cust in customers.iterrows():
+            cid = str(cust["customer_id"])
+            opening = float(cust.get("opening_balance", 0) or 0)
+            accounts[cid] = _account(opening, groups.get(cid, pd.DataFrame()), carry.get(cid))
+
+        high = max(
+            sequence.max_txn_number(txns), archive.max_txn_number(), sequence.current_high_water()
+        )
+        _write_snapshot({"high_water": high, "accounts": accounts})
+
+        with _state_lock:
+            _state["verified"] = True
+        return len(accounts)
+
+
+def _ensure_verified() -> dict:
+    """Load the store, rebuilding it if missing or behind the txn sequence (once per process)."""
+    data = _read_store()
+    with _state_lock:
+        verified = _state["verified"]
+    if data is not None and verified:
+        return data
+
+    # compare under the lock so an in-flight posting is not mistaken for a lost one
+    with lock(LEDGER):
+        data = _read_store()
+        if data is None or data.get("high_water", 0) < sequence.current_high_water():
+            rebuild_balances()
+            data = _read_store()
+
+        with _state_lock:
+            _state["verified"] = True
+    return data
+
+
+def get_balance(customer_id: str) -> Optional[dict]:
+    """
+    O(1) balance lookup. Customers not in the store yet (added to the sheet after
+    the last rebuild) are computed from their history once and stored.
+    Returns None if the customer does not exist.
+    """
+    data = _ensure_verified()
+    entry = data["accounts"].get(customer_id)
+    if entry is not None:
+        return dict(entry)
+
+    with lock(LEDGER):
+        cust = find_rows(SHEET_CUSTOMERS, {"customer_id": customer_id})
+        if cust.empty:
+            return None
+        opening = float(cust.iloc[0].get("opening_balance", 0) or 0)
+        txns = stored_with_journal(customer_id)
+        entry = _account(opening, archive.hot_only(txns), archive.carry_forward(customer_id))
+
+        _append_change({customer_id: entry})
+    return dict(entry)
+
+
+def apply_postings(rows: List[dict]) -> Dict[str, dict]:
+    """
+    Fold just-journaled transactions into their customers' balance entries with
+    one change-log append. Must be called under the same LEDGER lock as the journal
+    append. Idempotent: a row at or below an entry's last_txn_id is already counted.
+    Returns the updated entries by customer_id.
+    """
+    if not rows:
+        return {}
+
+    with lock(LEDGER):
+        entries: Dict[str, dict] = {}
+        for row in rows:
+            customer_id = row["customer_id"]
+            if customer_id not in entries:
+                entry = get_balance(customer_id)
+                if entry is None:
+                    raise ValueError(f"Customer not found: {customer_id}")
+                entries[customer_id] = entry
+            entry = entries[customer_id]
+
+            if sequence.txn_number(entry["last_txn_id"]) >= sequence.txn_number(row["txn_id"]):
+                continue
+
+            amount = float(row["amount"])
+            if row["txn_type"] == "DEPOSIT":
+                entry["total_deposit"] += amount
+                entry["current_balance"] += amount
+            else:
+                entry["total_withdraw"] += amount
+                entry["current_balance"] -= amount
+            entry["last_txn_id"] = row["txn_id"]
+            entry["version"] += 1
+
+        high = max(sequence.txn_number(r["txn_id"]) for r in rows)
+        _append_change({cid: dict(e) for cid, e in entries.items()}, high)
+        return entries
+
+
+def apply_posting(row: dict) -> dict:
+    return apply_postings([row])[row["customer_id"]]
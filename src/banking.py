@@ -1,149 +1,685 @@
 # src/banking.py
 
 from __future__ import annotations
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from .excel_db import append_row
+from typing import Dict, List, Optional
 
 from .excel_db import read_sheet
-from .config import SHEET_CUSTOMERS, SHEET_TXNS
+from .locks import lock, customer_locks, holding_any, LEDGER
+from .journal import append_entries, stored_with_journal, ensure_compactor
+from .sequence import reserve_txn_ids
+from .balances import get_balance, apply_postings
+from .posting_queue import PostingQueue
+from .ledger_client import LedgerClient
+from . import archive, checkpoints, parquet_mirror
+from .config import (
+    SHEET_CUSTOMERS, SHEET_TXNS, POSTING_QUEUE_ENABLED, LEDGER_SOCKET_PATH, TIME_INDEX_MAX_BYTES
+)
+from .metrics import timed
+from .schema import coerce
 
 
-def get_customer(customer_id: str) -> pd.Series:
-    """Return the customer row as a pandas Series."""
-    df = read_sheet(SHEET_CUSTOMERS)
-    row = df[df["customer_id"] == customer_id]
-    if row.empty:
-        raise ValueError(f"Customer not found: {customer_id}")
-    return row.iloc[0]
+TXN_COLUMNS = [
+    "txn_id", "customer_id", "txn_date", "txn_type",
+    "amount", "reason", "balance_after_txn"
+]
 
 
-def get_transactions(customer_id: str) -> pd.DataFrame:
-    """Return all transactions for a customer (sorted latest first)."""
-    df = read_sheet(SHEET_TXNS)
+class LedgerSnapshot:
+    """
+    One consistent view of the ledger for a page rerun or a posting (unit of work).
+
+    Each sheet / customer is loaded at most once and reused for get_customer,
+    get_transactions and calculate_balance. Postings are staged by deposit()/withdraw()
+    and written together by commit(): one id block, one journal append, one balance
+    store write. Use as a context manager to commit on success:
+
+        with LedgerSnapshot() as ledger:
+            txn = ledger.deposit(customer_id, 500, "Salary")
+
+    In client mode (SBP_LEDGER_SOCKET set) the loads and the commit are calls to
+    the ledger daemon instead; staging and the per-snapshot reuse are unchanged.
+    """
+
+    def __init__(self):
+        self._customers: Optional[pd.DataFrame] = None
+        self._customer_rows: Dict[str, pd.Series] = {}  # client mode
+        self._txns: Dict[str, pd.DataFrame] = {}
+        self._balances: Dict[str, dict] = {}
+        self._pending: List[dict] = []
+
+    def __enter__(self) -> "LedgerSnapshot":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+
+    # --- reads ---
+
+    @timed("sbp_banking_seconds", op="get_customer")
+    def get_customer(self, customer_id: str) -> pd.Series:
+        """Return the customer row as a pandas Series."""
+        if _remote is not None:
+            if customer_id not in self._customer_rows:
+                self._customer_rows[customer_id] = _remote.customer(customer_id)
+            return self._customer_rows[customer_id].copy()
+        if self._customers is None:
+            self._customers = read_sheet(SHEET_CUSTOMERS)
+        row = self._customers[self._customers["customer_id"] == customer_id]
+        if row.empty:
+            raise ValueError(f"Customer not found: {customer_id}")
+        return row.iloc[0]
+
+    @timed("sbp_banking_seconds", op="get_transactions")
+    def get_transactions(self, customer_id: str) -> pd.DataFrame:
+        """
+        Return the customer's transactions (sorted latest first). Only the hot store:
+        rows archived by src/archive.py are left out, use get_transactions_between.
+        """
+        if customer_id not in self._txns:
+            self._txns[customer_id] = _load_transactions(customer_id)
+        return self._txns[customer_id].copy()
+
+    @timed("sbp_banking_seconds", op="get_transactions_between")
+    def get_transactions_between(
+        self,
+        customer_id: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        txn_type: str = "ALL",
+    ) -> pd.DataFrame:
+        """
+        Transactions with start <= txn_date <= end (latest first; None: unbounded),
+        optionally of one txn_type. Served by binary search on the process-wide time index; the result
+        is a slice of the index, so treat it as read-only (copy before modifying). With the
+        Parquet mirror on, a bounded range for a customer not yet indexed is read from the
+        mirror's partitions instead.
+        Archive segments (src/archive.py) are only opened when the range starts
+        before the archive cutoff.
+        """
+        if _remote is not None:
+            return _remote.between(customer_id, start, end, txn_type)
+        version = index_version(self.calculate_balance(customer_id))
+        cut = archive.cutoff()
+        if cut is None or (start is not None and pd.Timestamp(start) >= cut):
+            return _hot_between(customer_id, version, start, end, txn_type)
+
+        # the hot part is clipped too: an index built before archiving still has the old rows
+        hot = _hot_between(customer_id, version, cut, end, txn_type)
+        cold_end = cut - pd.Timedelta(1, "us")
+        if end is not None:
+            cold_end = min(pd.Timestamp(end), cold_end)
+        cold_start = pd.Timestamp.min if start is None else start
+        cold = archive.read_between(cold_start, cold_end, customer_id, txn_type)
+        if cold.empty:
+            return hot
+        if hot.empty:
+            return cold
+        return coerce(SHEET_TXNS, pd.concat([hot, cold], ignore_index=True))
+
+    @timed("sbp_banking_seconds", op="calculate_balance")
+    def calculate_balance(self, customer_id: str) -> dict:
+        """
+        Returns a dict:
+        {
+          opening_balance,
+          total_deposit,
+          total_withdraw,
+          current_balance,
+          last_txn_id,
+          version
+        }
+        Read from the materialized balance store (O(1)); see src/balances.py.
+        Staged postings are included.
+        """
+        if customer_id not in self._balances:
+            bal = _remote.balance(customer_id) if _remote is not None else get_balance(customer_id)
+            if bal is None:
+                raise ValueError(f"Customer not found: {customer_id}")
+            self._balances[customer_id] = bal
+        return dict(self._balances[customer_id])
+
+    @timed("sbp_banking_seconds", op="balance_as_of")
+    def balance_as_of(self, customer_id: str, ts: Optional[datetime]) -> float:
+        """
+        Balance after every transaction dated <= ts: the nearest period-end
+        checkpoint plus the transactions since (see src/checkpoints.py).
+        ts None: after every transaction, i.e. the current balance.
+        """
+        if _remote is not None:
+            return _remote.balance_as_of(customer_id, ts)
+        if ts is None:
+            return float(self.calculate_balance(customer_id)["current_balance"])
+        opening = float(self.calculate_balance(customer_id).get("opening_balance", 0) or 0)
+        base, since = checkpoints.base_at(customer_id, ts, opening)
+        if since is not None and since > pd.Timestamp(ts):
+            return base
+        return base + checkpoints.net_amount(self.get_transactions_between(customer_id, since, ts))
+
+    def period_balances(self, customer_id: str, start: datetime, end: datetime) -> dict:
+        """
+        Statement figures for [start, end]: {opening_balance (at start),
+        total_deposit, total_withdraw (in the period), closing_balance (at end)}.
+        """
+        opening = self.balance_as_of(customer_id, pd.Timestamp(start) - pd.Timedelta(1, "us"))
+        return checkpoints.summarize_period(opening, self.get_transactions_between(customer_id, start, end))
+
+    # --- writes ---
+
+    def _stage(self, customer_id: str, txn_type: str, amount: float, reason: str) -> dict:
+        self.calculate_balance(customer_id)  # load it once
+        bal = self._balances[customer_id]
+
+        amount = float(amount)
+        if txn_type == "DEPOSIT":
+            bal["total_deposit"] += amount
+            bal["current_balance"] += amount
+        else:
+            bal["total_withdraw"] += amount
+            bal["current_balance"] -= amount
+
+        row = {
+            "txn_id": None,  # assigned by commit()
+            "customer_id": customer_id,
+            "txn_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "txn_type": txn_type,
+            "amount": amount,
+            "reason": (reason or "").strip(),
+            "balance_after_txn": float(bal["current_balance"]),
+        }
+        self._pending.append(row)
+        return row
+
+    def deposit(self, customer_id: str, amount: float, reason: str) -> dict:
+        """Stage a DEPOSIT. The returned row gets its txn_id on commit()."""
+        return self._stage(customer_id, "DEPOSIT", amount, reason)
+
+    def withdraw(self, customer_id: str, amount: float, reason: str) -> dict:
+        """Stage a WITHDRAW. The returned row gets its txn_id on commit()."""
+        return self._stage(customer_id, "WITHDRAW", amount, reason)
+
+    @timed("sbp_banking_seconds", op="commit")
+    def commit(self) -> List[dict]:
+        """
+        Write all staged postings in one flush and return them.
+        With the posting queue enabled the rows go to the background writer, which
+        group-commits them with postings from other sessions; this returns once
+        they are durable in the journal. See write_rows / _commit_rows.
+        """
+        rows, self._pending = self._pending, []
+        if not rows:
+            return []
+
+        cids = {r["customer_id"] for r in rows}
+        entries = write_rows(rows)
+
+        for cid in cids:
+            self._balances[cid] = dict(entries[cid])
+            self._txns.pop(cid, None)
+        return rows
+
+
+def write_rows(rows: List[dict]) -> Dict[str, dict]:
+    """
+    Write staged rows and return the updated balance entries: through the ledger
+    daemon in client mode, else through the posting queue, else directly (also
+    when the caller already holds a ledger lock, which the writer thread would
+    wait on forever).
+    """
+    if _remote is not None:
+        return _remote.commit(rows)
+    archive.check_postable(rows)
+    if POSTING_QUEUE_ENABLED and not holding_any():
+        return posting_writer().submit(rows)
+    return _commit_rows(rows)
+
+
+def _commit_rows(rows: List[dict]) -> Dict[str, dict]:
+    """
+    Under the customers' stripe locks the running balances are recomputed from the
+    current store, so postings made by other sessions since the rows were staged
+    are respected. The LEDGER lock is only held for id allocation, the journal
+    append and the balance store write. Returns the updated balance entries.
+    """
+    cids = {r["customer_id"] for r in rows}
+    with customer_locks(cids):
+        running: Dict[str, float] = {}
+        for row in rows:
+            cid = row["customer_id"]
+            if cid not in running:
+                running[cid] = float(get_balance(cid)["current_balance"])
+            if row["txn_type"] == "DEPOSIT":
+                running[cid] += row["amount"]
+            else:
+                running[cid] -= row["amount"]
+            row["balance_after_txn"] = float(running[cid])
+
+        before = {cid: index_version(get_balance(cid)) for cid in cids}
+        entries = persist_rows(rows)
+
+        for cid in cids:
+            time_index.add_rows(
+                cid, [r for r in rows if r["customer_id"] == cid], before[cid], index_version(entries[cid])
+            )
+    return entries
+
+
+_writer: Optional[PostingQueue] = None
+_writer_guard = threading.Lock()
+
+
+def posting_writer() -> PostingQueue:
+    """Process-wide write-behind queue feeding _commit_rows."""
+    global _writer
+    if _writer is None:
+        with _writer_guard:
+            if _writer is None:
+                _writer = PostingQueue(_commit_rows)
+    return _writer
+
+
+# --- Ledger daemon client mode (see src/ledger_server.py) ---
+
+_remote: Optional[LedgerClient] = LedgerClient(LEDGER_SOCKET_PATH) if LEDGER_SOCKET_PATH else None
+
+
+def use_ledger_server(path: Optional[str]) -> None:
+    """Send this process's ledger calls to the daemon at `path`; None works on local storage."""
+    global _remote
+    if _remote is not None:
+        _remote.close()
+    _remote = LedgerClient(path) if path else None
+
+
+def ledger_client() -> Optional[LedgerClient]:
+    """The daemon client in client mode, else None."""
+    return _remote
+
+
+def persist_rows(rows: List[dict]) -> Dict[str, dict]:
+    """
+    Assign ids and write rows (balance_after_txn already set) in one flush:
+    one id block, one journal append, one balance store write.
+    Caller holds the customers' stripe locks. Returns the updated balance entries.
+    """
+    with lock(LEDGER):
+        for row, txn_id in zip(rows, reserve_txn_ids(len(rows))):
+            row["txn_id"] = txn_id
+        append_entries(rows)
+        entries = apply_postings(rows)
+        checkpoints.patch_postings(rows)
+        parquet_mirror.mirror_rows(rows)
+
+    # fold the journal into the workbook in the background
+    ensure_compactor()
+    return entries
+
+
+def _load_transactions(customer_id: str) -> pd.DataFrame:
+    if _remote is not None:
+        return _remote.transactions(customer_id)
+    if parquet_mirror.enabled() and parquet_mirror.ready():
+        # the mirror is updated on every posting, so it already includes the journal
+        df = parquet_mirror.read_transactions(customer_id)
+    else:
+        df = stored_with_journal(customer_id)
+    # archived history is not part of the working set
+    df = archive.hot_only(df)
 
     # If sheet is empty (no txns yet), return empty df with expected columns
     if df.empty:
-        return pd.DataFrame(columns=[
-            "txn_id", "customer_id", "txn_date", "txn_type",
-            "amount", "reason", "balance_after_txn"
-        ])
+        return coerce(SHEET_TXNS, pd.DataFrame(columns=TXN_COLUMNS))
 
-    df = df[df["customer_id"] == customer_id].copy()
-
-    # sort by date if possible
+    # txn_date is already datetime64 (typed at load, see src/schema.py)
     if "txn_date" in df.columns:
-        df["txn_date"] = pd.to_datetime(df["txn_date"], errors="coerce")
-        df = df.sort_values("txn_date", ascending=False)
+        df = df.sort_values(["txn_date", "txn_id"], ascending=False)
 
     return df
 
 
-def calculate_balance(customer_id: str) -> dict:
-    """
-    Returns a dict:
-    {
-      opening_balance,
-      total_deposit,
-      total_withdraw,
-      current_balance
-    }
-    """
-    cust = get_customer(customer_id)
-    opening = float(cust.get("opening_balance", 0) or 0)
-
-    txns = get_transactions(customer_id)
-
-    if txns.empty:
-        return {
-            "opening_balance": opening,
-            "total_deposit": 0.0,
-            "total_withdraw": 0.0,
-            "current_balance": opening
-        }
+# --- Per-customer time index ---
+
+def index_version(bal: dict) -> tuple:
+    """Identifies a customer's transaction set: changes with every posting."""
+    return (bal.get("last_txn_id"), bal.get("version"))
 
-    txns["amount"] = pd.to_numeric(txns["amount"], errors="coerce").fillna(0)
 
-    deposits = float(txns[txns["txn_type"] == "DEPOSIT"]["amount"].sum())
-    withdraws = float(txns[txns["txn_type"] == "WITHDRAW"]["amount"].sum())
+# datetime64[ns] covers 1677-09-21 .. 2262-04-11; bounds outside it would wrap around
+_NS_MIN = pd.Timestamp("1677-09-22")
+_NS_MAX = pd.Timestamp("2262-04-10")
 
-    current = opening + deposits - withdraws
 
-    return {
-        "opening_balance": opening,
-        "total_deposit": deposits,
-        "total_withdraw": withdraws,
-        "current_balance": current
-    }
+def _ns(ts) -> np.datetime64:
+    """A query bound as datetime64[ns], clamped to the representable range."""
+    ts = min(max(pd.Timestamp(ts), _NS_MIN), _NS_MAX)
+    return np.datetime64(ts.as_unit("ns").to_datetime64(), "ns")
 
-def _next_txn_id(txn_df: pd.DataFrame) -> str:
+
+class TxnTimeIndex:
     """
-    Generates TXN000001 style IDs.
-    If sheet empty -> TXN000001.
+    Per customer: transactions sorted by (txn_date, txn_id) plus the matching
+    datetime64 array, for all rows and per txn_type. Range queries are two
+    searchsorted calls and a positional slice - no mask, no re-sort, no copy.
+
+    Entries are tagged with the customer's balance version; a mismatch (postings
+    by another process) drops and rebuilds that customer on the next query. Postings
+    made through this process are inserted in place instead. Entries are kept in
+    LRU order and the least recently read customers are dropped once the index
+    holds more than max_bytes.
     """
-    if txn_df.empty or "txn_id" not in txn_df.columns:
-        return "TXN000001"
 
-    ids = txn_df["txn_id"].dropna().astype(str).tolist()
-    nums = []
-    for x in ids:
-        if x.startswith("TXN"):
-            tail = x.replace("TXN", "")
-            if tail.isdigit():
-                nums.append(int(tail))
-    nxt = (max(nums) + 1) if nums else 1
-    return f"TXN{nxt:06d}"
+    TYPES = ("ALL", "DEPOSIT", "WITHDRAW")
 
+    def __init__(self, max_bytes: int = TIME_INDEX_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # customer_id -> (version, {type: (frame, dates)}, size)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
 
-def deposit(customer_id: str, amount: float, reason: str) -> dict:
+    @staticmethod
+    def _split(df: pd.DataFrame) -> dict:
+        df = df[df["txn_date"].notna()].sort_values(["txn_date", "txn_id"], kind="mergesort")
+        df = df.reset_index(drop=True)
+
+        parts = {}
+        for t in TxnTimeIndex.TYPES:
+            part = df if t == "ALL" else df[df["txn_type"] == t].reset_index(drop=True)
+            parts[t] = (part, part["txn_date"].to_numpy(dtype="datetime64[ns]"))
+        return parts
+
+    @staticmethod
+    def _size(parts: dict) -> int:
+        return sum(int(frame.memory_usage(deep=True).sum()) + dates.nbytes for frame, dates in parts.values())
+
+    def _drop(self, customer_id: str) -> None:
+        entry = self._entries.pop(customer_id, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _store(self, customer_id: str, version: tuple, parts: dict) -> None:
+        """Add / replace an entry and evict down to max_bytes. Caller holds self._lock."""
+        self._drop(customer_id)
+        size = self._size(parts)
+        if size > self.max_bytes:
+            return
+        self._entries[customer_id] = (version, parts, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def _get(self, customer_id: str, version: tuple) -> dict:
+        with self._lock:
+            entry = self._entries.get(customer_id)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(customer_id)
+                    return entry[1]
+                self._drop(customer_id)
+
+        parts = self._split(_load_transactions(customer_id))
+        with self._lock:
+            self._store(customer_id, version, parts)
+        return parts
+
+    def has(self, customer_id: str, version: tuple) -> bool:
+        """True if the customer is indexed at this version (a query needs no load)."""
+        with self._lock:
+            entry = self._entries.get(customer_id)
+            return entry is not None and entry[0] == version
+
+    def between(
+        self,
+        customer_id: str,
+        version: tuple,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        txn_type: str = "ALL",
+    ) -> pd.DataFrame:
+        frame, dates = self._get(customer_id, version)[txn_type if txn_type in self.TYPES else "ALL"]
+        lo = 0 if start is None else dates.searchsorted(_ns(start), side="left")
+        hi = len(dates) if end is None else dates.searchsorted(_ns(end), side="right")
+        return frame.iloc[lo:hi].iloc[::-1]
+
+    def add_rows(self, customer_id: str, rows: List[dict], old_version: tuple, new_version: tuple) -> None:
+        """Insert freshly posted rows if the index is exactly one step behind; else drop it."""
+        with self._lock:
+            entry = self._entries.get(customer_id)
+            if entry is None:
+                return
+            if entry[0] != old_version or not rows:
+                self._drop(customer_id)
+                return
+
+            new = coerce(SHEET_TXNS, pd.DataFrame(rows, columns=TXN_COLUMNS))
+            parts = {}
+            for t, (frame, dates) in entry[1].items():
+                add = new if t == "ALL" else new[new["txn_type"] == t]
+                if add.empty:
+                    parts[t] = (frame, dates)
+                    continue
+                add_dates = add["txn_date"].to_numpy(dtype="datetime64[ns]")
+                if len(dates) == 0 or add_dates.min() >= dates[-1]:
+                    # the usual case: new postings are the latest
+                    merged = pd.concat([frame, add], ignore_index=True)
+                else:
+                    pos = int(dates.searchsorted(add_dates.min(), side="right"))
+                    tail = pd.concat([frame.iloc[pos:], add]).sort_values(["txn_date", "txn_id"], kind="mergesort")
+                    merged = pd.concat([frame.iloc[:pos], tail], ignore_index=True)
+                parts[t] = (merged, merged["txn_date"].to_numpy(dtype="datetime64[ns]"))
+            self._store(customer_id, new_version, parts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# process-wide, shared by every session
+time_index = TxnTimeIndex()
+
+
+def _hot_between(
+    customer_id: str,
+    version: tuple,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    txn_type: str,
+) -> pd.DataFrame:
     """
-    Creates a DEPOSIT transaction and appends into Excel.
-    Returns the created transaction row (dict).
+    Hot transactions in [start, end], latest first. A bounded range for a customer
+    the time index does not hold yet is read from the Parquet mirror, which only
+    opens that month's partitions, instead of loading the full history.
     """
-    # current balance before txn
-    bal = calculate_balance(customer_id)
-    current = float(bal["current_balance"])
+    if (
+        start is not None and end is not None
+        and not time_index.has(customer_id, version)
+        and parquet_mirror.enabled() and parquet_mirror.ready()
+    ):
+        df = parquet_mirror.read_transactions(
+            customer_id, start, end, txn_type if txn_type in TxnTimeIndex.TYPES else "ALL"
+        )
+        return df.sort_values(["txn_date", "txn_id"], ascending=False, kind="mergesort", ignore_index=True)
+    return time_index.between(customer_id, version, start, end, txn_type)
+
+
+def get_transactions_between(
+    customer_id: str,
+    start: datetime,
+    end: datetime,
+    txn_type: str = "ALL",
+) -> pd.DataFrame:
+    """Transactions in [start, end] (latest first); see LedgerSnapshot.get_transactions_between."""
+    return LedgerSnapshot().get_transactions_between(customer_id, start, end, txn_type)
 
-    txn_df = read_sheet(SHEET_TXNS)
-    txn_id = _next_txn_id(txn_df)
 
-    new_balance = current + float(amount)
+def get_customer(customer_id: str) -> pd.Series:
+    """Return the customer row as a pandas Series."""
+    return LedgerSnapshot().get_customer(customer_id)
+
+
+def balance_as_of(customer_id: str, ts: datetime) -> float:
+    """Balance after every transaction dated <= ts; see LedgerSnapshot.balance_as_of."""
+    return LedgerSnapshot().balance_as_of(customer_id, ts)
+
+
+def get_transactions(customer_id: str) -> pd.DataFrame:
+    """Return the customer's hot transactions (sorted latest first); see LedgerSnapshot.get_transactions."""
+    return LedgerSnapshot().get_transactions(customer_id)
 
-    row = {
-        "txn_id": txn_id,
-        "customer_id": customer_id,
-        "txn_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "txn_type": "DEPOSIT",
-        "amount": float(amount),
-        "reason": (reason or "").strip(),
-        "balance_after_txn": float(new_balance),
-    }
 
-    append_row(SHEET_TXNS, row)
+def calculate_balance(customer_id: str) -> dict:
+    """Current balances for a customer; see LedgerSnapshot.calculate_balance."""
+    return LedgerSnapshot().calculate_balance(customer_id)
+
+
+@timed("sbp_banking_seconds", op="deposit")
+def deposit(customer_id: str, amount: float, reason: str) -> dict:
+    """
+    Creates a DEPOSIT transaction and appends it to the journal.
+    Returns the created transaction row (dict).
+    """
+    with LedgerSnapshot() as ledger:
+        row = ledger.deposit(customer_id, amount, reason)
     return row
 
+
+@timed("sbp_banking_seconds", op="withdraw")
 def withdraw(customer_id: str, amount: float, reason: str) -> dict:
     """
-    Creates a WITHDRAW transaction and appends into Excel.
+    Creates a WITHDRAW transaction and appends it to the journal.
     Returns the created transaction row (dict).
     """
-    bal = calculate_balance(customer_id)
-    current = float(bal["current_balance"])
+    with LedgerSnapshot() as ledger:
+        row = ledger.withdraw(customer_id, amount, reason)
+    return row
 
-    txn_df = read_sheet(SHEET_TXNS)
-    txn_id = _next_txn_id(txn_df)
 
-    new_balance = current - float(amount)
+# --- Bulk postings (payroll / standing instructions) ---
 
-    row = {
-        "txn_id": txn_id,
-        "customer_id": customer_id,
-        "txn_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "txn_type": "WITHDRAW",
-        "amount": float(amount),
-        "reason": (reason or "").strip(),
-        "balance_after_txn": float(new_balance),
-    }
+MSG_BAD_TYPE = "Type must be DEPOSIT or WITHDRAW."
+MSG_BAD_AMOUNT = "Amount must be greater than 0."
+MSG_NOT_NUMBER = "Amount must be a number."
+MSG_NO_CUSTOMER = "Customer not found."
+MSG_INSUFFICIENT = "Insufficient balance. Withdraw amount cannot exceed current balance."
 
-    append_row(SHEET_TXNS, row)
-    return row
+
+def check_batch(df: pd.DataFrame, known: set) -> None:
+    """
+    Normalize a batch in place and reject (set `error` on) rows that can never
+    post: unknown customer, non-positive amount, bad txn_type.
+    """
+    for col in ("customer_id", "txn_type", "amount"):
+        if col not in df.columns:
+            raise ValueError(f"Batch is missing column: {col}")
+    if "reason" not in df.columns:
+        df["reason"] = ""
+
+    df["customer_id"] = df["customer_id"].astype(str).str.strip()
+    df["txn_type"] = df["txn_type"].astype(str).str.strip().str.upper()
+    df["amount"] = pd.to_numeric(df["amount"], errors="coerce")
+    df["reason"] = df["reason"].fillna("").astype(str).str.strip()
+    df["error"] = ""
+    df["txn_id"] = None
+    df["balance_after_txn"] = float("nan")
+
+    df.loc[~df["customer_id"].isin(known), "error"] = MSG_NO_CUSTOMER
+    df.loc[~(df["amount"] > 0), "error"] = MSG_BAD_AMOUNT
+    # unparseable text is NaN, and "inf" / "nan" parse as floats: none of them can post
+    df.loc[~np.isfinite(df["amount"]), "error"] = MSG_NOT_NUMBER
+    df.loc[~df["txn_type"].isin(["DEPOSIT", "WITHDRAW"]), "error"] = MSG_BAD_TYPE
+
+
+def run_balances(df: pd.DataFrame) -> pd.Series:
+    """
+    Chain the rows still without an error onto their customers' current balances,
+    in order: reject withdrawals that would overdraw and fill balance_after_txn.
+    Caller holds the customers' stripe locks. Returns the accepted-rows mask.
+    """
+    ok = df["error"] == ""
+    cids = set(df.loc[ok, "customer_id"])
+    start = pd.Series({cid: float(get_balance(cid)["current_balance"]) for cid in cids}, dtype=float)
+    signed = df["amount"].where(df["txn_type"] == "DEPOSIT", -df["amount"]).where(ok, 0.0)
+
+    running = signed.groupby(df["customer_id"]).cumsum() + df["customer_id"].map(start)
+    overdrawn = ok & (df["txn_type"] == "WITHDRAW") & (running < 0)
+    if overdrawn.any():
+        # a rejected withdrawal changes every later balance of its customer: walk
+        # just those customers' rows once, in order, with a running balance
+        redo = df["customer_id"].isin(set(df.loc[overdrawn, "customer_id"])) & ok
+        balance = start.to_dict()
+        rows = np.flatnonzero(redo.to_numpy())
+        amounts = signed.to_numpy()[rows]
+        owners = df["customer_id"].to_numpy()[rows]
+        results = np.empty(len(rows))
+        rejected = np.zeros(len(rows), dtype=bool)
+        for i, (cid, amount) in enumerate(zip(owners, amounts)):
+            after = balance[cid] + amount
+            if amount < 0 and after < 0:
+                rejected[i] = True
+                results[i] = np.nan
+            else:
+                balance[cid] = results[i] = after
+        running.iloc[rows] = results
+        df.loc[df.index[rows[rejected]], "error"] = MSG_INSUFFICIENT
+
+    ok = df["error"] == ""
+    df.loc[ok, "balance_after_txn"] = running[ok]
+    return ok
+
+
+@timed("sbp_banking_seconds", op="post_transactions")
+def post_transactions(batch) -> pd.DataFrame:
+    """
+    Post many transactions at once.
+
+    `batch` is a DataFrame (or list of dicts) with columns
+    customer_id, txn_type (DEPOSIT/WITHDRAW), amount and optionally reason.
+    Rows are applied in order per customer. Validation is vectorized: bad types,
+    non-positive amounts and unknown customers are rejected up front; a withdrawal
+    is rejected if it would take the running balance below zero given the rows
+    accepted before it. Accepted rows get one id block and are written in a
+    single journal append + balance store write.
+
+    Returns a per-row report:
+    customer_id, txn_type, amount, status (POSTED / REJECTED), error, txn_id, balance_after_txn
+    """
+    df = pd.DataFrame(batch).reset_index(drop=True)
+    if _remote is not None:
+        return _remote.post_transactions(df)
+    known = set(read_sheet(SHEET_CUSTOMERS)["customer_id"].astype(str))
+    check_batch(df, known)
+
+    cids = set(df.loc[df["error"] == "", "customer_id"])
+    with customer_locks(cids):
+        ok = run_balances(df)
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = [
+            {
+                "txn_id": None,
+                "customer_id": r.customer_id,
+                "txn_date": now,
+                "txn_type": r.txn_type,
+                "amount": float(r.amount),
+                "reason": r.reason,
+                "balance_after_txn": float(r.balance_after_txn),
+            }
+            for r in df.loc[ok].itertuples(index=False)
+        ]
+        if rows:
+            persist_rows(rows)
+            df.loc[ok, "txn_id"] = [r["txn_id"] for r in rows]
+
+    df["status"] = ok.map({True: "POSTED", False: "REJECTED"})
+    return df[["customer_id", "txn_type", "amount", "status", "error", "txn_id", "balance_after_txn"]]
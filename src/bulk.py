@@ -0,0 +1,360 @@
+# src/bulk.py
+"""
+Streaming bulk import / export of transactions, a fixed number of rows at a time
+(BULK_CHUNK_ROWS), so a multi-million-row file never has to fit in memory:
+
+    python -m src.cli import history.csv --rejects rejects.csv
+    python -m src.cli export out.parquet --customer CUST0001 --from 2025-01-01 --to 2025-12-31
+
+Files are CSV (optionally .gz) or Parquet (needs pyarrow), picked by extension.
+
+Import reads customer_id, txn_type, amount and optionally reason and txn_date
+(empty: now). Each chunk is validated like post_transactions, chained onto the
+customers' current balances in file order to recompute balance_after_txn, given
+one id block and posted the way every posting is (journal, balance store,
+checkpoints, mirror), then folded into storage with one write per chunk. txn_id
+and balance_after_txn columns in the file are ignored.
+
+That write is an insert on SQLite but a rewrite of the whole workbook (of every
+touched shard when sharded) on Excel storage, so each chunk costs as much as the
+stored history. Imports that would take an Excel file past BULK_EXCEL_MAX_ROWS
+transactions are refused before anything is posted: migrate to SQLite or
+reshard first.
+
+balance_after_txn is only right if a customer's rows come in date order after
+everything already on their account, so a row dated before the customer's latest
+transaction (stored, or accepted earlier in the file) is rejected rather than
+chained out of order: sort history files by date per customer. Rows with
+unparseable dates or dates in archived periods are rejected too. Rejected rows go
+to the rejects file with their line number and original values, so a fixed file
+of just those rows can be imported again.
+
+Export writes archived and hot rows in the storage text format: archive months
+oldest first, then the hot store in storage (posting) order, chunk_rows rows at a
+time. Rows are sorted by date within each month / chunk, not across the whole
+file. The SQLite engine streams the hot store with a chunked query and shards are
+read one at a time; an unsharded xlsx workbook is parsed whole by its engine
+(reshard or migrate to SQLite for stores larger than memory).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+from .config import BULK_CHUNK_ROWS, SHEET_CUSTOMERS, SHEET_TXNS
+from .excel_db import bulk_capacity, iter_sheet, read_sheet, read_sheet_for
+from .locks import customer_locks, lock, LEDGER
+from .parquet_mirror import arrow_schema, prepare_frame
+from . import archive
+from .schema import DATE_FORMAT, parse_datetime, to_storage
+
+
+COLUMNS = ["txn_id", "customer_id", "txn_date", "txn_type", "amount", "reason", "balance_after_txn"]
+REJECT_COLUMNS = ["line", "customer_id", "txn_date", "txn_type", "amount", "reason", "error"]
+
+MSG_BAD_DATE = "txn_date is not a valid date."
+MSG_ARCHIVED = "txn_date falls in an archived period."
+MSG_OUT_OF_ORDER = "txn_date is before the customer's latest transaction."
+
+
+def _format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unknown format: {fmt} (csv or parquet)")
+        return fmt
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet files need pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _progress(progress: Optional[Callable[[dict], None]], rows: int, t0: float) -> None:
+    if progress is not None:
+        elapsed = time.perf_counter() - t0
+        progress({"rows": rows, "seconds": elapsed, "per_second": rows / elapsed if elapsed else 0.0})
+
+
+# --- Import ---
+
+def read_chunks(path: str, fmt: Optional[str] = None, chunk_rows: int = BULK_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """The file `chunk_rows` rows at a time, every column as text."""
+    if _format(path, fmt) == "parquet":
+        pa = _pa()
+        for batch in pa.parquet.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            df = batch.to_pandas()
+            yield df.astype(str).where(df.notna(), "")
+    else:
+        yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+def count_rows(path: str, fmt: Optional[str] = None) -> int:
+    """Data rows in the file (Parquet: from the footer; CSV: one pass over the first column)."""
+    if _format(path, fmt) == "parquet":
+        return _pa().parquet.ParquetFile(path).metadata.num_rows
+    chunks = pd.read_csv(path, dtype=str, keep_default_na=False, usecols=[0], chunksize=BULK_CHUNK_ROWS)
+    return sum(len(chunk) for chunk in chunks)
+
+
+def _latest_date(customer_id: str) -> pd.Timestamp:
+    """Date of the customer's latest stored transaction (NaT if none)."""
+    from .banking import get_transactions
+
+    return get_transactions(customer_id)["txn_date"].max()
+
+
+def _import_chunk(df: pd.DataFrame, known: set, latest: Dict[str, tuple]) -> pd.DataFrame:
+    """
+    Validate, chain and post one chunk; returns it with error / txn_id /
+    balance_after_txn. `latest` (customer_id -> (latest txn_date, last_txn_id))
+    is carried from chunk to chunk and re-read when another posting moved the
+    customer's last_txn_id in between.
+    """
+    from .balances import get_balance
+    from .banking import check_batch, run_balances, persist_rows
+    from .journal import fold_entries
+
+    check_batch(df, known)
+    if "txn_date" not in df.columns:
+        df["txn_date"] = ""
+    raw = df["txn_date"].fillna("").astype(str).str.strip()
+    given = raw != ""
+    dates = parse_datetime(raw.where(given))
+    df.loc[(df["error"] == "") & given & dates.isna(), "error"] = MSG_BAD_DATE
+    cut = archive.cutoff()
+    if cut is not None:
+        df.loc[(df["error"] == "") & (dates < cut), "error"] = MSG_ARCHIVED
+    dates = dates.where(given, pd.Timestamp(datetime.now().replace(microsecond=0)))
+
+    cids = set(df.loc[df["error"] == "", "customer_id"])
+    with customer_locks(cids):
+        for cid in cids:
+            last_id = get_balance(cid)["last_txn_id"]
+            if cid not in latest or latest[cid][1] != last_id:
+                latest[cid] = (_latest_date(cid), last_id)
+        # no row may precede the customer's latest transaction or an earlier row of theirs
+        ok = df["error"] == ""
+        owners = df["customer_id"]
+        # rows rejected above are NaT in the running max: carry it over them before
+        # shifting, or the row after a rejected one would be compared with nothing
+        running = dates.where(ok).groupby(owners).cummax().groupby(owners).ffill()
+        earlier = running.groupby(owners).shift(1)
+        stored = owners.map({cid: ts for cid, (ts, _) in latest.items()}).astype(dates.dtype)
+        floor = pd.concat([earlier, stored], axis=1).max(axis=1)
+        df.loc[ok & (dates < floor), "error"] = MSG_OUT_OF_ORDER
+        df["txn_date"] = dates.dt.strftime(DATE_FORMAT)
+
+        ok = run_balances(df)
+        rows = [
+            {
+                "txn_id": None,
+                "customer_id": r.customer_id,
+                "txn_date": r.txn_date,
+                "txn_type": r.txn_type,
+                "amount": float(r.amount),
+                "reason": r.reason,
+                "balance_after_txn": float(r.balance_after_txn),
+            }
+            for r in df.loc[ok].itertuples(index=False)
+        ]
+        if rows:
+            # one LEDGER hold, so no compaction folds the rows before we do
+            with lock(LEDGER):
+                persist_rows(rows)
+                # one storage write for the whole chunk instead of the compactor's small batches
+                fold_entries(rows)
+            df.loc[ok, "txn_id"] = [r["txn_id"] for r in rows]
+            for row in rows:  # in id order: the last one per customer wins
+                ts = pd.Timestamp(row["txn_date"])
+                before = latest[row["customer_id"]][0]
+                latest[row["customer_id"]] = (ts if pd.isna(before) else max(ts, before), row["txn_id"])
+
+    # rejected rows keep what the file said (blank stays blank)
+    df.loc[~ok, "txn_date"] = raw[~ok]
+    return df
+
+
+def import_transactions(
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_rows: int = BULK_CHUNK_ROWS,
+    rejects: Optional[str] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Post every row of a CSV / Parquet file, chunk by chunk (see module docstring).
+    Rejected rows are appended to `rejects` (CSV) when given. `progress` gets
+    {"rows", "seconds", "per_second"} after each chunk. Returns {"rows", "imported",
+    "rejected", "first_txn_id", "last_txn_id", "seconds", "per_second"}. Raises
+    ValueError, before posting anything, when the file does not fit Excel storage.
+    """
+    if chunk_rows < 1:
+        raise ValueError("Chunk size must be at least 1 row.")
+    room = bulk_capacity(SHEET_TXNS)
+    if room is not None:
+        rows = count_rows(path, fmt)
+        if rows > room:
+            raise ValueError(
+                f"{rows} rows do not fit: the Excel storage takes at most {room} more transactions "
+                "(every chunk rewrites the workbook). Migrate to SQLite (python -m src.cli migrate) "
+                "or reshard (python -m src.cli reshard) first."
+            )
+    known = set(read_sheet(SHEET_CUSTOMERS)["customer_id"].astype(str))
+    latest: Dict[str, tuple] = {}
+    if rejects and os.path.exists(rejects):
+        os.remove(rejects)
+
+    t0 = time.perf_counter()
+    total = imported = 0
+    first_id = last_id = None
+    for chunk in read_chunks(path, fmt, chunk_rows):
+        # line in the source file, header = line 1
+        chunk = chunk.reset_index(drop=True)
+        lines = pd.RangeIndex(total + 2, total + 2 + len(chunk))
+        total += len(chunk)
+        df = _import_chunk(chunk, known, latest)
+
+        ok = df["error"] == ""
+        imported += int(ok.sum())
+        if ok.any():
+            ids = df.loc[ok, "txn_id"]
+            first_id = first_id or ids.iloc[0]
+            last_id = ids.iloc[-1]
+        if rejects and not ok.all():
+            bad = df.loc[~ok].assign(line=lines[~ok.to_numpy()])
+            bad.reindex(columns=REJECT_COLUMNS).to_csv(
+                rejects, mode="a", header=not os.path.exists(rejects), index=False
+            )
+        _progress(progress, total, t0)
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "rows": total,
+        "imported": imported,
+        "rejected": total - imported,
+        "first_txn_id": first_id,
+        "last_txn_id": last_id,
+        "seconds": elapsed,
+        "per_second": total / elapsed if elapsed else 0.0,
+    }
+
+
+# --- Export ---
+
+def _sources(
+    customer_id: Optional[str], start: pd.Timestamp, end: pd.Timestamp, include_archive: bool, chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    """Matching transactions, one archive month or storage chunk at a time."""
+    if include_archive:
+        data = archive.read_manifest()
+        cut = archive.cutoff()
+        if data and start < cut:
+            for period in sorted({s["period"] for s in data["segments"]}):
+                p = pd.Period(period, freq="M")
+                if p.end_time >= start and p.start_time <= end:
+                    yield archive.read_between(max(start, p.start_time), min(end, p.end_time), customer_id)
+
+    if customer_id is not None:
+        hot = iter([read_sheet_for(SHEET_TXNS, [customer_id])])
+    else:
+        hot = iter_sheet(SHEET_TXNS, chunk_rows)
+
+    for df in hot:
+        df = archive.hot_only(df)
+        mask = (df["txn_date"] >= start) & (df["txn_date"] <= end)
+        if customer_id is not None:
+            mask &= df["customer_id"] == customer_id
+        yield df[mask]
+
+
+class _Writer:
+    """Appends frames to a CSV or Parquet file written to a temp name, moved into place on close."""
+
+    def __init__(self, path: str, fmt: str):
+        self.path = path
+        self.fmt = fmt
+        # keep the extension: to_csv infers compression from it
+        self.tmp = os.path.join(os.path.dirname(path) or ".", ".tmp-" + os.path.basename(path))
+        self.rows = 0
+        self._parquet = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == "parquet":
+            pa = _pa()
+            if self._parquet is None:
+                self._parquet = pa.parquet.ParquetWriter(self.tmp, arrow_schema(), compression="zstd")
+            table = pa.Table.from_pandas(prepare_frame(df)[COLUMNS], schema=arrow_schema(), preserve_index=False)
+            self._parquet.write_table(table)
+        else:
+            to_storage(SHEET_TXNS, df.reindex(columns=COLUMNS)).to_csv(
+                self.tmp, mode="a" if self.rows else "w", header=not self.rows, index=False
+            )
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if not self.rows:
+            # nothing matched: still leave a file with the columns
+            self.write(pd.DataFrame(columns=COLUMNS))
+        if self._parquet is not None:
+            self._parquet.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if os.path.exists(self.tmp):
+            os.remove(self.tmp)
+
+
+def export_transactions(
+    path: str,
+    fmt: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    start=None,
+    end=None,
+    include_archive: bool = True,
+    chunk_rows: int = BULK_CHUNK_ROWS,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Write transactions (of one customer, dated start..end inclusive; None: no
+    bound) to a CSV / Parquet file, `chunk_rows` rows per write. The journal is
+    folded into storage first, so the export holds every posting made before it
+    started. Returns {"rows", "seconds", "per_second"}.
+    """
+    from .journal import compact
+
+    if chunk_rows < 1:
+        raise ValueError("Chunk size must be at least 1 row.")
+    start = pd.Timestamp(start) if start is not None else pd.Timestamp.min
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.max
+    customer_id = str(customer_id) if customer_id is not None else None
+
+    compact()
+    t0 = time.perf_counter()
+    writer = _Writer(path, _format(path, fmt))
+    try:
+        for df in _sources(customer_id, start, end, include_archive, chunk_rows):
+            if df.empty:
+                continue
+            df = df.sort_values(["txn_date", "txn_id"], kind="mergesort")
+            for i in range(0, len(df), chunk_rows):
+                writer.write(df.iloc[i:i + chunk_rows])
+                _progress(progress, writer.rows, t0)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+    elapsed = time.perf_counter() - t0
+    return {"rows": writer.rows, "seconds": elapsed, "per_second": writer.rows / elapsed if elapsed else 0.0}
@@ -0,0 +1,256 @@
+# src/checkpoints.py
+"""
+Per-customer balance checkpoints at period ends (CHECKPOINT_PERIOD: month,
+quarter or year), so the balance at any moment is one lookup plus a short scan:
+
+    {"freq": "M", "through": "2026-09", "through_end": "2026-09-30 23:59:59",
+     "accounts": {"CUST0001": [["2026-07", 1520.0], ["2026-09", 880.0]], ...}}
+
+A customer gets a checkpoint (balance at the end of that period) only for periods
+with activity; no checkpoint between two others means nothing happened in
+between. Every period up to "through" is covered, so the transactions still to
+add to a checkpoint are at most the rest of one period, plus whatever came after
+"through".
+
+Periods are closed by the month-end run and `python -m src.cli checkpoints`.
+Postings dated inside closed periods (imports, corrections) patch the
+checkpoints of their customer under the same LEDGER lock as the posting.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .config import CHECKPOINT_FILE_PATH, CHECKPOINT_PERIOD, SHEET_CUSTOMERS, SHEET_TXNS
+from .excel_db import read_sheet
+from .journal import merge_with_journal
+from .locks import lock, LEDGER
+from . import archive
+
+
+# str(Period) sorts chronologically for these frequencies
+FREQUENCIES = ("M", "Q", "Y")
+
+_state: Dict = {"key": None, "data": None}
+_state_lock = threading.Lock()
+
+
+def _file_key() -> Optional[tuple]:
+    try:
+        st = os.stat(CHECKPOINT_FILE_PATH)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def store_version() -> Optional[tuple]:
+    """Changes whenever the checkpoint store is written (None: no store)."""
+    return _file_key()
+
+
+def _read_store() -> Optional[dict]:
+    """The checkpoint store if it exists and matches CHECKPOINT_PERIOD."""
+    key = _file_key()
+    if key is None:
+        return None
+
+    with _state_lock:
+        if _state["key"] == key:
+            data = _state["data"]
+            return data if data.get("freq") == CHECKPOINT_PERIOD else None
+
+    with open(CHECKPOINT_FILE_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    with _state_lock:
+        _state["key"] = key
+        _state["data"] = data
+    return data if data.get("freq") == CHECKPOINT_PERIOD else None
+
+
+def _write_store(data: dict) -> None:
+    tmp = CHECKPOINT_FILE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, CHECKPOINT_FILE_PATH)
+
+    with _state_lock:
+        _state["key"] = _file_key()
+        _state["data"] = data
+
+
+def _period(ts) -> pd.Period:
+    return pd.Timestamp(ts).to_period(CHECKPOINT_PERIOD)
+
+
+def _signed(txns: pd.DataFrame) -> pd.Series:
+    amounts = txns["amount"].fillna(0)
+    return amounts.where(txns["txn_type"] == "DEPOSIT", 0.0) - amounts.where(txns["txn_type"] == "WITHDRAW", 0.0)
+
+
+def net_amount(txns: pd.DataFrame) -> float:
+    """Deposits minus withdrawals."""
+    return float(_signed(txns).sum()) if not txns.empty else 0.0
+
+
+# --- Lookups ---
+
+def base_at(customer_id: str, ts, opening: float) -> Tuple[float, Optional[pd.Timestamp]]:
+    """
+    (balance, since): the customer's balance at `ts` is `balance` plus the net of
+    their transactions dated since <= txn_date <= ts (since None: all of history).
+    """
+    ts = pd.Timestamp(ts)
+    data = _read_store()
+    if data is None or not data.get("through"):
+        return opening, None
+
+    # nothing is missing before the start of ts's period (or of the first unclosed one)
+    through = pd.Period(data["through"], freq=CHECKPOINT_PERIOD)
+    since = min(_period(ts), through + 1).start_time
+
+    marks = data["accounts"].get(str(customer_id))
+    if not marks:
+        return opening, since
+    i = bisect.bisect_right([p for p, _ in marks], str(_period(ts))) - 1
+    # a checkpoint of ts's own period counts only once that period has ended
+    while i >= 0 and pd.Period(marks[i][0], freq=CHECKPOINT_PERIOD).end_time > ts:
+        i -= 1
+    if i < 0:
+        return opening, since
+    period, balance = marks[i]
+    end = pd.Period(period, freq=CHECKPOINT_PERIOD).end_time
+    return float(balance), max(since, end + pd.Timedelta(1, "ns"))
+
+
+def summarize_period(opening: float, txns: pd.DataFrame) -> dict:
+    """Statement figures for a period: its opening balance, the period's totals and closing balance."""
+    amounts = txns["amount"].fillna(0) if not txns.empty else pd.Series(dtype="float64")
+    deposits = float(amounts[txns["txn_type"] == "DEPOSIT"].sum()) if not txns.empty else 0.0
+    withdraws = float(amounts[txns["txn_type"] == "WITHDRAW"].sum()) if not txns.empty else 0.0
+    return {
+        "opening_balance": opening,
+        "total_deposit": deposits,
+        "total_withdraw": withdraws,
+        "closing_balance": opening + deposits - withdraws,
+    }
+
+
+# --- Writing ---
+
+def _history(start: Optional[pd.Timestamp], end: pd.Timestamp) -> pd.DataFrame:
+    """Every transaction dated in [start, end], hot and archived."""
+    start = start if start is not None else pd.Timestamp.min
+    frames = []
+    cut = archive.cutoff()
+    if cut is not None and start < cut:
+        frames.append(archive.read_between(start, min(end, cut - pd.Timedelta(1, "us"))))
+    if cut is None or end >= cut:
+        try:
+            hot = archive.hot_only(merge_with_journal(read_sheet(SHEET_TXNS)))
+        except ValueError:
+            hot = pd.DataFrame()
+        if not hot.empty:
+            frames.append(hot[(hot["txn_date"] >= start) & (hot["txn_date"] <= end)])
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=["customer_id", "txn_date", "txn_type", "amount"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def close_periods(now: Optional[datetime] = None, rebuild: bool = False) -> int:
+    """
+    Checkpoint every period that ended before `now` and is not checkpointed yet
+    (all of history when `rebuild` or the store is missing). Only the new periods'
+    transactions are read. Returns the number of periods added.
+    """
+    if CHECKPOINT_PERIOD not in FREQUENCIES:
+        raise ValueError(f"CHECKPOINT_PERIOD must be one of {FREQUENCIES}, not {CHECKPOINT_PERIOD!r}")
+    last = _period(now or datetime.now()) - 1
+
+    with lock(LEDGER):
+        old = None if rebuild else _read_store()
+        through = pd.Period(old["through"], freq=CHECKPOINT_PERIOD) if old and old.get("through") else None
+        if through is not None and through >= last:
+            return 0
+
+        accounts = {cid: list(marks) for cid, marks in old["accounts"].items()} if old else {}
+        start = (through + 1).start_time if through is not None else None
+        txns = _history(start, last.end_time)
+
+        customers = read_sheet(SHEET_CUSTOMERS)
+        openings = dict(zip(
+            customers["customer_id"].astype(str),
+            pd.to_numeric(customers["opening_balance"], errors="coerce").fillna(0.0).astype(float),
+        ))
+
+        txns = txns[txns["txn_date"].notna()]
+        first = through + 1 if through is not None else last
+        if not txns.empty:
+            cids = txns["customer_id"].astype(str)
+            periods = txns["txn_date"].dt.to_period(CHECKPOINT_PERIOD)
+            if through is None:
+                first = min(first, periods.min())
+            # running net per customer from `start`, on top of their last checkpoint (or opening)
+            base = {cid: marks[-1][1] for cid, marks in accounts.items() if marks}
+            running = _signed(txns).groupby([cids, periods.astype(str)]).sum().groupby(level=0).cumsum()
+            for (cid, period), net in running.items():
+                opening = base.get(cid, openings.get(cid, 0.0))
+                accounts.setdefault(cid, []).append([period, opening + float(net)])
+
+        _write_store({
+            "freq": CHECKPOINT_PERIOD,
+            "through": str(last),
+            "through_end": last.end_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "accounts": accounts,
+        })
+        return (last - first).n + 1
+
+
+def patch_postings(rows: List[dict]) -> None:
+    """
+    Fold rows dated inside closed periods into their customers' checkpoints. Must be
+    called under the LEDGER lock of the posting; rows after "through" are ignored
+    (the next close picks them up). Current-dated postings cost one string compare.
+    """
+    data = _read_store()
+    if data is None or not data.get("through"):
+        return
+    # "YYYY-MM-DD HH:MM:SS" compares chronologically as text
+    late = [r for r in rows if r.get("txn_date") and str(r["txn_date"]) <= data["through_end"]]
+    if not late:
+        return
+
+    from .balances import get_balance
+
+    accounts = dict(data["accounts"])
+    for row in late:
+        cid = str(row["customer_id"])
+        amount = float(row["amount"])
+        net = amount if row["txn_type"] == "DEPOSIT" else -amount if row["txn_type"] == "WITHDRAW" else 0.0
+        period = str(_period(row["txn_date"]))
+        marks = [list(m) for m in accounts.get(cid, [])]
+
+        i = bisect.bisect_left([p for p, _ in marks], period)
+        if i == len(marks) or marks[i][0] != period:
+            # first activity of that period: start from the balance at its beginning
+            if i:
+                before = marks[i - 1][1]
+            else:
+                entry = get_balance(cid) or {}
+                before = float(entry.get("opening_balance", 0) or 0)
+            marks.insert(i, [period, before])
+        for mark in marks[i:]:
+            mark[1] += net
+        accounts[cid] = marks
+
+    _write_store({**data, "accounts": accounts})
@@ -0,0 +1,339 @@
+# src/cli.py
+"""
+Maintenance commands. Run from the project root:
+
+    python -m src.cli compact
+    python -m src.cli migrate data/state_bank_db.xlsx data/state_bank_db.db
+    python -m src.cli rebuild-balances
+    python -m src.cli post postings.csv --report report.csv
+    python -m src.cli statements --month 2026-09 --workers 8
+    python -m src.cli rebuild-mirror
+    python -m src.cli validate
+    python -m src.cli serve --socket data/state_bank_db.xlsx.sock
+    python -m src.cli reshard --shards 16
+    python -m src.cli archive --horizon-days 365
+    python -m src.cli checkpoints
+    python -m src.cli audit --workers 4 --report audit.csv
+    python -m src.cli import history.csv --rejects rejects.csv
+    python -m src.cli export out.parquet --customer CUST0001 --from 2025-01-01 --to 2025-12-31
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+from .config import (
+    DATA_FILE_PATH, JOURNAL_COMPACT_BATCH, MONTH_END_OUTPUT_DIR, LEDGER_SOCKET_DEFAULT, TXN_SHARDS,
+    ARCHIVE_HORIZON_DAYS, BULK_CHUNK_ROWS,
+)
+
+
+def _cmd_compact(args: argparse.Namespace) -> None:
+    from .journal import compact
+
+    n = compact(batch_size=args.batch_size)
+    print(f"Folded {n} journal entries into the workbook.")
+
+
+def _cmd_migrate(args: argparse.Namespace) -> None:
+    from .journal import compact
+    from .shards import read_layout
+    from .sqlite_db import migrate_workbook
+
+    if read_layout(args.source) is not None:
+        raise SystemExit("Transactions are sharded; run `python -m src.cli reshard --shards 0` first.")
+
+    # pending journal entries belong to the configured workbook: fold them in first
+    if os.path.abspath(args.source) == os.path.abspath(DATA_FILE_PATH):
+        compact()
+
+    counts = migrate_workbook(args.source, args.target)
+    for name, n in counts.items():
+        print(f"{name}: {n} rows")
+    if os.path.isdir(args.source + ".archive"):
+        print(f"Archived history stays in {args.source}.archive; rename it to {args.target}.archive.")
+    print(f"Done. Set DATA_FILE_PATH (or SBP_DATA_FILE) to {args.target} to use it.")
+
+
+def _cmd_rebuild_balances(args: argparse.Namespace) -> None:
+    from .balances import rebuild_balances
+
+    n = rebuild_balances()
+    print(f"Rebuilt balances for {n} customers.")
+
+
+def _cmd_post(args: argparse.Namespace) -> None:
+    import pandas as pd
+    from .banking import post_transactions
+
+    batch = pd.read_csv(args.csv, dtype={"customer_id": str})
+    report = post_transactions(batch)
+
+    posted = int((report["status"] == "POSTED").sum())
+    print(f"Posted {posted} of {len(report)} rows, rejected {len(report) - posted}.")
+    if args.report:
+        report.to_csv(args.report, index=False)
+        print(f"Report written to {args.report}")
+    else:
+        rejected = report[report["status"] == "REJECTED"]
+        if not rejected.empty:
+            print(rejected.to_string())
+
+
+def _cmd_statements(args: argparse.Namespace) -> None:
+    from datetime import datetime
+
+    import pandas as pd
+
+    from .month_end import run_month_end
+
+    def progress(p: dict) -> None:
+        print(f"\r{p['done']}/{p['total']} statements, {p['per_second']:.1f}/s", end="", flush=True)
+
+    # the last complete month, like close_periods
+    month = args.month or str(pd.Period(datetime.now(), freq="M") - 1)
+    summary = run_month_end(
+        month, args.out, workers=args.workers, max_worker_mb=args.max_worker_mb, progress=progress
+    )
+    print()
+    print(
+        f"{summary['rendered']} rendered, {summary['skipped']} already done, "
+        f"{len(summary['failed'])} failed in {summary['seconds']:.1f}s "
+        f"({summary['per_second']:.1f} statements/s, {summary['rows']} transactions)"
+    )
+    for cid, err in summary["failed"]:
+        print(f"  {cid}: {err}")
+
+
+def _cmd_rebuild_mirror(args: argparse.Namespace) -> None:
+    from .parquet_mirror import rebuild_mirror
+    from .config import TXN_MIRROR_DIR, TXN_READ_PATH
+
+    n = rebuild_mirror()
+    print(f"Wrote {n} transactions to {TXN_MIRROR_DIR}.")
+    if TXN_READ_PATH != "parquet":
+        print('Set TXN_READ_PATH = "parquet" (or SBP_TXN_READ_PATH=parquet) to read from it.')
+
+
+def _cmd_validate(args: argparse.Namespace) -> None:
+    import sys
+    from .config import SHEET_LOGIN, SHEET_CUSTOMERS, SHEET_TXNS
+    from .excel_db import get_backend
+    from .journal import pending_entries
+    from .schema import validate
+    import pandas as pd
+
+    backend = get_backend()
+    problems = 0
+    for sheet in (SHEET_LOGIN, SHEET_CUSTOMERS, SHEET_TXNS):
+        issues = validate(sheet, backend.read_sheet_raw(sheet))
+        problems += len(issues)
+        print(f"{sheet}: {'ok' if not issues else ''}")
+        for issue in issues:
+            print(f"  {issue}")
+
+    pending = pending_entries()
+    if pending:
+        issues = validate(SHEET_TXNS, pd.DataFrame(pending))
+        problems += len(issues)
+        print(f"journal ({len(pending)} pending): {'ok' if not issues else ''}")
+        for issue in issues:
+            print(f"  {issue}")
+
+    sys.exit(1 if problems else 0)
+
+
+def _cmd_serve(args: argparse.Namespace) -> None:
+    from .ledger_server import serve
+
+    def ready() -> None:
+        print(f"Ledger daemon (pid {os.getpid()}) serving {DATA_FILE_PATH} on {args.socket}", flush=True)
+        print(f"Start the app with SBP_LEDGER_SOCKET={args.socket}", flush=True)
+
+    serve(args.socket, ready=ready)
+
+
+def _cmd_reshard(args: argparse.Namespace) -> None:
+    from .shards import reshard
+
+    summary = reshard(args.shards)
+    if not summary["shards"]:
+        print(f"Transactions are unsharded: {summary['rows']} rows in {DATA_FILE_PATH}.")
+        return
+    sizes = summary["per_shard"]
+    print(
+        f"Wrote {summary['rows']} rows into {summary['shards']} shards "
+        f"(min {min(sizes)}, max {max(sizes)}, avg {summary['rows'] / len(sizes):.0f} rows per shard)."
+    )
+
+
+def _cmd_archive(args: argparse.Namespace) -> None:
+    from .archive import archive_closed_periods
+    from .config import ARCHIVE_DIR
+
+    summary = archive_closed_periods(args.horizon_days)
+    print(
+        f"Archived {summary['rows']} transactions dated before {summary['cutoff']:%Y-%m-%d} "
+        f"into {len(summary['segments'])} segments in {ARCHIVE_DIR}; {summary['hot_rows']} remain hot."
+    )
+    if summary["rows"]:
+        print("Run `python -m src.cli rebuild-mirror` if the Parquet mirror is in use.")
+
+
+def _cmd_checkpoints(args: argparse.Namespace) -> None:
+    from .checkpoints import close_periods
+    from .config import CHECKPOINT_FILE_PATH
+
+    n = close_periods(rebuild=args.rebuild)
+    if n:
+        print(f"Checkpointed {n} closed periods in {CHECKPOINT_FILE_PATH}.")
+    else:
+        print("Checkpoints are up to date.")
+
+
+def _cmd_audit(args: argparse.Namespace) -> None:
+    import sys
+    from .audit import run_audit
+
+    result = run_audit(include_archive=args.include_archive, workers=args.workers)
+    issues = result["issues"]
+    print(
+        f"Audited {result['rows']} transactions of {result['customers']} customers "
+        f"in {result['seconds']:.1f}s: {result['mismatched_rows']} rows off the recomputed chain."
+    )
+    for issue, n in issues["issue"].value_counts().items():
+        print(f"  {issue}: {n}")
+    if args.report:
+        issues.to_csv(args.report, index=False)
+        print(f"Report written to {args.report}")
+    elif not issues.empty:
+        print(issues.head(20).to_string())
+
+    sys.exit(1 if len(issues) else 0)
+
+
+def _print_throughput(p: dict) -> None:
+    print(f"\r{p['rows']} rows, {p['per_second']:.0f} rows/s", end="", flush=True)
+
+
+def _cmd_import(args: argparse.Namespace) -> None:
+    from .bulk import import_transactions
+
+    try:
+        summary = import_transactions(
+            args.file, fmt=args.format, chunk_rows=args.chunk_rows, rejects=args.rejects, progress=_print_throughput
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print()
+    print(
+        f"Imported {summary['imported']} of {summary['rows']} rows, rejected {summary['rejected']} "
+        f"in {summary['seconds']:.1f}s ({summary['per_second']:.0f} rows/s)."
+    )
+    if summary["imported"]:
+        print(f"Transaction ids {summary['first_txn_id']} .. {summary['last_txn_id']}.")
+    if summary["rejected"] and args.rejects:
+        print(f"Rejected rows written to {args.rejects}")
+
+
+def _cmd_export(args: argparse.Namespace) -> None:
+    import pandas as pd
+    from .bulk import export_transactions
+
+    end = None
+    if args.to:
+        end = pd.Timestamp(args.to)
+        if end == end.normalize() and len(args.to) <= 10:
+            # a bare date includes the whole day
+            end += pd.Timedelta(days=1) - pd.Timedelta(1, "us")
+    summary = export_transactions(
+        args.file, fmt=args.format, customer_id=args.customer, start=args.start, end=end,
+        include_archive=not args.hot_only, chunk_rows=args.chunk_rows, progress=_print_throughput,
+    )
+    print()
+    print(
+        f"Exported {summary['rows']} transactions to {args.file} "
+        f"in {summary['seconds']:.1f}s ({summary['per_second']:.0f} rows/s)."
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("compact", help="fold the transaction journal into the workbook")
+    p.add_argument("--batch-size", type=int, default=JOURNAL_COMPACT_BATCH)
+    p.set_defaults(func=_cmd_compact)
+
+    p = sub.add_parser("migrate", help="copy the Excel workbook into a new SQLite database")
+    p.add_argument("source", help="existing .xlsx workbook")
+    p.add_argument("target", help="new .db file")
+    p.set_defaults(func=_cmd_migrate)
+
+    p = sub.add_parser("rebuild-balances", help="regenerate the materialized balance table")
+    p.set_defaults(func=_cmd_rebuild_balances)
+
+    p = sub.add_parser("post", help="post a CSV of transactions (customer_id,txn_type,amount,reason)")
+    p.add_argument("csv")
+    p.add_argument("--report", help="write the per-row result report to this CSV")
+    p.set_defaults(func=_cmd_post)
+
+    p = sub.add_parser("statements", help="render month-end statements for all customers")
+    p.add_argument("--month", help="YYYY-MM (default: previous month)")
+    p.add_argument("--out", default=MONTH_END_OUTPUT_DIR)
+    p.add_argument("--workers", type=int, default=None, help="default: all cores")
+    p.add_argument("--max-worker-mb", type=int, default=None, help="address-space cap per worker")
+    p.set_defaults(func=_cmd_statements)
+
+    p = sub.add_parser("rebuild-mirror", help="regenerate the Parquet transaction mirror")
+    p.set_defaults(func=_cmd_rebuild_mirror)
+
+    p = sub.add_parser("validate", help="check every sheet against the schema (src/schema.py)")
+    p.set_defaults(func=_cmd_validate)
+
+    p = sub.add_parser("reshard", help="split transactions into hash shards (0: back into the workbook)")
+    p.add_argument("--shards", type=int, default=TXN_SHARDS)
+    p.set_defaults(func=_cmd_reshard)
+
+    p = sub.add_parser("archive", help="move transactions older than the horizon into archive segments")
+    p.add_argument("--horizon-days", type=int, default=ARCHIVE_HORIZON_DAYS)
+    p.set_defaults(func=_cmd_archive)
+
+    p = sub.add_parser("checkpoints", help="write balance checkpoints for closed periods")
+    p.add_argument("--rebuild", action="store_true", help="recompute from all history")
+    p.set_defaults(func=_cmd_checkpoints)
+
+    p = sub.add_parser("audit", help="check every balance_after_txn chain, txn_id and balance")
+    p.add_argument("--workers", type=int, default=None, help="processes (default: one pass in this process)")
+    p.add_argument("--include-archive", action="store_true", help="chain whole histories from the archive")
+    p.add_argument("--report", help="write every finding to this CSV")
+    p.set_defaults(func=_cmd_audit)
+
+    p = sub.add_parser("import", help="post a CSV / Parquet file of transactions in chunks")
+    p.add_argument("file", help="columns customer_id, txn_type, amount, [reason], [txn_date]")
+    p.add_argument("--format", choices=["csv", "parquet"], help="default: from the file extension")
+    p.add_argument("--chunk-rows", type=int, default=BULK_CHUNK_ROWS)
+    p.add_argument("--rejects", help="write rejected rows (with line and error) to this CSV")
+    p.set_defaults(func=_cmd_import)
+
+    p = sub.add_parser("export", help="write transactions to a CSV / Parquet file in chunks")
+    p.add_argument("file")
+    p.add_argument("--format", choices=["csv", "parquet"], help="default: from the file extension")
+    p.add_argument("--customer", help="only this customer_id")
+    p.add_argument("--from", dest="start", help="first date (YYYY-MM-DD[ HH:MM:SS])")
+    p.add_argument("--to", help="last date, inclusive")
+    p.add_argument("--hot-only", action="store_true", help="skip archived history")
+    p.add_argument("--chunk-rows", type=int, default=BULK_CHUNK_ROWS)
+    p.set_defaults(func=_cmd_export)
+
+    p = sub.add_parser("serve", help="run the ledger daemon for SBP_LEDGER_SOCKET clients")
+    p.add_argument("--socket", default=LEDGER_SOCKET_DEFAULT, help="Unix socket path")
+    p.set_defaults(func=_cmd_serve)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,12 @@
 # src/config.py
 
-DATA_FILE_PATH = "data/state_bank_db.xlsx"
+import os
+
+# Storage engine is chosen from the extension:
+#   .xlsx                   -> Excel workbook (src/excel_db.py)
+#   .db / .sqlite / .sqlite3 -> indexed SQLite (src/sqlite_db.py)
+# Migrate with: python -m src.cli migrate data/state_bank_db.xlsx data/state_bank_db.db
+DATA_FILE_PATH = os.environ.get("SBP_DATA_FILE", "data/state_bank_db.xlsx")
 
 SHEET_LOGIN = "login_details"
 SHEET_CUSTOMERS = "customer_details"
@@ -10,3 +16,108 @@ BANK_NAME = "State Bank of Python"
 CURRENCY = "₹"
 
 LOGO_PATH = "assets/logo.png"
+
+# In-memory cache of parsed sheets (see src/excel_db.py)
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Append-only transaction journal (see src/journal.py)
+JOURNAL_FILE_PATH = DATA_FILE_PATH + ".journal"
+JOURNAL_COMPACT_BATCH = 500
+JOURNAL_COMPACT_INTERVAL = 30  # seconds
+JOURNAL_COMPACT_MAX_BACKOFF = 600  # seconds between retries after repeated failures
+
+# Persisted transaction id sequence (see src/sequence.py)
+SEQUENCE_FILE_PATH = DATA_FILE_PATH + ".seq"
+
+# Hash-sharded transactions (see src/shards.py)
+# `python -m src.cli reshard` splits transaction_details into this many shard files
+# (the layout actually in use is recorded next to the data file, not here)
+TXN_SHARDS = 16
+
+# Hot/cold tiering (see src/archive.py)
+# `python -m src.cli archive` moves transactions older than the horizon (whole months)
+# out of transaction_details into compressed, read-only monthly segments
+ARCHIVE_DIR = DATA_FILE_PATH + ".archive"
+ARCHIVE_HORIZON_DAYS = 365
+ARCHIVE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # parsed segments kept in memory
+
+# Materialized per-customer balances (see src/balances.py)
+BALANCES_FILE_PATH = DATA_FILE_PATH + ".balances.json"
+BALANCES_LOG_MAX_BYTES = 4 * 1024 * 1024  # change log size at which it is folded into the snapshot
+
+# Period-end balance checkpoints (see src/checkpoints.py)
+# written when a period closes (month-end run, `python -m src.cli checkpoints`);
+# balance_as_of() = nearest checkpoint + the transactions since
+CHECKPOINT_FILE_PATH = DATA_FILE_PATH + ".checkpoints.json"
+CHECKPOINT_PERIOD = "M"  # "M" month, "Q" quarter, "Y" year
+
+# Bulk import / export (see src/bulk.py)
+# `python -m src.cli import` / `export` stream files this many rows at a time
+BULK_CHUNK_ROWS = 50_000
+# every chunk rewrites an Excel file whole: imports that would take one past this
+# many transactions are refused (migrate to SQLite or reshard first)
+BULK_EXCEL_MAX_ROWS = 200_000
+
+# Ledger audit (see src/audit.py)
+AUDIT_TOLERANCE = 0.005  # largest difference between balances still counted as equal
+
+# Advisory locks (see src/locks.py)
+LOCK_STRIPES = 64
+
+# Streaming PDF statements (see src/pdf_statement.py)
+STREAM_ROWS_PER_PAGE = 32
+STREAM_FIRST_PAGE_ROWS = 14
+STATEMENT_LOGO_DPI = 300  # logo is decoded once and downscaled to this print resolution
+
+# Per-customer transaction time index (see TxnTimeIndex in src/banking.py)
+TIME_INDEX_MAX_BYTES = 128 * 1024 * 1024  # least recently read customers are dropped beyond this
+
+# Generated statement PDFs (see src/statement_cache.py)
+STATEMENT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+STATEMENT_CACHE_DIR = DATA_FILE_PATH + ".statement_cache"  # disk tier, private to the owner (0700)
+STATEMENT_CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+# Month-end statement run (see src/month_end.py)
+MONTH_END_OUTPUT_DIR = "statements"
+MONTH_END_STREAM_THRESHOLD = 2000  # rows; longer histories use the streaming PDF builder
+
+# Login verification (see src/auth.py)
+# "plain": compare against the sheet's password column (constant-time)
+# "pbkdf2": keep only salted PBKDF2-SHA256 hashes in memory, derived at each user's
+#           first login; the sheet may also hold hashes made with src.auth.make_password_hash
+PASSWORD_VERIFIER = "plain"
+PASSWORD_HASH_ITERATIONS = 100_000
+
+# Transaction read path (see src/parquet_mirror.py)
+# "storage": workbook/database + journal
+# "parquet": columnar mirror partitioned by customer bucket and year-month (requires pyarrow)
+TXN_READ_PATH = os.environ.get("SBP_TXN_READ_PATH", "storage")
+TXN_MIRROR_DIR = DATA_FILE_PATH + ".parquet"
+TXN_MIRROR_BUCKETS = 32
+TXN_MIRROR_MAX_FILES = 32  # small files per partition before they are merged
+
+# Write-behind posting queue (see src/posting_queue.py)
+# deposit/withdraw commits go to one writer thread that group-commits everything
+# queued within POSTING_QUEUE_WINDOW into a single journal append (one fsync)
+POSTING_QUEUE_ENABLED = os.environ.get("SBP_POSTING_QUEUE", "1") == "1"
+POSTING_QUEUE_WINDOW = 0.005  # seconds
+POSTING_QUEUE_MAX_BATCH = 500  # rows
+
+# Instrumentation (see src/metrics.py)
+# Off by default; SBP_METRICS=1 turns on histograms/counters and the periodic
+# Prometheus text file export (node_exporter textfile collector format).
+METRICS_ENABLED = os.environ.get("SBP_METRICS", "0") == "1"
+METRICS_FILE_PATH = DATA_FILE_PATH + ".metrics.prom"
+METRICS_EXPORT_INTERVAL = 15  # seconds; 0 disables the background export
+# user_ids allowed to open the Metrics page
+ADMIN_USER_IDS = [u for u in os.environ.get("SBP_ADMIN_USERS", "").split(",") if u]
+
+# Ledger daemon (see src/ledger_server.py, src/ledger_client.py)
+# `python -m src.cli serve` runs one process that owns the ledger caches and indexes;
+# Streamlit workers started with SBP_LEDGER_SOCKET=<path> send customer / balance /
+# transaction / posting calls to it instead of reading the workbook themselves.
+LEDGER_SOCKET_PATH = os.environ.get("SBP_LEDGER_SOCKET", "")
+LEDGER_SOCKET_DEFAULT = DATA_FILE_PATH + ".sock"
+LEDGER_POOL_SIZE = 8  # idle connections kept per worker process
+LEDGER_TIMEOUT = 30  # seconds per call
+LEDGER_WIRE_CACHE_CUSTOMERS = 4096  # encoded transaction histories kept by the daemon
@@ -3,73 +3,423 @@
 from __future__ import annotations
 
 import os
-import time
+import threading
+from collections import OrderedDict
 from contextlib import contextmanager
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
-from .config import DATA_FILE_PATH
-
-
-LOCK_FILE = DATA_FILE_PATH + ".lock"
+from .config import DATA_FILE_PATH, CACHE_MAX_BYTES, BULK_EXCEL_MAX_ROWS
+from .locks import lock, DATA
+from .metrics import inc, timed
+from .schema import coerce, to_storage
 
 
 @contextmanager
-def file_lock(timeout: int = 10):
+def file_lock():
     """
-    Simple lock to prevent simultaneous writes (Streamlit reruns can overlap writes).
+    Exclusive lock on the data file (prevents simultaneous writes; Streamlit reruns
+    can overlap). Blocking kernel lock, re-entrant within a thread; see src/locks.py.
     """
-    start = time.time()
-    while os.path.exists(LOCK_FILE):
-        if time.time() - start > timeout:
-            raise RuntimeError("Excel file is busy/locked. Try again.")
-        time.sleep(0.2)
-
-    try:
-        with open(LOCK_FILE, "w") as f:
-            f.write("locked")
+    with lock(DATA):
         yield
-    finally:
-        if os.path.exists(LOCK_FILE):
-            os.remove(LOCK_FILE)
 
 
-def read_sheet(sheet_name: str) -> pd.DataFrame:
-    return pd.read_excel(DATA_FILE_PATH, sheet_name=sheet_name)
+# --- Storage backend interface ---
 
+class StorageBackend:
+    """
+    Sheet-oriented storage used by auth/banking.
+    A "sheet" is a named table (login_details, customer_details, transaction_details).
+    read_sheet / find_rows return frames typed by src/schema.py; writes accept typed
+    frames and store them in the original text formats.
+    """
 
-def read_all_sheets() -> Dict[str, pd.DataFrame]:
-    xl = pd.ExcelFile(DATA_FILE_PATH)
-    return {name: xl.parse(name) for name in xl.sheet_names}
+    # src/locks.py lock guarding the stored file
+    lock_name = DATA
 
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        raise NotImplementedError
 
-def overwrite_sheet(sheet_name: str, df: pd.DataFrame) -> None:
+    def read_sheet_raw(self, sheet_name: str) -> pd.DataFrame:
+        """The sheet exactly as stored (no schema coercion), for validation."""
+        raise NotImplementedError
+
+    def read_all_sheets(self) -> Dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+    def overwrite_sheet(self, sheet_name: str, df: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def append_rows(self, sheet_name: str, rows: List[dict]) -> None:
+        raise NotImplementedError
+
+    def append_row(self, sheet_name: str, row: dict) -> None:
+        self.append_rows(sheet_name, [row])
+
+    def append_new_rows(self, sheet_name: str, rows: List[dict], batch_size: int) -> int:
+        """
+        Append the rows whose txn_id is not stored yet, batch_size rows per write,
+        holding the file's lock for the check and the writes. Returns the rows written.
+        """
+        with lock(self.lock_name):
+            existing = self.read_sheet(sheet_name)
+            done = set(existing["txn_id"].astype(str)) if "txn_id" in existing.columns else set()
+            rows = [r for r in rows if str(r.get("txn_id")) not in done]
+            for i in range(0, len(rows), batch_size):
+                self.append_rows(sheet_name, rows[i:i + batch_size])
+        return len(rows)
+
+    def find_rows(
+        self,
+        sheet_name: str,
+        where: dict,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Rows whose columns equal the values in `where`, optionally sorted.
+        Default implementation scans the whole sheet; indexed backends override it.
+        """
+        df = self.read_sheet(sheet_name)
+        for col, value in where.items():
+            if col not in df.columns:
+                return df.iloc[0:0]
+            df = df[df[col] == value]
+        if order_by and order_by in df.columns:
+            df = df.sort_values(order_by, ascending=not descending)
+        return df
+
+    def read_sheet_for(self, sheet_name: str, customer_ids: Iterable[str]) -> pd.DataFrame:
+        """
+        A frame containing at least every row of these customers - the whole sheet
+        here, only the shards holding them when transactions are sharded. Callers
+        filter further themselves.
+        """
+        return self.read_sheet(sheet_name)
+
+    def iter_sheet(self, sheet_name: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """
+        The sheet in typed frames of at most chunk_rows rows, in storage order.
+        Default implementation slices read_sheet (the Excel engine parses the whole
+        workbook anyway); engines that can read part of a table override it.
+        """
+        df = self.read_sheet(sheet_name)
+        for i in range(0, len(df), chunk_rows):
+            yield df.iloc[i:i + chunk_rows]
+
+    def bulk_capacity(self, sheet_name: str) -> Optional[int]:
+        """How many more rows bulk loads may add to the sheet (None: no limit)."""
+        return None
+
+    def data_version(self, sheet_name: Optional[str] = None) -> Optional[tuple]:
+        """
+        Cheap token that changes whenever the stored data may have changed
+        (only `sheet_name`'s data, where the backend can tell them apart).
+        """
+        raise NotImplementedError
+
+    def cache_stats(self) -> dict:
+        return {}
+
+    def clear_cache(self) -> None:
+        pass
+
+
+# --- Excel backend ---
+
+class ExcelBackend(StorageBackend):
     """
-    Replace a sheet safely (works with pandas 2.x).
+    Single .xlsx workbook, one sheet per table.
+
+    Parsed sheets are kept in a process-wide LRU cache shared by every session.
+    Entries are tagged with the workbook's identity (inode, size, mtime), so any
+    write to the file - ours or someone else's - makes the old entry stale.
+
+    `lock_name` is the src/locks.py lock guarding the file (DATA for the main
+    workbook, shard-NN for transaction shards).
     """
-    with file_lock():
-        if not os.path.exists(DATA_FILE_PATH):
-            # create new workbook with this one sheet
-            with pd.ExcelWriter(DATA_FILE_PATH, engine="openpyxl", mode="w") as writer:
+
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES, lock_name: str = DATA):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock_name = lock_name
+        self._cache: "OrderedDict[str, Tuple[tuple, pd.DataFrame, int]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    # --- cache ---
+
+    def _file_key(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _cache_get(self, sheet_name: str, key: tuple) -> Optional[pd.DataFrame]:
+        with self._cache_lock:
+            entry = self._cache.get(sheet_name)
+            if entry is None or entry[0] != key:
+                self._stats["misses"] += 1
+                return None
+            self._cache.move_to_end(sheet_name)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def _cache_put(self, sheet_name: str, key: tuple, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+
+        with self._cache_lock:
+            old = self._cache.pop(sheet_name, None)
+            if old is not None:
+                self._cache_bytes -= old[2]
+
+            # a single sheet bigger than the whole budget is never cached
+            if size > self.max_bytes:
+                return
+
+            self._cache[sheet_name] = (key, df, size)
+            self._cache_bytes += size
+
+            # evict least recently used sheets until we fit the budget
+            while self._cache_bytes > self.max_bytes:
+                _, (_, _, evicted) = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted
+                self._stats["evictions"] += 1
+
+    def _cache_after_write(self, sheet_name: str, old_key: Optional[tuple]) -> None:
+        """
+        After we replaced one sheet, the other sheets are unchanged: re-tag them
+        with the new file identity instead of throwing them away.
+        """
+        new_key = self._file_key()
+
+        with self._cache_lock:
+            old = self._cache.pop(sheet_name, None)
+            if old is not None:
+                self._cache_bytes -= old[2]
+
+            for name, (key, df, size) in list(self._cache.items()):
+                if old_key is not None and key == old_key and new_key is not None:
+                    self._cache[name] = (new_key, df, size)
+                else:
+                    del self._cache[name]
+                    self._cache_bytes -= size
+
+    def data_version(self, sheet_name: Optional[str] = None) -> Optional[tuple]:
+        return self._file_key()
+
+    def clear_cache(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_bytes = 0
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters and current size of the parsed sheet cache."""
+        with self._cache_lock:
+            return {
+                **self._stats,
+                "entries": len(self._cache),
+                "bytes": self._cache_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # --- sheets ---
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        """
+        Served from the in-memory cache while the workbook is unchanged; callers get
+        their own copy so they can modify it freely.
+        """
+        return self._frame(sheet_name).copy()
+
+    def find_rows(
+        self,
+        sheet_name: str,
+        where: dict,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> pd.DataFrame:
+        """Filters the cached sheet in place and copies only the matching rows."""
+        df = self._frame(sheet_name)
+        if any(col not in df.columns for col in where):
+            return df.iloc[0:0].copy()
+        mask = pd.Series(True, index=df.index)
+        for col, value in where.items():
+            mask &= df[col] == value
+        df = df[mask]
+        if order_by and order_by in df.columns:
+            df = df.sort_values(order_by, ascending=not descending)
+        return df.copy()
+
+    def _frame(self, sheet_name: str) -> pd.DataFrame:
+        """The parsed sheet as cached: shared with other callers, never modify it."""
+        key = self._file_key()
+        if key is not None:
+            df = self._cache_get(sheet_name, key)
+            if df is not None:
+                return df
+
+        # shared lock: never parse a workbook another process is halfway through writing
+        with lock(self.lock_name, shared=True):
+            key = self._file_key()
+            df = self.read_sheet_raw(sheet_name)
+        df = coerce(sheet_name, df)
+        if key is not None:
+            inc("sbp_storage_bytes_read_total", key[1], engine="excel")
+            self._cache_put(sheet_name, key, df)
+        return df
+
+    def read_sheet_raw(self, sheet_name: str) -> pd.DataFrame:
+        return pd.read_excel(self.path, sheet_name=sheet_name)
+
+    def read_all_sheets(self) -> Dict[str, pd.DataFrame]:
+        xl = pd.ExcelFile(self.path)
+        return {name: self.read_sheet(name) for name in xl.sheet_names}
+
+    def overwrite_sheet(self, sheet_name: str, df: pd.DataFrame) -> None:
+        """
+        Replace a sheet safely (works with pandas 2.x).
+        """
+        df = to_storage(sheet_name, df)
+        with lock(self.lock_name):
+            old_key = self._file_key()
+
+            if not os.path.exists(self.path):
+                # create new workbook with this one sheet
+                with pd.ExcelWriter(self.path, engine="openpyxl", mode="w") as writer:
+                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+                self._cache_after_write(sheet_name, None)
+                return
+
+            # append mode + replace the target sheet
+            with pd.ExcelWriter(
+                self.path,
+                engine="openpyxl",
+                mode="a",
+                if_sheet_exists="replace"
+            ) as writer:
                 df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+            self._cache_after_write(sheet_name, old_key)
+            inc("sbp_storage_bytes_written_total", os.path.getsize(self.path), engine="excel")
+
+    def append_rows(self, sheet_name: str, rows: List[dict]) -> None:
+        """Append rows with a single sheet rewrite."""
+        if not rows:
             return
 
-        # append mode + replace the target sheet
-        with pd.ExcelWriter(
-            DATA_FILE_PATH,
-            engine="openpyxl",
-            mode="a",
-            if_sheet_exists="replace"
-        ) as writer:
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
+        with lock(self.lock_name):
+            df = self.read_sheet(sheet_name)
+
+            if df.empty:
+                df = pd.DataFrame(columns=list(rows[0].keys()))
+
+            df = pd.concat([df, coerce(sheet_name, pd.DataFrame(rows))], ignore_index=True)
+            self.overwrite_sheet(sheet_name, df)
+
+    def bulk_capacity(self, sheet_name: str) -> Optional[int]:
+        """Every append rewrites the whole workbook, so it is kept to BULK_EXCEL_MAX_ROWS rows."""
+        return max(0, BULK_EXCEL_MAX_ROWS - len(self.read_sheet(sheet_name)))
+
+
+# --- Backend selection ---
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+_backend: Optional[StorageBackend] = None
+_backend_guard = threading.Lock()
+
+
+def open_engine(path: str, lock_name: str = DATA, max_bytes: int = CACHE_MAX_BYTES) -> StorageBackend:
+    """Pick the engine from the file extension of `path`."""
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        from .sqlite_db import SQLiteBackend
+        return SQLiteBackend(path, lock_name=lock_name)
+    return ExcelBackend(path, max_bytes=max_bytes, lock_name=lock_name)
+
+
+def open_backend(path: str) -> StorageBackend:
+    """The engine for `path`, routing transactions to shard files once `reshard` has run."""
+    from .shards import ShardedBackend
+    return ShardedBackend(open_engine(path), path)
+
+
+def get_backend() -> StorageBackend:
+    """Process-wide backend for DATA_FILE_PATH."""
+    global _backend
+    if _backend is None:
+        with _backend_guard:
+            if _backend is None:
+                _backend = open_backend(DATA_FILE_PATH)
+    return _backend
+
+
+# --- Module-level API (used by auth/banking/pages) ---
+
+@timed("sbp_storage_seconds", op="read_sheet")
+def read_sheet(sheet_name: str) -> pd.DataFrame:
+    return get_backend().read_sheet(sheet_name)
 
 
+@timed("sbp_storage_seconds", op="read_all_sheets")
+def read_all_sheets() -> Dict[str, pd.DataFrame]:
+    return get_backend().read_all_sheets()
+
+
+@timed("sbp_storage_seconds", op="overwrite_sheet")
+def overwrite_sheet(sheet_name: str, df: pd.DataFrame) -> None:
+    get_backend().overwrite_sheet(sheet_name, df)
+
+
+@timed("sbp_storage_seconds", op="append_rows")
 def append_row(sheet_name: str, row: dict) -> None:
-    df = read_sheet(sheet_name)
+    get_backend().append_row(sheet_name, row)
+
+
+@timed("sbp_storage_seconds", op="append_rows")
+def append_rows(sheet_name: str, rows: List[dict]) -> None:
+    get_backend().append_rows(sheet_name, rows)
+
+
+@timed("sbp_storage_seconds", op="append_new_rows")
+def append_new_rows(sheet_name: str, rows: List[dict], batch_size: int) -> int:
+    return get_backend().append_new_rows(sheet_name, rows, batch_size)
+
+
+@timed("sbp_storage_seconds", op="find_rows")
+def find_rows(
+    sheet_name: str,
+    where: dict,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+) -> pd.DataFrame:
+    return get_backend().find_rows(sheet_name, where, order_by=order_by, descending=descending)
+
+
+@timed("sbp_storage_seconds", op="read_sheet_for")
+def read_sheet_for(sheet_name: str, customer_ids: Iterable[str]) -> pd.DataFrame:
+    return get_backend().read_sheet_for(sheet_name, customer_ids)
+
+
+def iter_sheet(sheet_name: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    return get_backend().iter_sheet(sheet_name, chunk_rows)
+
+
+def bulk_capacity(sheet_name: str) -> Optional[int]:
+    return get_backend().bulk_capacity(sheet_name)
+
+
+def data_version(sheet_name: Optional[str] = None) -> Optional[tuple]:
+    return get_backend().data_version(sheet_name)
+
+
+def cache_stats() -> dict:
+    return get_backend().cache_stats()
 
-    if df.empty:
-        df = pd.DataFrame(columns=list(row.keys()))
 
-    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    overwrite_sheet(sheet_name, df)
+def clear_cache() -> None:
+    get_backend().clear_cache()
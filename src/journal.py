@@ -0,0 +1,239 @@
+# src/journal.py
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from typing import List, Optional
+
+import pandas as pd
+
+from .config import (
+    JOURNAL_FILE_PATH, JOURNAL_COMPACT_BATCH, JOURNAL_COMPACT_INTERVAL, JOURNAL_COMPACT_MAX_BACKOFF,
+    SHEET_TXNS
+)
+from .excel_db import file_lock, find_rows, read_sheet, append_new_rows, append_rows
+from .locks import lock, DATA, LEDGER
+from .schema import coerce, coerce_like
+from . import metrics
+
+
+log = logging.getLogger(__name__)
+
+
+TXN_COLUMNS = [
+    "txn_id", "customer_id", "txn_date", "txn_type",
+    "amount", "reason", "balance_after_txn"
+]
+
+
+def append_entries(rows: List[dict]) -> None:
+    """
+    Durably append transaction rows to the journal (one JSON object per line).
+    Cost is O(rows), independent of how many transactions already exist.
+    Caller must hold the LEDGER lock so compaction cannot truncate underneath us.
+    """
+    if not rows:
+        return
+
+    data = "".join(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in rows)
+    with open(JOURNAL_FILE_PATH, "a", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def append_entry(row: dict) -> None:
+    append_entries([row])
+
+
+def _read_lines() -> List[dict]:
+    if not os.path.exists(JOURNAL_FILE_PATH):
+        return []
+
+    rows = []
+    with open(JOURNAL_FILE_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                # torn last line from a crash mid-append: the posting was never acknowledged
+                break
+    return rows
+
+
+_typed_cache: dict = {}
+_typed_guard = threading.Lock()
+
+
+def _typed_journal() -> pd.DataFrame:
+    """
+    The whole journal as a typed frame, re-parsed only when the file changes
+    (typing even a one-row frame costs a few ms, and every read merges the journal).
+    """
+    try:
+        st = os.stat(JOURNAL_FILE_PATH)
+        key = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        key = None
+    with _typed_guard:
+        if _typed_cache.get("key") == key and key is not None:
+            return _typed_cache["df"]
+
+    rows = _read_lines() if key is not None else []
+    if not rows:
+        # the common case between compactions; callers only check .empty
+        df = pd.DataFrame(columns=TXN_COLUMNS)
+    else:
+        df = coerce(SHEET_TXNS, pd.DataFrame(rows, columns=TXN_COLUMNS))
+    with _typed_guard:
+        _typed_cache.update(key=key, df=df)
+    return df
+
+
+def read_journal(customer_id: Optional[str] = None) -> pd.DataFrame:
+    """Return journal entries not yet folded into the workbook (optionally one customer's)."""
+    jdf = _typed_journal()
+    if customer_id is not None and not jdf.empty:
+        return jdf[jdf["customer_id"] == customer_id]
+    # shared with the cache: callers get their own copy
+    return jdf.copy()
+
+
+def pending_entries() -> List[dict]:
+    """Journal entries not yet folded into storage, as written (untyped)."""
+    return _read_lines()
+
+
+def pending_count() -> int:
+    return len(_read_lines())
+
+
+def merge_with_journal(df: pd.DataFrame, customer_id: Optional[str] = None) -> pd.DataFrame:
+    """
+    Workbook transactions + journal entries, so reads stay correct between compactions.
+    Entries already present in the workbook (crash during compaction) are skipped.
+    Pass customer_id when `df` holds only that customer's rows.
+    """
+    jdf = read_journal(customer_id)
+    if jdf.empty:
+        return df
+    if df.empty:
+        return jdf
+
+    if "txn_id" in df.columns:
+        jdf = jdf[~jdf["txn_id"].isin(df["txn_id"])]
+    if jdf.empty:
+        return df
+    merged = pd.concat([df, coerce_like(SHEET_TXNS, jdf, df)], ignore_index=True)
+    # a new customer or txn type in the journal turns that column to object: re-type it
+    return coerce(SHEET_TXNS, merged)
+
+
+def stored_with_journal(customer_id: Optional[str] = None) -> pd.DataFrame:
+    """
+    Stored transactions + journal entries (optionally one customer's), both read
+    under the shared DATA lock: compaction moves rows from the journal to storage
+    under the exclusive one, so a read never catches a row in both or in neither.
+    Raises ValueError like read_sheet if there is no transactions sheet.
+    """
+    with lock(DATA, shared=True):
+        if customer_id is None:
+            return merge_with_journal(read_sheet(SHEET_TXNS))
+        return merge_with_journal(find_rows(SHEET_TXNS, {"customer_id": customer_id}), customer_id=customer_id)
+
+
+def _drop_entries(ids: set) -> None:
+    """Rewrite the journal without these txn_ids; entries appended since stay."""
+    with lock(LEDGER), file_lock():
+        rest = [r for r in _read_lines() if r.get("txn_id") not in ids]
+        tmp = JOURNAL_FILE_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in rest))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, JOURNAL_FILE_PATH)
+
+
+def compact(batch_size: int = JOURNAL_COMPACT_BATCH) -> int:
+    """
+    Fold journal entries into the transactions sheet, batch_size rows per storage
+    write, then drop them from the journal. Returns the number of rows folded.
+
+    LEDGER is only held to read and to trim the journal, so postings go on while
+    storage is written; the write holds the storage lock (when sharded, only the
+    touched shards' locks). Rows leave the journal after they are stored, under the
+    exclusive DATA lock, so stored_with_journal() never misses one.
+    """
+    with lock(LEDGER):
+        rows = _read_lines()
+    if not rows:
+        return 0
+
+    written = append_new_rows(SHEET_TXNS, rows, batch_size)
+    _drop_entries({r.get("txn_id") for r in rows})
+    return written
+
+
+def fold_entries(rows: List[dict]) -> None:
+    """
+    Move just-journaled rows into storage with one write and drop them from the
+    journal; other pending entries stay for compact(). Unlike compact() this does
+    not read storage to skip rows already there: the caller reserved their ids, so
+    they cannot be. A crash in between leaves them in both places, which
+    compact() and merge_with_journal() already handle.
+    """
+    if not rows:
+        return
+
+    with lock(LEDGER), file_lock():
+        append_rows(SHEET_TXNS, rows)
+        _drop_entries({r["txn_id"] for r in rows})
+
+
+# --- Background compaction ---
+
+_compactor: Optional[threading.Thread] = None
+_compactor_guard = threading.Lock()
+_stop = threading.Event()
+
+
+def _compact_loop(interval: float) -> None:
+    """
+    Compact every `interval` seconds. A failed run leaves the entries in the journal
+    (reads still see them); it is logged and counted, and the wait doubles on each
+    consecutive failure up to JOURNAL_COMPACT_MAX_BACKOFF.
+    """
+    wait = interval
+    while not _stop.wait(wait):
+        try:
+            if os.path.exists(JOURNAL_FILE_PATH) and os.path.getsize(JOURNAL_FILE_PATH) > 0:
+                compact()
+        except Exception:
+            wait = min(wait * 2, max(interval, JOURNAL_COMPACT_MAX_BACKOFF))
+            metrics.inc("sbp_journal_compact_failures_total")
+            log.exception("Journal compaction failed; retrying in %.0fs", wait)
+        else:
+            wait = interval
+
+
+def ensure_compactor(interval: float = JOURNAL_COMPACT_INTERVAL) -> None:
+    """Start the background compaction thread once per process."""
+    global _compactor
+    with _compactor_guard:
+        if _compactor is not None and _compactor.is_alive():
+            return
+        _stop.clear()
+        _compactor = threading.Thread(
+            target=_compact_loop, args=(interval,), name="journal-compactor", daemon=True
+        )
+        _compactor.start()
+
+
+def stop_compactor() -> None:
+    _stop.set()
@@ -0,0 +1,243 @@
+# src/ledger_client.py
+"""
+Client side of the ledger daemon (src/ledger_server.py) plus the wire protocol
+both sides share.
+
+Frames on the Unix socket:
+
+    4-byte big-endian length | 1-byte codec | payload
+
+codec b"M" is msgpack (optional dependency: pip install msgpack), b"J" is JSON.
+Clients use msgpack when it is installed; the server answers in the codec of the
+request, so mixed installs work.
+
+    request:  {"op": "balance", "args": {"customer_id": "CUST0001"}}
+    response: {"ok": true, "result": {...}}
+              {"ok": false, "error": "Customer not found: ...", "kind": "ValueError"}
+
+Frames (transactions, reports) travel column-wise as
+{"columns": [...], "data": [[column values], ...], "dates": [datetime column names]}
+with dates as epoch microseconds; the receiving side types them with src/schema.py.
+Timestamps in request args are ISO strings, and an open bound (None) is null.
+
+LedgerClient keeps a small pool of connected sockets so concurrent sessions of a
+Streamlit worker do not reconnect per call. Reads are retried once on a fresh
+connection if a pooled socket turns out to be dead (daemon restarted); postings
+are never retried, since the first attempt may have been committed.
+"""
+
+from __future__ import annotations
+
+import json
+import queue
+import socket
+import struct
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+from .config import LEDGER_POOL_SIZE, LEDGER_TIMEOUT, SHEET_CUSTOMERS, SHEET_TXNS
+from .schema import coerce
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+MAX_FRAME = 256 * 1024 * 1024
+_HEADER = struct.Struct(">IB")
+JSON = ord("J")
+MSGPACK = ord("M")
+
+# ops that change nothing and may be resent after a broken connection
+READ_OPS = {"ping", "stats", "customer", "balance", "balance_as_of", "transactions", "between"}
+
+
+class LedgerServerError(RuntimeError):
+    """The daemon could not be reached or failed the call."""
+
+
+# --- protocol ---
+
+def default_codec() -> int:
+    return MSGPACK if msgpack is not None else JSON
+
+
+def encode(obj, codec: int) -> bytes:
+    if codec == MSGPACK:
+        payload = msgpack.packb(obj, use_bin_type=True)
+    else:
+        payload = json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _HEADER.pack(len(payload) + 1, codec) + payload
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Connection closed by peer.")
+        buf += chunk
+    return bytes(buf)
+
+
+def read_frame(sock: socket.socket) -> tuple:
+    """(codec, decoded object). Raises ConnectionError on EOF."""
+    length, codec = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if length < 1 or length > MAX_FRAME:
+        raise ConnectionError(f"Bad frame length: {length}")
+    payload = _recv_exact(sock, length - 1)
+    if codec == MSGPACK:
+        if msgpack is None:
+            raise ConnectionError("Peer sent msgpack but msgpack is not installed.")
+        return codec, msgpack.unpackb(payload, raw=False)
+    if codec == JSON:
+        return codec, json.loads(payload.decode("utf-8"))
+    raise ConnectionError(f"Unknown codec: {codec}")
+
+
+def frame_to_wire(df: pd.DataFrame) -> dict:
+    data, dates = [], []
+    for col in df.columns:
+        s = df[col]
+        if ptypes.is_datetime64_any_dtype(s):
+            micros = s.to_numpy(dtype="datetime64[us]").astype("int64")
+            data.append(np.where(s.isna().to_numpy(), None, micros).tolist())
+            dates.append(str(col))
+        else:
+            # missing values go out as NaN / None; both codecs carry them
+            data.append(s.tolist())
+    return {"columns": [str(c) for c in df.columns], "data": data, "dates": dates}
+
+
+def frame_from_wire(sheet_name: Optional[str], payload: dict) -> pd.DataFrame:
+    dates = set(payload.get("dates", ()))
+    columns = {
+        col: pd.to_datetime(values, unit="us") if col in dates else values
+        for col, values in zip(payload["columns"], payload["data"])
+    }
+    df = pd.DataFrame(columns, columns=payload["columns"])
+    return coerce(sheet_name, df) if sheet_name else df
+
+
+def ts_to_wire(ts) -> Optional[str]:
+    """A timestamp argument as ISO text; None (no bound) stays None, i.e. null."""
+    return None if ts is None else pd.Timestamp(ts).isoformat()
+
+
+def ts_from_wire(value: Optional[str]) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value)
+
+
+# --- client ---
+
+class LedgerClient:
+    """Pooled connections to the daemon listening on `path`."""
+
+    def __init__(self, path: str, pool_size: int = LEDGER_POOL_SIZE, timeout: float = LEDGER_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self.codec = default_codec()
+        self._pool: "queue.LifoQueue" = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # blocking connect: waits for the accept backlog instead of failing with EAGAIN
+            sock.connect(self.path)
+            sock.settimeout(self.timeout)
+        except OSError as e:
+            sock.close()
+            raise LedgerServerError(
+                f"Ledger daemon not reachable at {self.path} ({e}). Start it with: python -m src.cli serve"
+            ) from e
+        return sock
+
+    def _acquire(self) -> tuple:
+        """(socket, pooled?)"""
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, sock: socket.socket) -> None:
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    def call(self, op: str, **args):
+        """Send one request and return its result; server-side ValueErrors are re-raised as ValueError."""
+        request = encode({"op": op, "args": args}, self.codec)
+        while True:
+            sock, pooled = self._acquire()
+            try:
+                sock.sendall(request)
+                _, response = read_frame(sock)
+            except (OSError, ConnectionError) as e:
+                sock.close()
+                if pooled and op in READ_OPS:
+                    # stale pooled connection: retry on a new one
+                    continue
+                raise LedgerServerError(f"Ledger daemon call {op!r} failed: {e}") from e
+            self._release(sock)
+            break
+
+        if response.get("ok"):
+            return response.get("result")
+        if response.get("kind") == "ValueError":
+            raise ValueError(response.get("error"))
+        raise LedgerServerError(f"{response.get('kind')}: {response.get('error')}")
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # --- typed helpers used by src/banking.py ---
+
+    def ping(self) -> dict:
+        return self.call("ping")
+
+    def stats(self) -> dict:
+        return self.call("stats")
+
+    def customer(self, customer_id: str) -> pd.Series:
+        row = frame_from_wire(SHEET_CUSTOMERS, self.call("customer", customer_id=customer_id))
+        return row.iloc[0]
+
+    def balance(self, customer_id: str) -> Optional[dict]:
+        return self.call("balance", customer_id=customer_id)
+
+    def balance_as_of(self, customer_id: str, ts) -> float:
+        return self.call("balance_as_of", customer_id=customer_id, ts=ts_to_wire(ts))
+
+    def transactions(self, customer_id: str) -> pd.DataFrame:
+        return frame_from_wire(SHEET_TXNS, self.call("transactions", customer_id=customer_id))
+
+    def between(self, customer_id: str, start, end, txn_type: str = "ALL") -> pd.DataFrame:
+        payload = self.call(
+            "between",
+            customer_id=customer_id,
+            start=ts_to_wire(start),
+            end=ts_to_wire(end),
+            txn_type=txn_type,
+        )
+        return frame_from_wire(SHEET_TXNS, payload)
+
+    def commit(self, rows: List[dict]) -> Dict[str, dict]:
+        """Post staged rows; fills in txn_id / balance_after_txn in place and returns the balance entries."""
+        result = self.call("commit", rows=rows)
+        for row, done in zip(rows, result["rows"]):
+            row["txn_id"] = done["txn_id"]
+            row["balance_after_txn"] = done["balance_after_txn"]
+        return result["entries"]
+
+    def post_transactions(self, batch: pd.DataFrame) -> pd.DataFrame:
+        batch = batch.astype(object).where(batch.notna(), None)
+        return frame_from_wire(None, self.call("post_transactions", batch=batch.to_dict("records")))
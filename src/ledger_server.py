@@ -0,0 +1,232 @@
+# src/ledger_server.py
+"""
+Local ledger daemon: one process owns the parsed sheets, the balance store, the
+typed journal and the per-customer time index, and serves them to every
+Streamlit worker over a Unix domain socket (protocol: src/ledger_client.py).
+
+    python -m src.cli serve                      # listens on LEDGER_SOCKET_DEFAULT
+    SBP_LEDGER_SOCKET=data/state_bank_db.xlsx.sock streamlit run app.py
+
+Workers started with SBP_LEDGER_SOCKET stop parsing the workbook and taking the
+ledger locks themselves; their reads are answered from the daemon's warm caches
+(only a stat() per call to notice outside edits) and their postings go through
+the daemon's posting queue, so postings from all workers share group commits.
+
+Each connection is served by its own thread; the banking layer is already safe
+for concurrent sessions in one process. Full transaction histories are kept
+encoded for the wire per customer, tagged with the customer's balance version
+like the time index, so a repeated read is a dict lookup.
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from . import archive, banking
+from .balances import get_balance
+from .config import SHEET_CUSTOMERS, SHEET_TXNS, LEDGER_SOCKET_DEFAULT, LEDGER_WIRE_CACHE_CUSTOMERS
+from .excel_db import read_sheet
+from .journal import stop_compactor
+from .ledger_client import read_frame, encode, frame_to_wire, ts_from_wire, msgpack
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        server: LedgerServer = self.server  # type: ignore[assignment]
+        server.connection_opened()
+        try:
+            while True:
+                try:
+                    codec, request = read_frame(self.request)
+                except (ConnectionError, OSError):
+                    return
+                self.request.sendall(encode(server.dispatch(request), codec))
+        finally:
+            server.connection_closed()
+
+
+class LedgerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # every worker's pool may connect at once
+
+    def __init__(self, path: str = LEDGER_SOCKET_DEFAULT):
+        _remove_stale_socket(path)
+        self.path = path
+        self.started = time.time()
+        self._guard = threading.Lock()
+        self._connections = 0
+        self._calls: Dict[str, int] = {}
+        self._errors = 0
+        self._wire: "OrderedDict[str, tuple]" = OrderedDict()  # customer_id -> (version, payload)
+        self._ops: Dict[str, Callable] = {
+            "ping": self._ping,
+            "stats": self._stats,
+            "customer": self._customer,
+            "balance": self._balance,
+            "balance_as_of": self._balance_as_of,
+            "transactions": self._transactions,
+            "between": self._between,
+            "commit": self._commit,
+            "post_transactions": self._post_transactions,
+        }
+
+        old_umask = os.umask(0o077)  # socket is for this user's processes only
+        try:
+            super().__init__(path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    # --- bookkeeping ---
+
+    def connection_opened(self) -> None:
+        with self._guard:
+            self._connections += 1
+
+    def connection_closed(self) -> None:
+        with self._guard:
+            self._connections -= 1
+
+    def dispatch(self, request: dict) -> dict:
+        op = request.get("op") if isinstance(request, dict) else None
+        fn = self._ops.get(op)
+        with self._guard:
+            self._calls[str(op)] = self._calls.get(str(op), 0) + 1
+        if fn is None:
+            return {"ok": False, "error": f"Unknown op: {op}", "kind": "ValueError"}
+        try:
+            return {"ok": True, "result": fn(**(request.get("args") or {}))}
+        except ValueError as e:
+            return {"ok": False, "error": str(e), "kind": "ValueError"}
+        except Exception as e:
+            with self._guard:
+                self._errors += 1
+            traceback.print_exc(file=sys.stderr)
+            return {"ok": False, "error": str(e), "kind": type(e).__name__}
+
+    def warm_up(self) -> None:
+        """Parse the sheets and load the balance store before the first request."""
+        customers = read_sheet(SHEET_CUSTOMERS)
+        read_sheet(SHEET_TXNS)
+        if not customers.empty:
+            get_balance(str(customers["customer_id"].iloc[0]))
+
+    def server_close(self) -> None:
+        super().server_close()
+        banking.posting_writer().close()
+        stop_compactor()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    # --- ops ---
+
+    def _ping(self) -> dict:
+        return {"pid": os.getpid(), "msgpack": msgpack is not None, "uptime": time.time() - self.started}
+
+    def _stats(self) -> dict:
+        with self._guard:
+            calls = dict(self._calls)
+            connections, errors = self._connections, self._errors
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started,
+            "connections": connections,
+            "calls": calls,
+            "errors": errors,
+            "posting_queue": banking.posting_writer().stats(),
+        }
+
+    def _customer(self, customer_id: str) -> dict:
+        row = banking.LedgerSnapshot().get_customer(customer_id)
+        return frame_to_wire(row.to_frame().T)
+
+    def _balance(self, customer_id: str) -> Optional[dict]:
+        return get_balance(customer_id)
+
+    def _balance_as_of(self, customer_id: str, ts: Optional[str]) -> float:
+        return banking.LedgerSnapshot().balance_as_of(customer_id, ts_from_wire(ts))
+
+    def _transactions(self, customer_id: str) -> dict:
+        ledger = banking.LedgerSnapshot()
+        # archiving changes the history without a posting: include the cutoff
+        version = (banking.index_version(ledger.calculate_balance(customer_id)), archive.cutoff())
+        with self._guard:
+            cached = self._wire.get(customer_id)
+            if cached is not None and cached[0] == version:
+                self._wire.move_to_end(customer_id)
+                return cached[1]
+
+        payload = frame_to_wire(ledger.get_transactions(customer_id))
+        with self._guard:
+            self._wire[customer_id] = (version, payload)
+            self._wire.move_to_end(customer_id)
+            while len(self._wire) > LEDGER_WIRE_CACHE_CUSTOMERS:
+                self._wire.popitem(last=False)
+        return payload
+
+    def _between(self, customer_id: str, start: Optional[str], end: Optional[str], txn_type: str = "ALL") -> dict:
+        df = banking.LedgerSnapshot().get_transactions_between(
+            customer_id, ts_from_wire(start), ts_from_wire(end), txn_type
+        )
+        return frame_to_wire(df)
+
+    def _commit(self, rows: list) -> dict:
+        for row in rows:
+            if row.get("txn_type") not in ("DEPOSIT", "WITHDRAW") or not row.get("customer_id"):
+                raise ValueError(f"Bad posting: {row}")
+            row["amount"] = float(row["amount"])
+        for cid in {r["customer_id"] for r in rows}:
+            if get_balance(cid) is None:
+                raise ValueError(f"Customer not found: {cid}")
+        entries = banking.write_rows(rows)
+        return {
+            "rows": [{"txn_id": r["txn_id"], "balance_after_txn": r["balance_after_txn"]} for r in rows],
+            "entries": {cid: entries[cid] for cid in {r["customer_id"] for r in rows}},
+        }
+
+    def _post_transactions(self, batch: list) -> dict:
+        return frame_to_wire(banking.post_transactions(batch))
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Remove a socket file left by a dead daemon; refuse to start next to a live one."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise RuntimeError(f"A ledger daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+def serve(path: str = LEDGER_SOCKET_DEFAULT, ready: Optional[Callable[[], None]] = None) -> None:
+    """Run the daemon in the foreground until interrupted."""
+    # the daemon itself always works on local storage
+    banking.use_ledger_server(None)
+
+    server = LedgerServer(path)
+    # SIGTERM (systemd, supervisors): stop accepting and drain like Ctrl-C
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    try:
+        server.warm_up()
+        if ready is not None:
+            ready()
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,163 @@
+# src/locks.py
+"""
+Advisory file locks (fcntl.flock) shared by every process and thread using the data files.
+
+Lock names and ordering (always acquire left to right to avoid deadlocks):
+
+    customer stripes  ->  LEDGER  ->  DATA  ->  shard-NN  ->  MIRROR
+
+- DATA:    the workbook / database file. Shared for reads, exclusive for writes.
+- shard-NN: one transaction shard file (src/shards.py), same shared/exclusive use.
+- MIRROR:  the Parquet mirror's file set (src/parquet_mirror.py). Shared while a
+           read lists and opens files, exclusive while files are swapped.
+- LEDGER:  journal, txn sequence and balance store. Exclusive while posting/compacting.
+- stripes: one of LOCK_STRIPES locks chosen by hashing customer_id; serialises the
+           balance read -> posting write of a customer without blocking other customers.
+
+Waits block in the kernel (no polling). Locks are re-entrant within a thread.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager, ExitStack
+from typing import Dict, Iterable, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: fall back to in-process locks only
+    fcntl = None
+
+from .config import DATA_FILE_PATH, LOCK_STRIPES
+from . import metrics
+
+
+DATA = "data"
+LEDGER = "ledger"
+MIRROR = "mirror"
+
+_held = threading.local()
+
+# fallback when fcntl is unavailable (single process only)
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+_stats: Dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def lock_path(name: str) -> str:
+    return f"{DATA_FILE_PATH}.{name}.lock"
+
+
+def _held_locks() -> dict:
+    if not hasattr(_held, "locks"):
+        _held.locks = {}
+    return _held.locks
+
+
+def _record(name: str, wait: float, hold: float) -> None:
+    group = name.split("-")[0]
+    with _stats_lock:
+        s = _stats.setdefault(group, {
+            "acquired": 0, "wait_total": 0.0, "wait_max": 0.0,
+            "hold_total": 0.0, "hold_max": 0.0,
+        })
+        s["acquired"] += 1
+        s["wait_total"] += wait
+        s["wait_max"] = max(s["wait_max"], wait)
+        s["hold_total"] += hold
+        s["hold_max"] = max(s["hold_max"], hold)
+    metrics.observe("sbp_lock_wait_seconds", wait, lock=group)
+    metrics.observe("sbp_lock_hold_seconds", hold, lock=group)
+
+
+def lock_stats() -> Dict[str, dict]:
+    """Per lock group (data / ledger / stripe): acquisitions, wait and hold seconds."""
+    with _stats_lock:
+        out = {}
+        for group, s in _stats.items():
+            n = s["acquired"] or 1
+            out[group] = {**s, "wait_avg": s["wait_total"] / n, "hold_avg": s["hold_total"] / n}
+        return out
+
+
+def reset_lock_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+@contextmanager
+def lock(name: str, shared: bool = False):
+    """
+    Hold the named lock. shared=True allows other shared holders (readers).
+    Re-entrant: nested requests in the same thread are free, except that a shared
+    holder cannot upgrade to exclusive (that would deadlock against other readers).
+    """
+    held = _held_locks()
+    if name in held:
+        mode, depth, fd = held[name]
+        if mode == "shared" and not shared:
+            raise RuntimeError(f"Cannot upgrade shared lock '{name}' to exclusive.")
+        held[name] = (mode, depth + 1, fd)
+        try:
+            yield
+        finally:
+            mode, depth, fd = held[name]
+            held[name] = (mode, depth - 1, fd)
+        return
+
+    start = time.perf_counter()
+    fd = None
+    if fcntl is not None:
+        fd = os.open(lock_path(name), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+    else:
+        with _thread_locks_guard:
+            tl = _thread_locks.setdefault(name, threading.Lock())
+        tl.acquire()
+
+    acquired = time.perf_counter()
+    held[name] = ("shared" if shared else "exclusive", 1, fd)
+    try:
+        yield
+    finally:
+        del held[name]
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        else:
+            _thread_locks[name].release()
+        _record(name, acquired - start, time.perf_counter() - acquired)
+
+
+def stripe_for(customer_id: str) -> str:
+    return f"stripe-{zlib.crc32(str(customer_id).encode('utf-8')) % LOCK_STRIPES:03d}"
+
+
+@contextmanager
+def customer_locks(customer_ids: Iterable[str]):
+    """Exclusive stripe locks for a set of customers, taken in a fixed order."""
+    stripes = sorted({stripe_for(cid) for cid in customer_ids})
+    with ExitStack() as stack:
+        for s in stripes:
+            stack.enter_context(lock(s))
+        yield
+
+
+def holds(name: str) -> Optional[str]:
+    """'shared' / 'exclusive' if this thread holds the lock, else None."""
+    entry = _held_locks().get(name)
+    return entry[0] if entry else None
+
+
+def holding_any() -> bool:
+    """True if this thread holds any lock (handing work to another thread could deadlock)."""
+    return bool(_held_locks())
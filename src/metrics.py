@@ -0,0 +1,320 @@
+# src/metrics.py
+"""
+In-process instrumentation: latency histograms, call counters and byte counters for
+the storage, lock, banking and PDF hot paths, exported in Prometheus text format.
+
+Disabled by default (SBP_METRICS=1 or enable() turns it on). While disabled every
+hook is a single flag check: `timed` wrappers call straight through and `timer()`
+returns a shared no-op context manager.
+
+    @timed("sbp_storage_seconds", op="read_sheet")
+    def read_sheet(...): ...
+
+    with timer("sbp_pdf_seconds", op="render"):
+        ...
+
+    inc("sbp_storage_bytes_read_total", size, op="read_sheet")
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import METRICS_ENABLED, METRICS_FILE_PATH, METRICS_EXPORT_INTERVAL
+
+
+# seconds; Prometheus-style upper bounds (+Inf is implicit)
+BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# counts (batch sizes etc.)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+# histograms that are not in seconds
+HISTOGRAM_BUCKETS = {
+    "sbp_posting_batch_size": SIZE_BUCKETS,
+}
+
+HELP = {
+    "sbp_storage_seconds": "Storage calls (read_sheet, overwrite_sheet, ...) latency.",
+    "sbp_storage_bytes_read_total": "Bytes of data file parsed on cache misses.",
+    "sbp_storage_bytes_written_total": "Bytes of data file written.",
+    "sbp_lock_wait_seconds": "Time spent waiting to acquire a lock.",
+    "sbp_lock_hold_seconds": "Time a lock was held.",
+    "sbp_banking_seconds": "Banking operation latency.",
+    "sbp_pdf_seconds": "Statement PDF generation latency.",
+    "sbp_pdf_bytes_total": "Bytes of statement PDF produced.",
+    "sbp_errors_total": "Timed calls that raised.",
+    "sbp_journal_compact_failures_total": "Background journal compactions that raised.",
+    "sbp_posting_queue_depth": "Postings waiting for the writer thread.",
+    "sbp_posting_batch_size": "Rows per group commit of the posting writer.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_enabled = METRICS_ENABLED
+_guard = threading.Lock()
+_histograms: Dict[Tuple[str, Labels], "Histogram"] = {}
+_counters: Dict[Tuple[str, Labels], float] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate from bucket counts (linear within the bucket), like histogram_quantile()."""
+        if not self.count:
+            return 0.0
+        buckets = self.buckets
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = buckets[i - 1] if i > 0 else 0.0
+                upper = buckets[i] if i < len(buckets) else buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return buckets[-1]
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+    if on:
+        ensure_exporter()
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name: str, value: float, **labels) -> None:
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _guard:
+        h = _histograms.get(key)
+        if h is None:
+            h = _histograms[key] = Histogram(HISTOGRAM_BUCKETS.get(name, BUCKETS))
+        h.observe(value)
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _guard:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _guard:
+        _gauges[key] = value
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            inc("sbp_errors_total", metric=self.name, **self.labels)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NO_TIMER = _NoTimer()
+
+
+def timer(name: str, **labels):
+    """Context manager recording the block's duration into histogram `name`."""
+    if not _enabled:
+        return _NO_TIMER
+    return _Timer(name, labels)
+
+
+def timed(name: str, **labels):
+    """Decorator form of timer()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Timer(name, labels):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# --- Reading / export ---
+
+def snapshot() -> dict:
+    """{"histograms": [...], "counters": [...], "gauges": [...]} with labels as dicts."""
+    with _guard:
+        hists = [
+            {
+                "name": name, "labels": dict(labels), "count": h.count, "sum": h.total,
+                "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+            }
+            for (name, labels), h in sorted(_histograms.items())
+        ]
+        counters = [
+            {"name": name, "labels": dict(labels), "value": v}
+            for (name, labels), v in sorted(_counters.items())
+        ]
+        gauges = [
+            {"name": name, "labels": dict(labels), "value": v}
+            for (name, labels), v in sorted(_gauges.items())
+        ]
+    return {"histograms": hists, "counters": counters, "gauges": gauges}
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in items)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_bound(b: float) -> str:
+    return f"{b:g}"
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    with _guard:
+        hists = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+
+        seen = set()
+        for (name, labels), h in hists:
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip(h.buckets, h.counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', _fmt_bound(bound)))} {cumulative}")
+            lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', '+Inf'))} {h.count}")
+            lines.append(f"{name}_sum{_fmt_labels(labels)} {h.total:.6f}")
+            lines.append(f"{name}_count{_fmt_labels(labels)} {h.count}")
+
+        for (name, labels), v in counters:
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_fmt_labels(labels)} {v:g}")
+
+        for (name, labels), v in gauges:
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_fmt_labels(labels)} {v:g}")
+
+    return "\n".join(lines) + "\n"
+
+
+def export(path: str = METRICS_FILE_PATH) -> str:
+    """Write the Prometheus text file atomically (node_exporter textfile collector style)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+    return path
+
+
+def reset() -> None:
+    with _guard:
+        _histograms.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+# --- Background export ---
+
+_exporter: Optional[threading.Thread] = None
+_exporter_guard = threading.Lock()
+
+
+def _export_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        if not _enabled:
+            continue
+        try:
+            export()
+        except OSError:
+            # read-only / missing data dir: metrics stay available in-process
+            pass
+
+
+def ensure_exporter(interval: float = METRICS_EXPORT_INTERVAL) -> None:
+    """Start the periodic Prometheus file writer once per process (no-op when interval <= 0)."""
+    global _exporter
+    if interval <= 0:
+        return
+    with _exporter_guard:
+        if _exporter is not None and _exporter.is_alive():
+            return
+        _exporter = threading.Thread(
+            target=_export_loop, args=(interval,), name="metrics-exporter", daemon=True
+        )
+        _exporter.start()
+
+
+if _enabled:
+    ensure_exporter()
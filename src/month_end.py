@@ -0,0 +1,193 @@
+# src/month_end.py
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+
+from .config import SHEET_CUSTOMERS, SHEET_TXNS, MONTH_END_STREAM_THRESHOLD
+from .excel_db import read_sheet
+from .journal import stored_with_journal
+from .schema import coerce
+from . import archive, checkpoints, parquet_mirror
+
+
+def month_period(month: str) -> Tuple[datetime, datetime]:
+    """'2026-09' -> (2026-09-01 00:00:00, 2026-09-30 23:59:59.999999)."""
+    start = datetime.strptime(month, "%Y-%m")
+    nxt = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, nxt - timedelta(microseconds=1)
+
+
+def statement_filename(customer: dict, month: str) -> str:
+    return f"statement_{customer.get('account_no') or customer.get('customer_id')}_{month}.pdf"
+
+
+def _period_transactions(start: Optional[datetime], end: datetime) -> pd.DataFrame:
+    """All customers' transactions dated in [start, end] (start None: all history), archived and hot."""
+    frames = []
+    cut = archive.cutoff()
+    if cut is not None and (start is None or start < cut):
+        cold_start = pd.Timestamp.min if start is None else start
+        frames.append(archive.read_between(cold_start, min(pd.Timestamp(end), cut - pd.Timedelta(1, "us"))))
+    if cut is None or end >= cut:
+        if parquet_mirror.enabled() and parquet_mirror.ready():
+            hot = parquet_mirror.read_transactions(start=start, end=end)
+        else:
+            hot = stored_with_journal()
+        hot = archive.hot_only(hot)
+        if not hot.empty:
+            mask = hot["txn_date"] <= end
+            if start is not None:
+                mask &= hot["txn_date"] >= start
+            frames.append(hot[mask])
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return coerce(SHEET_TXNS, pd.DataFrame(columns=archive.COLUMNS))
+    return coerce(SHEET_TXNS, pd.concat(frames, ignore_index=True))
+
+
+def _limit_memory(max_mb: Optional[int]) -> None:
+    """Worker initializer: cap the address space so one runaway statement can't take the box down."""
+    if not max_mb:
+        return
+    try:
+        import resource
+        limit = int(max_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass  # not supported on this platform
+
+
+def _render_one(task: tuple) -> Tuple[str, int]:
+    """Runs in a worker process. Writes via a temp file so a crash never leaves a half PDF."""
+    from .pdf_statement import generate_statement_pdf, generate_statement_pdf_stream, iter_chunks
+
+    customer, txns, balances, period_from, period_to, path = task
+    customer = pd.Series(customer)
+    tmp = path + ".part"
+
+    if len(txns) > MONTH_END_STREAM_THRESHOLD:
+        txns = txns.sort_values(["txn_date", "txn_id"])
+        with open(tmp, "wb") as f:
+            generate_statement_pdf_stream(customer, iter_chunks(txns), balances, f, period_from, period_to)
+    else:
+        txns = txns.sort_values(["txn_date", "txn_id"], ascending=False)
+        pdf = generate_statement_pdf(customer, txns, balances, period_from, period_to)
+        with open(tmp, "wb") as f:
+            f.write(pdf)
+
+    os.replace(tmp, path)
+    return path, len(txns)
+
+
+def run_month_end(
+    month: str,
+    out_dir: str,
+    workers: Optional[int] = None,
+    max_worker_mb: Optional[int] = None,
+    tasks_per_child: Optional[int] = 200,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Render a statement for every customer for `month` (YYYY-MM) into out_dir.
+
+    customer_details and transaction_details are loaded once and partitioned by
+    customer; PDFs are rendered in a process pool. Statements already present in
+    out_dir are skipped, so a crashed run can simply be started again.
+    Closes the checkpoint periods first; each statement's opening balance is its
+    customer's checkpoint plus the transactions since (src/checkpoints.py).
+    Returns a summary: total, skipped, rendered, failed (list), seconds, per_second.
+    """
+    period_from, period_to = month_period(month)
+    os.makedirs(out_dir, exist_ok=True)
+
+    customers = read_sheet(SHEET_CUSTOMERS)
+
+    # opening balances: period-end checkpoints plus the few transactions after them
+    checkpoints.close_periods()
+    as_of = pd.Timestamp(period_from) - pd.Timedelta(1, "us")
+    bases = {
+        str(cust["customer_id"]): checkpoints.base_at(
+            str(cust["customer_id"]), as_of, float(cust.get("opening_balance", 0) or 0)
+        )
+        for cust in customers.to_dict("records")
+    }
+    sinces = [since for _, since in bases.values()]
+    # None: some customer has no checkpoint to start from, so scan all history
+    scan_from = None if None in sinces else min(sinces + [pd.Timestamp(period_from)])
+
+    txns = _period_transactions(scan_from, period_to)
+    # plain strings: a categorical column would pickle every customer id into each task
+    txns = txns.assign(customer_id=txns["customer_id"].astype(str))
+    by_customer = dict(tuple(txns.groupby(txns["customer_id"]))) if not txns.empty else {}
+    empty = txns.iloc[0:0]
+
+    def statement_rows(cid: str) -> Tuple[pd.DataFrame, dict]:
+        rows = by_customer.get(cid, empty)
+        base, since = bases.get(cid, (0.0, period_from))
+        tail = rows[rows["txn_date"] <= as_of]
+        if since is not None:
+            tail = tail[tail["txn_date"] >= since]
+        rows = rows[rows["txn_date"] >= period_from]
+        return rows, checkpoints.summarize_period(base + checkpoints.net_amount(tail), rows)
+
+    def tasks():
+        for cust in customers.to_dict("records"):
+            path = os.path.join(out_dir, statement_filename(cust, month))
+            if os.path.exists(path):
+                summary["skipped"] += 1
+                continue
+            rows, balances = statement_rows(str(cust["customer_id"]))
+            yield (cust, rows, balances, period_from, period_to, path)
+
+    summary = {"total": len(customers), "skipped": 0, "rendered": 0, "failed": [], "rows": 0}
+    start = time.perf_counter()
+
+    pool_kwargs = {"max_workers": workers, "initializer": _limit_memory, "initargs": (max_worker_mb,)}
+    if tasks_per_child and sys.version_info >= (3, 11):
+        import multiprocessing
+        pool_kwargs["max_tasks_per_child"] = tasks_per_child
+        pool_kwargs["mp_context"] = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(**pool_kwargs) as pool:
+        window = (workers or os.cpu_count() or 1) * 4
+        pending = {}
+        it = tasks()
+
+        def fill():
+            for task in it:
+                pending[pool.submit(_render_one, task)] = task
+                if len(pending) >= window:
+                    break
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                task = pending.pop(fut)
+                try:
+                    _, rows = fut.result()
+                    summary["rendered"] += 1
+                    summary["rows"] += rows
+                except Exception as e:
+                    summary["failed"].append((task[0].get("customer_id"), repr(e)))
+            fill()
+
+            if progress:
+                elapsed = time.perf_counter() - start
+                progress({
+                    "done": summary["skipped"] + summary["rendered"] + len(summary["failed"]),
+                    "total": summary["total"],
+                    "per_second": summary["rendered"] / elapsed if elapsed else 0.0,
+                })
+
+    summary["seconds"] = time.perf_counter() - start
+    summary["per_second"] = summary["rendered"] / summary["seconds"] if summary["seconds"] else 0.0
+    return summary
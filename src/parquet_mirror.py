@@ -0,0 +1,218 @@
+# src/parquet_mirror.py
+"""
+Columnar mirror of transaction_details for fast filtered reads.
+
+Layout (hive partitioning, so pyarrow prunes directories from the filter):
+
+    <TXN_MIRROR_DIR>/bucket=07/ym=2026-09/part-TXN000123.parquet
+
+bucket = crc32(customer_id) % TXN_MIRROR_BUCKETS. Every posting batch adds one
+small file per touched partition; partitions with more than TXN_MIRROR_MAX_FILES
+files are merged into a new file. Readers hold the MIRROR lock shared and file
+swaps (merge, rebuild) take it exclusively, so a read never sees a merged file
+next to the parts it replaced. If a mirror write ever fails the mirror is marked stale and
+reads fall back to storage until `python -m src.cli rebuild-mirror` is run.
+
+Requires pyarrow (optional dependency, only needed when TXN_READ_PATH = "parquet").
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import zlib
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from .config import (
+    TXN_READ_PATH, TXN_MIRROR_DIR, TXN_MIRROR_BUCKETS, TXN_MIRROR_MAX_FILES, SHEET_TXNS
+)
+from .locks import lock, MIRROR
+from .schema import coerce
+
+
+STALE_MARKER = "_STALE"
+COLUMNS = ["txn_id", "customer_id", "txn_date", "txn_type", "amount", "reason", "balance_after_txn"]
+
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("The Parquet mirror needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def enabled() -> bool:
+    return TXN_READ_PATH == "parquet"
+
+
+def ready() -> bool:
+    """Mirror exists and is in sync with storage."""
+    return os.path.isdir(TXN_MIRROR_DIR) and not os.path.exists(os.path.join(TXN_MIRROR_DIR, STALE_MARKER))
+
+
+def bucket_for(customer_id: str) -> int:
+    return zlib.crc32(str(customer_id).encode("utf-8")) % TXN_MIRROR_BUCKETS
+
+
+def arrow_schema():
+    """Arrow schema of the transaction columns (mirror files, Parquet exports)."""
+    pa = _pa()
+    return pa.schema([
+        ("txn_id", pa.string()),
+        ("customer_id", pa.string()),
+        ("txn_date", pa.timestamp("us")),
+        ("txn_type", pa.string()),
+        ("amount", pa.float64()),
+        ("reason", pa.string()),
+        ("balance_after_txn", pa.float64()),
+    ])
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Transactions typed for arrow_schema(), plus the bucket / ym partition columns."""
+    df = df.reindex(columns=COLUMNS).copy()
+    for col in ("txn_id", "customer_id", "txn_type", "reason"):
+        df[col] = df[col].astype("string")
+    df["txn_date"] = pd.to_datetime(df["txn_date"], errors="coerce").astype("datetime64[us]")
+    df["amount"] = pd.to_numeric(df["amount"], errors="coerce").astype("float64")
+    df["balance_after_txn"] = pd.to_numeric(df["balance_after_txn"], errors="coerce").astype("float64")
+    df["bucket"] = df["customer_id"].map(bucket_for)
+    df["ym"] = df["txn_date"].dt.strftime("%Y-%m").fillna("unknown")
+    return df
+
+
+def _partition_dir(root: str, bucket: int, ym: str) -> str:
+    return os.path.join(root, f"bucket={bucket:02d}", f"ym={ym}")
+
+
+def _write_partition(root: str, bucket: int, ym: str, part: pd.DataFrame, name: str) -> None:
+    pa = _pa()
+    d = _partition_dir(root, bucket, ym)
+    os.makedirs(d, exist_ok=True)
+    table = pa.Table.from_pandas(part[COLUMNS], schema=arrow_schema(), preserve_index=False)
+    tmp = os.path.join(d, f".{name}.tmp")
+    pa.parquet.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, os.path.join(d, f"{name}.parquet"))
+
+
+def _merge_small_files(d: str) -> None:
+    pa = _pa()
+    files = sorted(f for f in os.listdir(d) if f.endswith(".parquet"))
+    if len(files) <= TXN_MIRROR_MAX_FILES:
+        return
+    table = pa.concat_tables([pa.parquet.read_table(os.path.join(d, f), schema=arrow_schema()) for f in files])
+    # dot-files are skipped by dataset discovery, so the temp file is invisible
+    tmp = os.path.join(d, ".merged.tmp")
+    pa.parquet.write_table(table, tmp, compression="zstd")
+    merged = f"merged-{files[-1]}"
+    with lock(MIRROR):
+        os.replace(tmp, os.path.join(d, merged))
+        for f in files:
+            if f != merged:
+                os.remove(os.path.join(d, f))
+
+
+def mirror_rows(rows: List[dict]) -> None:
+    """
+    Add just-posted rows to the mirror (called under the LEDGER lock).
+    Never raises: on failure the mirror is marked stale and reads use storage.
+    """
+    if not enabled() or not rows or not ready():
+        return
+    try:
+        df = prepare_frame(pd.DataFrame(rows))
+        name = f"part-{rows[0]['txn_id']}"
+        for (bucket, ym), part in df.groupby(["bucket", "ym"]):
+            _write_partition(TXN_MIRROR_DIR, int(bucket), ym, part, name)
+            _merge_small_files(_partition_dir(TXN_MIRROR_DIR, int(bucket), ym))
+    except Exception:
+        mark_stale()
+
+
+def mark_stale() -> None:
+    try:
+        with open(os.path.join(TXN_MIRROR_DIR, STALE_MARKER), "w") as f:
+            f.write(datetime.now().isoformat())
+    except OSError:
+        pass
+
+
+def rebuild_mirror() -> int:
+    """Regenerate the whole mirror from storage + journal. Returns rows written."""
+    from .excel_db import read_sheet
+    from .journal import merge_with_journal
+    from .locks import LEDGER
+
+    with lock(LEDGER):
+        try:
+            df = read_sheet(SHEET_TXNS)
+        except ValueError:
+            df = pd.DataFrame(columns=COLUMNS)
+        df = prepare_frame(merge_with_journal(df))
+
+        tmp_root = TXN_MIRROR_DIR + ".building"
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        os.makedirs(tmp_root)
+        for (bucket, ym), part in df.groupby(["bucket", "ym"]):
+            _write_partition(tmp_root, int(bucket), ym, part, "part-000000")
+
+        old_root = TXN_MIRROR_DIR + ".old"
+        shutil.rmtree(old_root, ignore_errors=True)
+        with lock(MIRROR):
+            if os.path.exists(TXN_MIRROR_DIR):
+                os.replace(TXN_MIRROR_DIR, old_root)
+            os.replace(tmp_root, TXN_MIRROR_DIR)
+        shutil.rmtree(old_root, ignore_errors=True)
+        return len(df)
+
+
+def _months(start: datetime, end: datetime) -> List[str]:
+    months = pd.period_range(pd.Timestamp(start).to_period("M"), pd.Timestamp(end).to_period("M"), freq="M")
+    return [str(m) for m in months]
+
+
+def read_transactions(
+    customer_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    txn_type: Optional[str] = None,
+    columns: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Transactions matching the filters. Only partitions for the customer's bucket and
+    the months overlapping [start, end] are opened; the remaining predicates are
+    pushed down to the Parquet row groups.
+    """
+    pa = _pa()
+    f = pa.dataset.field
+
+    expr = None
+
+    def add(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    if customer_id is not None:
+        add(f("bucket") == bucket_for(customer_id))
+        add(f("customer_id") == str(customer_id))
+    if start is not None and end is not None:
+        add(f("ym").isin(_months(start, end)))
+    if start is not None:
+        add(f("txn_date") >= pd.Timestamp(start).to_datetime64())
+    if end is not None:
+        add(f("txn_date") <= pd.Timestamp(end).to_datetime64())
+    if txn_type and txn_type != "ALL":
+        add(f("txn_type") == txn_type)
+
+    cols = list(columns) if columns else COLUMNS
+    with lock(MIRROR, shared=True):
+        ds = pa.dataset.dataset(TXN_MIRROR_DIR, format="parquet", partitioning="hive", schema=arrow_schema().append(
+            pa.field("bucket", pa.int32())).append(pa.field("ym", pa.string())))
+        table = ds.to_table(columns=cols, filter=expr)
+    return coerce(SHEET_TXNS, table.to_pandas())
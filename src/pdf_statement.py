@@ -1,42 +1,171 @@
 # src/pdf_statement.py
+"""
+Statement PDFs (ReportLab).
+
+ReportLab is imported on the first statement, not when this module is imported,
+so pages that never render a PDF do not pay for it. Paragraph styles, table styles
+and the decoded logo are built once per process (_templates) and shared by every
+statement; they are read-only after construction.
+"""
 
 from __future__ import annotations
 
+import threading
 from io import BytesIO
 from datetime import datetime
+from typing import BinaryIO, Iterable, Iterator, Optional
 
 import pandas as pd
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from .config import (
+    BANK_NAME, LOGO_PATH, CURRENCY, STREAM_ROWS_PER_PAGE, STREAM_FIRST_PAGE_ROWS,
+    STATEMENT_LOGO_DPI, SHEET_TXNS,
 )
+from .metrics import inc, timed
+from .schema import coerce
+
 
-from .config import BANK_NAME, LOGO_PATH, CURRENCY
+cm = 72 / 2.54  # same value as reportlab.lib.units.cm
+
+LOGO_SIZE = (2.8 * cm, 2.8 * cm)
 
 
 def _safe_str(x) -> str:
     return "" if x is None else str(x)
 
 
-def generate_statement_pdf(
-    customer: pd.Series,
-    txns: pd.DataFrame,
-    balances: dict,
-    period_from: datetime | None = None,
-    period_to: datetime | None = None,
-) -> bytes:
+# --- Templates (built once per process) ---
+
+_tpl: Optional[dict] = None
+_tpl_guard = threading.Lock()
+
+
+def _templates() -> dict:
+    global _tpl
+    if _tpl is None:
+        with _tpl_guard:
+            if _tpl is None:
+                _tpl = _build_templates()
+    return _tpl
+
+
+def _build_templates() -> dict:
+    from reportlab.lib import colors
+    from reportlab.platypus import TableStyle
+
+    return {
+        "styles": _styles(),
+        "header": TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 0),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+        ]),
+        "customer": TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+            ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+            ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.white, colors.HexColor("#FAFAFA")]),
+            ("BOX", (0, 0), (-1, -1), 0.8, colors.lightgrey),
+            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 8),
+            ("TOPPADDING", (0, 0), (-1, -1), 5),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
+        ]),
+        "summary": TableStyle([
+            ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#F3F6FF")),
+            ("BOX", (0, 0), (-1, -1), 0.8, colors.HexColor("#D6E0FF")),
+            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#D6E0FF")),
+            ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 8),
+            ("TOPPADDING", (0, 0), (-1, -1), 6),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ]),
+        "txn": TableStyle(_txn_table_style()),
+        "txn_page": TableStyle(_txn_table_style() + [
+            ("FONTNAME", (0, 1), (-1, 1), "Helvetica-Oblique"),
+            ("FONTNAME", (0, -2), (-1, -1), "Helvetica-Bold"),
+            ("BACKGROUND", (0, -2), (-1, -1), colors.HexColor("#F3F6FF")),
+        ]),
+        "logo": _load_logo(),
+    }
+
+
+def _load_logo():
     """
-    Returns a PDF as bytes (ReportLab).
-    Professional-ish statement layout.
+    Decode LOGO_PATH once, scaled to STATEMENT_LOGO_DPI at the size it is drawn.
+    Returns a flowable factory, or None when the logo cannot be read.
     """
-    buf = BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
+    from PIL import Image as PILImage
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import Flowable
+
+    width, height = LOGO_SIZE
+    try:
+        with PILImage.open(LOGO_PATH) as im:
+            mode = "RGBA" if im.mode in ("RGBA", "LA", "P") else "RGB"
+            px = (round(width / 72 * STATEMENT_LOGO_DPI), round(height / 72 * STATEMENT_LOGO_DPI))
+            im = im.convert(mode)
+            if im.width > px[0] or im.height > px[1]:
+                im = im.resize(px, PILImage.LANCZOS)
+            im.load()
+        reader = ImageReader(im)
+        reader.getRGBData()  # decode now; later draws reuse the pixel data
+    except Exception:
+        return None
+
+    class Logo(Flowable):
+        def __init__(self):
+            super().__init__()
+            self.width, self.height = width, height
+            self.hAlign = "LEFT"
+
+        def wrap(self, availWidth, availHeight):
+            return self.width, self.height
+
+        def draw(self):
+            self.canv.drawImage(reader, 0, 0, self.width, self.height, mask="auto")
+
+    return Logo
+
+
+def _styles() -> dict:
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            "TitleStyle",
+            parent=styles["Heading1"],
+            fontSize=18,
+            leading=22,
+            spaceAfter=8,
+        ),
+        "subtle": ParagraphStyle(
+            "Subtle",
+            parent=styles["Normal"],
+            fontSize=9,
+            textColor=colors.grey,
+        ),
+        "normal": styles["Normal"],
+        "h2": styles["Heading2"],
+        "h3": styles["Heading3"],
+    }
+
+
+def _doc(sink, page_compression=None):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    return SimpleDocTemplate(
+        sink,
         pagesize=A4,
+        pageCompression=page_compression,
         rightMargin=36,
         leftMargin=36,
         topMargin=36,
@@ -45,57 +174,42 @@ def generate_statement_pdf(
         author=BANK_NAME,
     )
 
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "TitleStyle",
-        parent=styles["Heading1"],
-        fontSize=18,
-        leading=22,
-        spaceAfter=8,
-    )
-    subtle_style = ParagraphStyle(
-        "Subtle",
-        parent=styles["Normal"],
-        fontSize=9,
-        textColor=colors.grey,
-    )
-    normal = styles["Normal"]
 
+def _front_matter(
+    customer: pd.Series,
+    balances: dict,
+    st: dict,
+    period_from: datetime | None,
+    period_to: datetime | None,
+) -> list:
+    """Header with logo, customer details block and summary KPIs."""
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    tpl = _templates()
     story = []
 
     # --- Header with logo + bank name ---
     header_tbl_data = []
-    logo_cell = ""
-    try:
-        logo = Image(LOGO_PATH, width=2.8 * cm, height=2.8 * cm)
-        logo.hAlign = "LEFT"
-        logo_cell = logo
-    except Exception:
-        logo_cell = Paragraph("🏦", title_style)
+    logo_cell = tpl["logo"]() if tpl["logo"] else Paragraph("🏦", st["title"])
 
     header_right = [
-        Paragraph(f"<b>{BANK_NAME}</b>", title_style),
-        Paragraph("Account Statement", styles["Heading2"]),
-        Paragraph(f"Generated on: {_safe_str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))}", subtle_style),
+        Paragraph(f"<b>{BANK_NAME}</b>", st["title"]),
+        Paragraph("Account Statement", st["h2"]),
+        Paragraph(f"Generated on: {_safe_str(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))}", st["subtle"]),
     ]
 
     if period_from and period_to:
         header_right.append(
             Paragraph(
                 f"Statement Period: {_safe_str(period_from.strftime('%Y-%m-%d'))} to {_safe_str(period_to.strftime('%Y-%m-%d'))}",
-                subtle_style,
+                st["subtle"],
             )
         )
 
     header_tbl_data.append([logo_cell, header_right])
 
     header_tbl = Table(header_tbl_data, colWidths=[3.2 * cm, 13.8 * cm])
-    header_tbl.setStyle(TableStyle([
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 0),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-    ]))
+    header_tbl.setStyle(tpl["header"])
     story.append(header_tbl)
     story.append(Spacer(1, 10))
 
@@ -111,108 +225,266 @@ def generate_statement_pdf(
     ]
 
     cust_tbl = Table(cust_rows, colWidths=[5.0 * cm, 12.0 * cm])
-    cust_tbl.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.white, colors.HexColor("#FAFAFA")]),
-        ("BOX", (0, 0), (-1, -1), 0.8, colors.lightgrey),
-        ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 8),
-        ("TOPPADDING", (0, 0), (-1, -1), 5),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
-    ]))
+    cust_tbl.setStyle(tpl["customer"])
     story.append(cust_tbl)
     story.append(Spacer(1, 10))
 
     # --- Summary KPIs ---
+    # period figures (banking.period_balances) have a closing balance; account
+    # totals (balance store entry) a current one
     opening = float(balances.get("opening_balance", 0) or 0)
     dep = float(balances.get("total_deposit", 0) or 0)
     wd = float(balances.get("total_withdraw", 0) or 0)
-    current = float(balances.get("current_balance", 0) or 0)
+    if "closing_balance" in balances:
+        last_label, last = "Closing Balance", float(balances.get("closing_balance") or 0)
+    else:
+        last_label, last = "Current Balance", float(balances.get("current_balance", 0) or 0)
 
     summary_data = [
         ["Opening Balance", f"{CURRENCY}{opening:,.2f}",
          "Total Deposits", f"{CURRENCY}{dep:,.2f}"],
         ["Total Withdrawals", f"{CURRENCY}{wd:,.2f}",
-         "Current Balance", f"{CURRENCY}{current:,.2f}"],
+         last_label, f"{CURRENCY}{last:,.2f}"],
     ]
     summary_tbl = Table(summary_data, colWidths=[4.0 * cm, 4.5 * cm, 4.0 * cm, 4.5 * cm])
-    summary_tbl.setStyle(TableStyle([
-        ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor("#F3F6FF")),
-        ("BOX", (0, 0), (-1, -1), 0.8, colors.HexColor("#D6E0FF")),
-        ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#D6E0FF")),
-        ("FONTSIZE", (0, 0), (-1, -1), 10),
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 8),
-        ("TOPPADDING", (0, 0), (-1, -1), 6),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-    ]))
+    summary_tbl.setStyle(tpl["summary"])
     story.append(summary_tbl)
     story.append(Spacer(1, 12))
 
+    return story
+
+
+TXN_HEADER = ["Txn ID", "Date", "Type", "Amount", "Reason", "Balance"]
+TXN_COL_WIDTHS = [2.2 * cm, 3.8 * cm, 2.2 * cm, 2.6 * cm, 4.2 * cm, 3.0 * cm]
+
+
+def _txn_table_style() -> list:
+    from reportlab.lib import colors
+
+    return [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1F3B73")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 9),
+
+        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 1), (-1, -1), 8),
+
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#FAFAFA")]),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+    ]
+
+
+def _normalize_txns(txns: pd.DataFrame) -> pd.DataFrame:
+    # no-op for frames from storage (already typed); converts hand-built ones
+    tx = coerce(SHEET_TXNS, txns)
+    tx = tx.assign(
+        txn_date=tx["txn_date"].dt.strftime("%Y-%m-%d %H:%M:%S"),
+        amount=tx["amount"].fillna(0.0),
+        balance_after_txn=tx["balance_after_txn"].fillna(0.0),
+    )
+    return tx[["txn_id", "txn_date", "txn_type", "amount", "reason", "balance_after_txn"]]
+
+
+def _txn_cells(tx: pd.DataFrame) -> list:
+    return [
+        [
+            _safe_str(r.txn_id),
+            _safe_str(r.txn_date),
+            _safe_str(r.txn_type),
+            f"{CURRENCY}{float(r.amount):,.2f}",
+            _safe_str(r.reason)[:40],  # keep tidy
+            f"{CURRENCY}{float(r.balance_after_txn):,.2f}",
+        ]
+        for r in tx.itertuples(index=False)
+    ]
+
+
+def _footer(st: dict) -> list:
+    from reportlab.platypus import Paragraph, Spacer
+
+    return [
+        Spacer(1, 14),
+        Paragraph(
+            "This is a system-generated statement and does not require a signature.",
+            st["subtle"]
+        ),
+    ]
+
+
+@timed("sbp_pdf_seconds", op="generate_statement_pdf")
+def generate_statement_pdf(
+    customer: pd.Series,
+    txns: pd.DataFrame,
+    balances: dict,
+    period_from: datetime | None = None,
+    period_to: datetime | None = None,
+) -> bytes:
+    """
+    Returns a PDF as bytes (ReportLab).
+    Professional-ish statement layout.
+    """
+    from reportlab.platypus import Paragraph, Spacer, Table
+
+    tpl = _templates()
+    buf = BytesIO()
+    doc = _doc(buf)
+    st = tpl["styles"]
+
+    story = _front_matter(customer, balances, st, period_from, period_to)
+
     # --- Transactions table ---
-    story.append(Paragraph("<b>Transaction Details</b>", styles["Heading3"]))
+    story.append(Paragraph("<b>Transaction Details</b>", st["h3"]))
     story.append(Spacer(1, 6))
 
     if txns is None or txns.empty:
-        story.append(Paragraph("No transactions available for the selected period.", normal))
+        story.append(Paragraph("No transactions available for the selected period.", st["normal"]))
     else:
-        tx = txns.copy()
-
-        # normalize fields
-        tx["txn_date"] = pd.to_datetime(tx["txn_date"], errors="coerce")
-        tx["txn_date"] = tx["txn_date"].dt.strftime("%Y-%m-%d %H:%M:%S")
-        tx["amount"] = pd.to_numeric(tx["amount"], errors="coerce").fillna(0.0)
-        tx["balance_after_txn"] = pd.to_numeric(tx["balance_after_txn"], errors="coerce").fillna(0.0)
-
-        tx = tx[["txn_id", "txn_date", "txn_type", "amount", "reason", "balance_after_txn"]]
-
-        table_data = [["Txn ID", "Date", "Type", "Amount", "Reason", "Balance"]]
-        for _, r in tx.iterrows():
-            table_data.append([
-                _safe_str(r["txn_id"]),
-                _safe_str(r["txn_date"]),
-                _safe_str(r["txn_type"]),
-                f"{CURRENCY}{float(r['amount']):,.2f}",
-                _safe_str(r["reason"])[:40],  # keep tidy
-                f"{CURRENCY}{float(r['balance_after_txn']):,.2f}",
-            ])
-
-        txn_tbl = Table(
-            table_data,
-            colWidths=[2.2 * cm, 3.8 * cm, 2.2 * cm, 2.6 * cm, 4.2 * cm, 3.0 * cm],
-            repeatRows=1
-        )
-        txn_tbl.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1F3B73")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, 0), 9),
+        table_data = [TXN_HEADER] + _txn_cells(_normalize_txns(txns))
 
-            ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-            ("FONTSIZE", (0, 1), (-1, -1), 8),
-
-            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#FAFAFA")]),
-            ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-            ("LEFTPADDING", (0, 0), (-1, -1), 6),
-            ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-            ("TOPPADDING", (0, 0), (-1, -1), 4),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-        ]))
+        txn_tbl = Table(table_data, colWidths=TXN_COL_WIDTHS, repeatRows=1)
+        txn_tbl.setStyle(tpl["txn"])
         story.append(txn_tbl)
 
-    story.append(Spacer(1, 14))
-    story.append(Paragraph(
-        "This is a system-generated statement and does not require a signature.",
-        subtle_style
-    ))
+    story.extend(_footer(st))
 
     doc.build(story)
     pdf_bytes = buf.getvalue()
     buf.close()
+    inc("sbp_pdf_bytes_total", len(pdf_bytes), op="generate_statement_pdf")
     return pdf_bytes
+
+
+# --- Streaming statements (long histories) ---
+
+class _LazyStory(list):
+    """
+    Story for doc.build() that pulls flowables from a generator a page at a time
+    (up to and including the next PageBreak), once the builder has consumed what is
+    buffered, so only the current page's flowables are alive. Within a page the
+    builder sees the real neighbours (keepWithNext, splitting).
+
+    build() only uses len(), [0], del [0] and front inserts on its story, all plain
+    list operations; tests/test_pdf_statement.py renders a multi-page stream and
+    checks the page count, so a ReportLab that drives the story differently fails there.
+    """
+
+    def __init__(self, flowables: Iterator):
+        super().__init__()
+        self._source = flowables
+
+    def __len__(self) -> int:
+        if not super().__len__():
+            from reportlab.platypus import PageBreak
+
+            for f in self._source:
+                self.append(f)
+                if isinstance(f, PageBreak):
+                    break
+        return super().__len__()
+
+
+def iter_chunks(df: pd.DataFrame, size: int = 5000) -> Iterator[pd.DataFrame]:
+    """Split an in-memory DataFrame into chunks for generate_statement_pdf_stream."""
+    for i in range(0, len(df), size):
+        yield df.iloc[i:i + size]
+
+
+def _iter_pages(chunks: Iterable[pd.DataFrame], first_page_rows: int, rows_per_page: int) -> Iterator[pd.DataFrame]:
+    """
+    Re-cut arbitrary chunks into page-sized frames. Pages are sliced from the
+    current chunk; only a page that spans two chunks is concatenated, and what is
+    carried over is always less than a page.
+    """
+    carry: Optional[pd.DataFrame] = None
+    limit = first_page_rows
+    for chunk in chunks:
+        if chunk is None or chunk.empty:
+            continue
+        pos = 0
+        if carry is not None:
+            need = limit - len(carry)
+            if len(chunk) < need:
+                carry = pd.concat([carry, chunk], ignore_index=True)
+                continue
+            yield pd.concat([carry, chunk.iloc[:need]], ignore_index=True)
+            carry, pos, limit = None, need, rows_per_page
+        while len(chunk) - pos >= limit:
+            yield chunk.iloc[pos:pos + limit]
+            pos += limit
+            limit = rows_per_page
+        if pos < len(chunk):
+            carry = chunk.iloc[pos:]
+    if carry is not None:
+        yield carry
+
+
+@timed("sbp_pdf_seconds", op="generate_statement_pdf_stream")
+def generate_statement_pdf_stream(
+    customer: pd.Series,
+    txn_chunks: Iterable[pd.DataFrame],
+    balances: dict,
+    sink: BinaryIO,
+    period_from: datetime | None = None,
+    period_to: datetime | None = None,
+    rows_per_page: int = STREAM_ROWS_PER_PAGE,
+    first_page_rows: int = STREAM_FIRST_PAGE_ROWS,
+) -> int:
+    """
+    Write a statement for an arbitrarily long history into `sink` (path or binary file).
+
+    `txn_chunks` yields DataFrames in chronological order (oldest first). Each page
+    gets a fixed-size table with a "Brought forward" row, the page's deposit and
+    withdrawal subtotals and a "Carried forward" balance. Only one page of rows and
+    flowables is held at a time; ReportLab keeps just the compressed page streams
+    until the file is finished. Returns the number of transactions written.
+    """
+    from reportlab.platypus import Paragraph, Spacer, Table, PageBreak
+
+    tpl = _templates()
+    st = tpl["styles"]
+    doc = _doc(sink, page_compression=1)
+    counter = {"rows": 0}
+
+    def flowables() -> Iterator:
+        yield from _front_matter(customer, balances, st, period_from, period_to)
+        yield Paragraph("<b>Transaction Details</b>", st["h3"])
+        yield Spacer(1, 6)
+
+        brought_forward = None
+        for page_no, page in enumerate(_iter_pages(txn_chunks, first_page_rows, rows_per_page)):
+            tx = _normalize_txns(page)
+            counter["rows"] += len(tx)
+
+            signed = tx["amount"].where(tx["txn_type"] == "DEPOSIT", -tx["amount"])
+            if brought_forward is None:
+                brought_forward = float(tx["balance_after_txn"].iloc[0] - signed.iloc[0])
+            carried_forward = float(tx["balance_after_txn"].iloc[-1])
+            dep = float(tx.loc[tx["txn_type"] == "DEPOSIT", "amount"].sum())
+            wd = float(tx.loc[tx["txn_type"] == "WITHDRAW", "amount"].sum())
+
+            data = [TXN_HEADER]
+            data.append(["", "", "", "", "Brought forward", f"{CURRENCY}{brought_forward:,.2f}"])
+            data.extend(_txn_cells(tx))
+            data.append(["", "", "Page total", f"+{CURRENCY}{dep:,.2f}", f"-{CURRENCY}{wd:,.2f}", ""])
+            data.append(["", "", "", "", "Carried forward", f"{CURRENCY}{carried_forward:,.2f}"])
+
+            if page_no:
+                yield PageBreak()
+            tbl = Table(data, colWidths=TXN_COL_WIDTHS)
+            tbl.setStyle(tpl["txn_page"])
+            yield tbl
+
+            brought_forward = carried_forward
+
+        if not counter["rows"]:
+            yield Paragraph("No transactions available for the selected period.", st["normal"])
+        yield from _footer(st)
+
+    doc.build(_LazyStory(flowables()))
+    return counter["rows"]
@@ -0,0 +1,155 @@
+# src/posting_queue.py
+"""
+Write-behind posting queue: sessions hand their staged rows to one writer thread,
+which takes everything that arrived within POSTING_QUEUE_WINDOW (up to
+POSTING_QUEUE_MAX_BATCH rows) and commits it as one group - one stripe-lock pass,
+one id block, one journal append + fsync, one balance store write.
+
+A submit() returns only after its group is durable in the journal, so an
+acknowledged posting is already visible to balance reads (balance store) and
+transaction reads (journal merge / mirror). The workbook itself is written later
+by the journal compactor, many groups per openpyxl rewrite.
+
+The queue drains on interpreter exit (atexit) or close(); after that, submit()
+applies rows in the caller's thread.
+"""
+
+from __future__ import annotations
+
+import atexit
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .config import POSTING_QUEUE_WINDOW, POSTING_QUEUE_MAX_BATCH
+from . import metrics
+
+
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ("rows", "done", "result", "error")
+
+    def __init__(self, rows: List[dict]):
+        self.rows = rows
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class PostingQueue:
+    """
+    apply(rows) -> result is called on the writer thread with the concatenated rows
+    of a group (in arrival order); every request in the group receives its result.
+    If apply raises, every request in the group gets the exception - nothing is
+    retried, since a failed group may have been partly written.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[List[dict]], Dict],
+        window: float = POSTING_QUEUE_WINDOW,
+        max_batch: int = POSTING_QUEUE_MAX_BATCH,
+    ):
+        self._apply = apply
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._guard = threading.Lock()
+        self._closed = False
+        self._stats = {"requests": 0, "rows": 0, "batches": 0, "max_batch": 0, "errors": 0}
+
+    def submit(self, rows: List[dict], timeout: Optional[float] = None):
+        """Queue rows, wait until their group is committed and return apply()'s result."""
+        req = _Request(rows)
+        with self._guard:
+            if self._closed:
+                return self._apply(rows)
+            if self._thread is None:
+                atexit.register(self.close)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="posting-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(req)
+        metrics.set_gauge("sbp_posting_queue_depth", self._queue.qsize())
+
+        if not req.done.wait(timeout):
+            raise TimeoutError("Posting was not committed in time; it may still be written.")
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        with self._guard:
+            s = dict(self._stats)
+        s["depth"] = self.depth()
+        s["avg_batch"] = s["rows"] / s["batches"] if s["batches"] else 0.0
+        return s
+
+    def close(self, timeout: Optional[float] = 30) -> None:
+        """Stop accepting work, commit everything already queued and stop the writer."""
+        with self._guard:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    # --- writer thread ---
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+
+            group = [first]
+            rows = len(first.rows)
+            deadline = time.monotonic() + self.window
+            while rows < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                group.append(nxt)
+                rows += len(nxt.rows)
+
+            self._commit(group)
+            metrics.set_gauge("sbp_posting_queue_depth", self._queue.qsize())
+
+    def _commit(self, group: List[_Request]) -> None:
+        rows = [r for req in group for r in req.rows]
+        try:
+            result = self._apply(rows)
+        except BaseException as exc:
+            with self._guard:
+                self._stats["errors"] += 1
+            for req in group:
+                req.error = exc
+                req.done.set()
+            return
+
+        with self._guard:
+            self._stats["requests"] += len(group)
+            self._stats["rows"] += len(rows)
+            self._stats["batches"] += 1
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(rows))
+        metrics.observe("sbp_posting_batch_size", len(rows))
+
+        for req in group:
+            req.result = result
+            req.done.set()
@@ -0,0 +1,247 @@
+# src/schema.py
+"""
+Column types for the three sheets, applied once when a sheet is loaded.
+
+Storage backends, the journal and the Parquet mirror return frames already coerced,
+so callers compare and sort typed columns directly:
+
+- dates      -> datetime64 (unparseable -> NaT)
+- amounts    -> float64 (unparseable -> NaN)
+- txn_type   -> category (DEPOSIT / WITHDRAW, plus any unexpected value so nothing is lost)
+- customer_id in transactions -> category (few distinct values, many rows)
+- ids / text -> string dtype
+
+coerce() is idempotent and skips columns that already have the right dtype, so calling
+it on an already-typed frame is cheap. Values it cannot convert are reported with a
+SchemaWarning (SchemaError when strict); validate() also checks keys and lists
+everything without raising.
+"""
+
+from __future__ import annotations
+
+import warnings
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+
+from .config import SHEET_LOGIN, SHEET_CUSTOMERS, SHEET_TXNS
+
+
+TXN_TYPES = ["DEPOSIT", "WITHDRAW"]
+
+# sheet -> {column: kind}; every listed column is required
+SCHEMAS: Dict[str, Dict[str, str]] = {
+    SHEET_LOGIN: {
+        "user_id": "string",
+        "password": "string",
+        "customer_id": "string",
+    },
+    SHEET_CUSTOMERS: {
+        "customer_id": "string",
+        "customer_name": "string",
+        "account_no": "string",
+        "account_type": "category",
+        "email": "string",
+        "phone": "string",
+        "city": "category",
+        "opening_balance": "float",
+    },
+    SHEET_TXNS: {
+        "txn_id": "string",
+        "customer_id": "category",
+        "txn_date": "datetime",
+        "txn_type": "txn_type",
+        "amount": "float",
+        "reason": "string",
+        "balance_after_txn": "float",
+    },
+}
+
+# must be present and unique
+KEYS = {SHEET_LOGIN: "user_id", SHEET_CUSTOMERS: "customer_id", SHEET_TXNS: "txn_id"}
+
+# written back to storage in the workbook's original text format
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class SchemaWarning(UserWarning):
+    pass
+
+
+class SchemaError(ValueError):
+    def __init__(self, sheet_name: str, issues: List[str]):
+        super().__init__(f"{sheet_name}: " + "; ".join(issues))
+        self.sheet_name = sheet_name
+        self.issues = issues
+
+
+def _string_dtype():
+    # NaN-backed string dtype (pandas >= 2.3 / the default "str" in 3.x): missing values
+    # compare False instead of propagating pd.NA into boolean masks
+    try:
+        return pd.StringDtype(na_value=np.nan)
+    except TypeError:
+        return object
+
+
+STRING = _string_dtype()
+
+
+def _is_string(s: pd.Series) -> bool:
+    return isinstance(s.dtype, pd.StringDtype) and s.dtype.na_value is np.nan
+
+
+def _to_string(s: pd.Series) -> pd.Series:
+    if _is_string(s):
+        return s
+    if ptypes.is_float_dtype(s) and (s.dropna() % 1 == 0).all():
+        # numbers typed into the sheet (phone, ids) come back as floats when a cell is empty
+        s = s.astype("Int64")
+    out = s.astype(str).where(s.notna(), np.nan) if STRING is object else s.astype(STRING)
+    return out.str.strip()
+
+
+def _to_category(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    return _to_string(s).astype("category")
+
+
+def _to_txn_type(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype) and list(s.cat.categories[:len(TXN_TYPES)]) == TXN_TYPES:
+        return s
+    s = _to_string(s).str.upper()
+    extra = sorted(set(s.dropna().unique()) - set(TXN_TYPES))
+    return s.astype(pd.CategoricalDtype(TXN_TYPES + extra))
+
+
+def parse_datetime(s: pd.Series) -> pd.Series:
+    """DATE_FORMAT text (or other date text, Excel dates) as datetime64; unparseable: NaT."""
+    if ptypes.is_datetime64_any_dtype(s):
+        return s
+    parsed = pd.to_datetime(s, format=DATE_FORMAT, errors="coerce")
+    retry = parsed.isna() & s.notna()
+    if retry.any():
+        # hand-edited cells: other formats or real Excel dates
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            parsed[retry] = pd.to_datetime(s[retry], format="mixed", errors="coerce")
+    return parsed
+
+
+def _to_float(s: pd.Series) -> pd.Series:
+    if ptypes.is_float_dtype(s):
+        return s
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+_CONVERTERS = {
+    "string": _to_string,
+    "category": _to_category,
+    "txn_type": _to_txn_type,
+    "datetime": parse_datetime,
+    "float": _to_float,
+}
+
+
+def _convert(sheet_name: str, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """Typed frame + problems found while converting (unparseable values, bad txn types)."""
+    changed, issues = {}, []
+    for col, kind in SCHEMAS[sheet_name].items():
+        if col not in df.columns:
+            continue
+        raw = df[col]
+        typed = _CONVERTERS[kind](raw)
+        if typed is raw:
+            continue
+        changed[col] = typed
+
+        if kind in ("datetime", "float"):
+            bad = raw.notna() & typed.isna()
+            if bad.any():
+                rows = ", ".join(str(i) for i in raw.index[bad][:5])
+                issues.append(f"{col}: {int(bad.sum())} unparseable value(s) (rows {rows})")
+        elif kind == "txn_type" and len(typed.cat.categories) > len(TXN_TYPES):
+            bad = ~typed.isin(TXN_TYPES) & typed.notna()
+            values = ", ".join(list(typed.cat.categories[len(TXN_TYPES):])[:5])
+            issues.append(f"{col}: {int(bad.sum())} value(s) not DEPOSIT/WITHDRAW ({values})")
+
+    return (df.assign(**changed) if changed else df), issues
+
+
+def coerce(sheet_name: str, df: pd.DataFrame, strict: bool = False) -> pd.DataFrame:
+    """
+    Return `df` with the sheet's column types. Unknown sheets and extra columns are
+    left alone; missing columns are not added. Values that cannot be converted
+    become NaN/NaT and are reported with a SchemaWarning, or a SchemaError when
+    strict=True.
+    """
+    if sheet_name not in SCHEMAS:
+        return df
+    out, issues = _convert(sheet_name, df)
+    if issues:
+        if strict:
+            raise SchemaError(sheet_name, issues)
+        warnings.warn(f"{sheet_name}: " + "; ".join(issues), SchemaWarning, stacklevel=2)
+    return out
+
+
+def coerce_like(sheet_name: str, df: pd.DataFrame, like: pd.DataFrame) -> pd.DataFrame:
+    """
+    coerce() that reuses `like`'s categories where they already cover `df`'s values,
+    so pd.concat([like, df]) keeps categorical columns instead of falling back to object.
+    """
+    shared = {}
+    for col in SCHEMAS.get(sheet_name, {}):
+        if col in df.columns and col in like.columns and isinstance(like[col].dtype, pd.CategoricalDtype):
+            values = df[col].dropna()
+            if values.isin(like[col].cat.categories).all():
+                shared[col] = df[col].astype(like[col].dtype)
+    return coerce(sheet_name, df.assign(**shared) if shared else df)
+
+
+def validate(sheet_name: str, df: pd.DataFrame) -> List[str]:
+    """
+    Every problem coerce() would hit, plus missing columns and empty / duplicate keys.
+    Pass the frame as stored (before coercion).
+    """
+    schema = SCHEMAS.get(sheet_name)
+    if schema is None:
+        return []
+
+    issues = []
+    missing = [c for c in schema if c not in df.columns]
+    if missing:
+        issues.append(f"missing column(s): {', '.join(missing)}")
+
+    typed, convert_issues = _convert(sheet_name, df)
+    issues.extend(convert_issues)
+
+    key = KEYS[sheet_name]
+    if key in typed.columns:
+        ids = typed[key]
+        blank = ids.isna() | (ids.astype(str) == "")
+        if blank.any():
+            issues.append(f"{key}: {int(blank.sum())} empty value(s)")
+        dupes = ids[~blank].duplicated()
+        if dupes.any():
+            issues.append(f"{key}: {int(dupes.sum())} duplicate value(s)")
+    return issues
+
+
+def to_storage(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of coerce for writing: dates back to text, categories to plain values."""
+    schema = SCHEMAS.get(sheet_name)
+    if schema is None:
+        return df
+
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if ptypes.is_datetime64_any_dtype(s):
+            out[col] = s.dt.strftime(DATE_FORMAT).astype(object).where(s.notna(), None)
+        elif isinstance(s.dtype, pd.CategoricalDtype) or _is_string(s):
+            out[col] = s.astype(object).where(s.notna(), None)
+    return df.assign(**out) if out else df
@@ -0,0 +1,108 @@
+# src/sequence.py
+
+from __future__ import annotations
+
+import os
+from typing import List
+
+import pandas as pd
+
+from .config import SEQUENCE_FILE_PATH
+from .locks import lock, LEDGER
+from .journal import read_journal, stored_with_journal
+from . import archive
+
+
+TXN_PREFIX = "TXN"
+
+
+def format_txn_id(n: int) -> str:
+    """Generates TXN000001 style IDs."""
+    return f"{TXN_PREFIX}{n:06d}"
+
+
+def txn_number(txn_id) -> int:
+    """Numeric suffix of a TXNnnnnnn id (0 for None or other ids)."""
+    tail = str(txn_id or "")[len(TXN_PREFIX):]
+    return int(tail) if tail.isdigit() else 0
+
+
+def max_txn_number(txn_df: pd.DataFrame) -> int:
+    """Highest numeric suffix among TXNnnnnnn ids (0 if none)."""
+    if txn_df.empty or "txn_id" not in txn_df.columns:
+        return 0
+
+    ids = txn_df["txn_id"].dropna().astype(str)
+    tails = ids[ids.str.startswith(TXN_PREFIX)].str[len(TXN_PREFIX):]
+    nums = pd.to_numeric(tails[tails.str.isdigit()], errors="coerce").dropna()
+    return int(nums.max()) if not nums.empty else 0
+
+
+def _recover_high_water() -> int:
+    """
+    One full scan of workbook + journal (plus the archive manifest's high mark);
+    only done when the sequence file is missing.
+    """
+    try:
+        df = stored_with_journal()
+    except ValueError:
+        df = read_journal()
+    return max(max_txn_number(df), archive.max_txn_number())
+
+
+def _read_high_water() -> int:
+    try:
+        with open(SEQUENCE_FILE_PATH, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return _recover_high_water()
+
+
+def _write_high_water(n: int) -> None:
+    # write-then-rename so a crash never leaves a half-written number behind
+    tmp = SEQUENCE_FILE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(n))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, SEQUENCE_FILE_PATH)
+
+
+def reserve_txn_ids(count: int) -> List[str]:
+    """
+    Reserve `count` consecutive transaction ids.
+    Cost is constant regardless of how many transactions exist. Ids are
+    monotonic but not gap-free: a posting that fails after reserving leaves a gap.
+    """
+    if count <= 0:
+        return []
+
+    with lock(LEDGER):
+        high = _read_high_water()
+        _write_high_water(high + count)
+
+    return [format_txn_id(n) for n in range(high + 1, high + count + 1)]
+
+
+def next_txn_id() -> str:
+    return reserve_txn_ids(1)[0]
+
+
+def current_high_water() -> int:
+    """Last id handed out (without reserving a new one)."""
+    if not os.path.exists(SEQUENCE_FILE_PATH):
+        return reset_sequence()
+    return _read_high_water()
+
+
+def reset_sequence() -> int:
+    """
+    Re-derive the high-water mark from the data (after manual edits/imports).
+    Never moves backwards, so ids handed out earlier are not reissued.
+    """
+    with lock(LEDGER):
+        high = _recover_high_water()
+        if os.path.exists(SEQUENCE_FILE_PATH):
+            high = max(high, _read_high_water())
+        _write_high_water(high)
+    return high
@@ -0,0 +1,334 @@
+# src/shards.py
+"""
+Hash-sharded transaction storage.
+
+`python -m src.cli reshard --shards 16` moves transaction_details out of the main
+workbook into 16 shard files, customer_id -> crc32(customer_id) % 16:
+
+    data/state_bank_db.xlsx.shards.json                      {"shards": 16, "dir": ...}
+    data/state_bank_db.xlsx.shards-16-<stamp>/txns-07.xlsx
+
+Each shard is its own file (same engine as the main one) with its own parsed-sheet
+cache and its own lock (shard-07). Folding postings into storage rewrites only the
+shards of the customers involved, holding only those shards' locks (and DATA shared,
+so the layout cannot change meanwhile), and a customer's reads parse only their
+shard, so the cost grows with shard size instead of the whole bank's history. The
+main workbook keeps login/customer sheets and an empty transaction_details sheet.
+
+ShardedBackend wraps the main engine and is what get_backend() returns. The
+layout file is replaced atomically and checked (one stat) on every call, so every
+process follows a reshard without a restart; `reshard --shards 0` folds the shards
+back into the main workbook. The shard directory a reshard replaces is kept until
+the next one, for readers that picked up the old layout just before the swap.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import SHEET_TXNS, CACHE_MAX_BYTES
+from .excel_db import StorageBackend, open_engine, file_lock, get_backend
+from .locks import lock, DATA, LEDGER
+from .schema import coerce
+
+
+LAYOUT_SUFFIX = ".shards.json"
+
+
+def shard_of(customer_id, shards: int) -> int:
+    return zlib.crc32(str(customer_id).encode("utf-8")) % shards
+
+
+def shard_numbers(customer_ids: pd.Series, shards: int) -> np.ndarray:
+    """shard_of for a whole column; each distinct id is hashed once."""
+    ids = customer_ids.astype(str)
+    lookup = {cid: shard_of(cid, shards) for cid in ids.unique()}
+    return ids.map(lookup).to_numpy(dtype=np.int64)
+
+
+def read_layout(path: str) -> Optional[dict]:
+    """{"shards": n, "dir": name} for the data file at `path`, or None when unsharded."""
+    try:
+        with open(path + LAYOUT_SUFFIX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_layout(path: str, layout: dict) -> None:
+    tmp = path + LAYOUT_SUFFIX + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(layout, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path + LAYOUT_SUFFIX)
+
+
+def _shard_dir(path: str, layout: dict) -> str:
+    return os.path.join(os.path.dirname(path), layout["dir"])
+
+
+def _remove_generations(path: str, keep: Iterable[str]) -> None:
+    """Delete the shard directories of `path` other than those named in `keep`."""
+    parent = os.path.dirname(path) or "."
+    prefix = os.path.basename(path) + ".shards-"
+    for name in os.listdir(parent):
+        if name.startswith(prefix) and name not in keep and os.path.isdir(os.path.join(parent, name)):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+def open_shards(path: str, layout: dict) -> List[StorageBackend]:
+    n = int(layout["shards"])
+    directory = _shard_dir(path, layout)
+    suffix = os.path.splitext(path)[1]
+    return [
+        open_engine(
+            os.path.join(directory, f"txns-{i:02d}{suffix}"),
+            lock_name=f"shard-{i:02d}",
+            max_bytes=CACHE_MAX_BYTES // n,
+        )
+        for i in range(n)
+    ]
+
+
+def _concat(sheet_name: str, frames: List[pd.DataFrame]) -> pd.DataFrame:
+    nonempty = [f for f in frames if not f.empty]
+    if not nonempty:
+        return frames[0]
+    if len(nonempty) == 1:
+        return nonempty[0]
+    # each shard has its own categories: re-type the combined columns
+    return coerce(sheet_name, pd.concat(nonempty, ignore_index=True))
+
+
+class ShardedBackend(StorageBackend):
+    """
+    Routes transaction_details to the shard files of the current layout and every
+    other sheet (and transactions, while unsharded) to the main engine.
+    """
+
+    def __init__(self, base: StorageBackend, path: str):
+        self.base = base
+        self.path = path
+        self._guard = threading.Lock()
+        self._key: Optional[tuple] = None  # identity of the layout file the shards belong to
+        self._shards: List[StorageBackend] = []
+
+    def _layout_key(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path + LAYOUT_SUFFIX)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def shards(self) -> List[StorageBackend]:
+        """Shard engines of the current layout ([] when not sharded)."""
+        key = self._layout_key()
+        with self._guard:
+            if key != self._key:
+                layout = read_layout(self.path) if key is not None else None
+                self._shards = open_shards(self.path, layout) if layout else []
+                self._key = key
+            return self._shards
+
+    def _txn_shards(self, sheet_name: str) -> List[StorageBackend]:
+        return self.shards() if sheet_name == SHEET_TXNS else []
+
+    @staticmethod
+    def _group(rows: List[dict], shards: int) -> Dict[int, List[dict]]:
+        groups: Dict[int, List[dict]] = {}
+        for row in rows:
+            groups.setdefault(shard_of(row["customer_id"], shards), []).append(row)
+        return groups
+
+    # --- reads ---
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            return self.base.read_sheet(sheet_name)
+        return _concat(sheet_name, [s.read_sheet(sheet_name) for s in shards])
+
+    def read_sheet_raw(self, sheet_name: str) -> pd.DataFrame:
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            return self.base.read_sheet_raw(sheet_name)
+        return pd.concat([s.read_sheet_raw(sheet_name) for s in shards], ignore_index=True)
+
+    def read_all_sheets(self) -> Dict[str, pd.DataFrame]:
+        sheets = self.base.read_all_sheets()
+        if self.shards():
+            sheets[SHEET_TXNS] = self.read_sheet(SHEET_TXNS)
+        return sheets
+
+    def find_rows(
+        self,
+        sheet_name: str,
+        where: dict,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> pd.DataFrame:
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            return self.base.find_rows(sheet_name, where, order_by=order_by, descending=descending)
+        if "customer_id" in where:
+            shard = shards[shard_of(where["customer_id"], len(shards))]
+            return shard.find_rows(sheet_name, where, order_by=order_by, descending=descending)
+        return super().find_rows(sheet_name, where, order_by=order_by, descending=descending)
+
+    def read_sheet_for(self, sheet_name: str, customer_ids: Iterable[str]) -> pd.DataFrame:
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            return self.base.read_sheet_for(sheet_name, customer_ids)
+        wanted = sorted({shard_of(cid, len(shards)) for cid in customer_ids})
+        if not wanted:
+            return shards[0].read_sheet(sheet_name).iloc[0:0]
+        return _concat(sheet_name, [shards[i].read_sheet(sheet_name) for i in wanted])
+
+    def iter_sheet(self, sheet_name: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """Shard by shard, so only one shard is parsed at a time."""
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            yield from self.base.iter_sheet(sheet_name, chunk_rows)
+            return
+        for shard in shards:
+            yield from shard.iter_sheet(sheet_name, chunk_rows)
+
+    def bulk_capacity(self, sheet_name: str) -> Optional[int]:
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            return self.base.bulk_capacity(sheet_name)
+        room = [s.bulk_capacity(sheet_name) for s in shards]
+        if any(r is None for r in room):
+            return None
+        # rows spread evenly over the shards: the fullest one runs out first
+        return min(room) * len(shards)
+
+    # --- writes ---
+
+    def overwrite_sheet(self, sheet_name: str, df: pd.DataFrame) -> None:
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            self.base.overwrite_sheet(sheet_name, df)
+            return
+        nums = shard_numbers(df["customer_id"], len(shards))
+        for i, shard in enumerate(shards):
+            shard.overwrite_sheet(sheet_name, df[nums == i])
+
+    def append_rows(self, sheet_name: str, rows: List[dict]) -> None:
+        """Each touched shard gets one rewrite; the others are not opened."""
+        shards = self._txn_shards(sheet_name)
+        if not shards:
+            self.base.append_rows(sheet_name, rows)
+            return
+        groups = self._group(rows, len(shards))
+        for i in sorted(groups):
+            shards[i].append_rows(sheet_name, groups[i])
+
+    def append_new_rows(self, sheet_name: str, rows: List[dict], batch_size: int) -> int:
+        """
+        Shard by shard, each under its own lock; DATA is only held shared, so reads
+        and writes of the other shards carry on. Unsharded, the main engine's lock
+        (DATA, exclusive) is taken instead - re-checked under it, since a reshard may
+        have run in between.
+        """
+        while True:
+            with lock(DATA, shared=True):
+                shards = self._txn_shards(sheet_name)
+                if shards:
+                    groups = self._group(rows, len(shards))
+                    return sum(shards[i].append_new_rows(sheet_name, groups[i], batch_size) for i in sorted(groups))
+            with lock(DATA):
+                if not self._txn_shards(sheet_name):
+                    return self.base.append_new_rows(sheet_name, rows, batch_size)
+
+    # --- versions / caches ---
+
+    def data_version(self, sheet_name: Optional[str] = None) -> Optional[tuple]:
+        base = self.base.data_version(sheet_name)
+        if sheet_name not in (None, SHEET_TXNS):
+            return base
+        shards = self.shards()
+        if not shards:
+            return base
+        return (base, self._key, tuple(s.data_version() for s in shards))
+
+    def cache_stats(self) -> dict:
+        stats = dict(self.base.cache_stats())
+        shards = self.shards()
+        if shards:
+            merged: Dict[str, int] = {}
+            for shard in shards:
+                for k, v in shard.cache_stats().items():
+                    merged[k] = merged.get(k, 0) + v
+            stats["shards"] = len(shards)
+            stats["shard_cache"] = merged
+        return stats
+
+    def clear_cache(self) -> None:
+        self.base.clear_cache()
+        for shard in self.shards():
+            shard.clear_cache()
+
+
+# --- Resharding ---
+
+def reshard(shards: int) -> dict:
+    """
+    Move every transaction into `shards` shard files (0: back into the main
+    workbook). Runs under the LEDGER and DATA locks after folding the journal in,
+    so no posting or compaction interleaves; other processes switch over when the
+    layout file is replaced. The replaced generation's directory stays until the
+    next reshard (older ones are removed then), so a read that started on the old
+    layout can finish. Returns {"shards": n, "rows": total, "per_shard": [...]}.
+    """
+    from .journal import compact
+
+    if shards < 0:
+        raise ValueError("Shard count must be 0 (unsharded) or more.")
+
+    backend = get_backend()
+    if not isinstance(backend, ShardedBackend):
+        raise RuntimeError("Storage backend does not support sharding.")
+    path = backend.path
+
+    with lock(LEDGER), file_lock():
+        compact()
+        txns = backend.read_sheet(SHEET_TXNS)
+        old = read_layout(path)
+
+        if shards == 0:
+            new = None
+            if old is not None:
+                backend.base.overwrite_sheet(SHEET_TXNS, txns)
+                os.remove(path + LAYOUT_SUFFIX)
+            per_shard = [len(txns)]
+        else:
+            stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            new = {"shards": shards, "dir": f"{os.path.basename(path)}.shards-{shards}-{stamp}"}
+            os.makedirs(_shard_dir(path, new))
+
+            nums = shard_numbers(txns["customer_id"], shards)
+            per_shard = []
+            for i, engine in enumerate(open_shards(path, new)):
+                part = txns[nums == i]
+                engine.overwrite_sheet(SHEET_TXNS, part)
+                per_shard.append(len(part))
+
+            _write_layout(path, new)
+            if old is None:
+                # header only: the rows live in the shards now
+                backend.base.overwrite_sheet(SHEET_TXNS, txns.iloc[0:0])
+
+        _remove_generations(path, keep=[layout["dir"] for layout in (old, new) if layout is not None])
+
+    return {"shards": shards, "rows": len(txns), "per_shard": per_shard}
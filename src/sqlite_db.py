@@ -0,0 +1,181 @@
+# src/sqlite_db.py
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .config import SHEET_LOGIN, SHEET_CUSTOMERS, SHEET_TXNS
+from .excel_db import StorageBackend
+from .locks import lock, DATA
+from .schema import coerce, to_storage
+
+
+# (index name, table, columns) - created whenever the table exists
+INDEXES = [
+    ("idx_login_user_id", SHEET_LOGIN, ["user_id"]),
+    ("idx_customer_customer_id", SHEET_CUSTOMERS, ["customer_id"]),
+    ("idx_txn_customer_date", SHEET_TXNS, ["customer_id", "txn_date"]),
+]
+
+
+def _q(name: str) -> str:
+    """Quote an identifier (sheet and column names come from the workbook)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    One SQLite table per sheet, with indexes for the lookups the app does:
+    login by user_id, customer by customer_id, transactions by (customer_id, txn_date).
+    """
+
+    def __init__(self, path: str, lock_name: str = DATA):
+        self.path = path
+        self.lock_name = lock_name
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def data_version(self, sheet_name: Optional[str] = None) -> Optional[tuple]:
+        # WAL mode: committed writes land in the -wal file first
+        key = []
+        for path in (self.path, self.path + "-wal"):
+            try:
+                st = os.stat(path)
+                key.append((st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                key.append(None)
+        return tuple(key)
+
+    def _tables(self) -> List[str]:
+        cur = self._conn().execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY rowid")
+        return [r[0] for r in cur.fetchall()]
+
+    def _columns(self, table: str) -> List[str]:
+        cur = self._conn().execute(f"PRAGMA table_info({_q(table)})")
+        return [r[1] for r in cur.fetchall()]
+
+    def _ensure_indexes(self, table: str) -> None:
+        cols = set(self._columns(table))
+        for name, tbl, idx_cols in INDEXES:
+            if tbl == table and cols.issuperset(idx_cols):
+                col_sql = ", ".join(_q(c) for c in idx_cols)
+                self._conn().execute(f"CREATE INDEX IF NOT EXISTS {_q(name)} ON {_q(tbl)} ({col_sql})")
+
+    def _check_table(self, sheet_name: str) -> None:
+        if sheet_name not in self._tables():
+            # same failure mode as pd.read_excel on a missing sheet
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        return coerce(sheet_name, self.read_sheet_raw(sheet_name))
+
+    def read_sheet_raw(self, sheet_name: str) -> pd.DataFrame:
+        self._check_table(sheet_name)
+        return pd.read_sql_query(f"SELECT * FROM {_q(sheet_name)} ORDER BY rowid", self._conn())
+
+    def iter_sheet(self, sheet_name: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        """One query read chunk_rows rows at a time (a consistent snapshot in WAL mode)."""
+        self._check_table(sheet_name)
+        query = f"SELECT * FROM {_q(sheet_name)} ORDER BY rowid"
+        for chunk in pd.read_sql_query(query, self._conn(), chunksize=chunk_rows):
+            yield coerce(sheet_name, chunk)
+
+    def read_all_sheets(self) -> Dict[str, pd.DataFrame]:
+        return {name: self.read_sheet(name) for name in self._tables()}
+
+    def overwrite_sheet(self, sheet_name: str, df: pd.DataFrame) -> None:
+        df = to_storage(sheet_name, df)
+        conn = self._conn()
+        with lock(self.lock_name), conn:
+            df.to_sql(sheet_name, conn, if_exists="replace", index=False)
+            self._ensure_indexes(sheet_name)
+
+    def append_rows(self, sheet_name: str, rows: List[dict]) -> None:
+        if not rows:
+            return
+
+        conn = self._conn()
+        with lock(self.lock_name), conn:
+            if sheet_name not in self._tables():
+                to_storage(sheet_name, coerce(sheet_name, pd.DataFrame(rows))).to_sql(sheet_name, conn, index=False)
+                self._ensure_indexes(sheet_name)
+                return
+
+            cols = self._columns(sheet_name)
+            col_sql = ", ".join(_q(c) for c in cols)
+            marks = ", ".join("?" for _ in cols)
+            conn.executemany(
+                f"INSERT INTO {_q(sheet_name)} ({col_sql}) VALUES ({marks})",
+                [tuple(_py(r.get(c)) for c in cols) for r in rows],
+            )
+
+    def find_rows(
+        self,
+        sheet_name: str,
+        where: dict,
+        order_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> pd.DataFrame:
+        self._check_table(sheet_name)
+        cols = set(self._columns(sheet_name))
+
+        sql = f"SELECT * FROM {_q(sheet_name)}"
+        params = []
+        if where:
+            if not cols.issuperset(where):
+                return coerce(sheet_name, pd.DataFrame(columns=self._columns(sheet_name)))
+            sql += " WHERE " + " AND ".join(f"{_q(c)} = ?" for c in where)
+            params = [_py(v) for v in where.values()]
+        if order_by and order_by in cols:
+            sql += f" ORDER BY {_q(order_by)} {'DESC' if descending else 'ASC'}"
+
+        return coerce(sheet_name, pd.read_sql_query(sql, self._conn(), params=params))
+
+
+def _py(value):
+    """numpy scalars / NaN -> plain Python values sqlite3 can bind."""
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def migrate_workbook(xlsx_path: str, db_path: str) -> Dict[str, int]:
+    """
+    One-shot copy of every sheet of an Excel workbook into a new SQLite database.
+    Returns {sheet_name: row_count}.
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"Target database already exists: {db_path}")
+
+    sheets = pd.read_excel(xlsx_path, sheet_name=None)
+    backend = SQLiteBackend(db_path)
+
+    counts = {}
+    for name, df in sheets.items():
+        if "txn_date" in df.columns:
+            # store as sortable text so the (customer_id, txn_date) index orders correctly
+            dates = pd.to_datetime(df["txn_date"], errors="coerce")
+            df = df.copy()
+            df["txn_date"] = dates.dt.strftime("%Y-%m-%d %H:%M:%S").where(dates.notna(), df["txn_date"])
+        backend.overwrite_sheet(name, df)
+        counts[name] = len(df)
+    return counts
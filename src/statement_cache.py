@@ -0,0 +1,159 @@
+# src/statement_cache.py
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from .config import (
+    STATEMENT_CACHE_MAX_BYTES, STATEMENT_CACHE_DIR, STATEMENT_CACHE_DISK_MAX_BYTES
+)
+
+
+def statement_key(
+    customer_id: str,
+    period_from,
+    period_to,
+    txn_type: str,
+    data_version,
+    customer: Optional[dict] = None,
+) -> str:
+    """
+    Content address of a statement. data_version must change whenever anything
+    the statement shows does: the customer's transactions (last_txn_id + balance
+    version) and whatever its balances are derived from (archive cutoff, checkpoint
+    store). `customer` is the record printed in the header (name, account, ...).
+    """
+    details = sorted((str(k), str(v)) for k, v in (customer or {}).items())
+    raw = "|".join(str(x) for x in (customer_id, period_from, period_to, txn_type, data_version, details))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class StatementCache:
+    """
+    LRU of rendered statement PDFs, bounded by bytes. Entries evicted from memory
+    are spilled to disk and promoted back on the next hit; the disk tier is trimmed
+    oldest-first to its own budget.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[str], disk_max_bytes: int):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0,
+            "renders": 0, "render_seconds": 0.0, "spilled": 0,
+        }
+
+    # --- disk tier ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, key + ".pdf")
+
+    def _spill(self, key: str, data: bytes) -> None:
+        if not self.spill_dir:
+            return
+        # customer statements: readable by the app's user only
+        os.makedirs(self.spill_dir, mode=0o700, exist_ok=True)
+        os.chmod(self.spill_dir, 0o700)
+        tmp = self._path(key) + ".tmp"
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+        self._stats["spilled"] += 1
+        self._trim_disk()
+
+    def _trim_disk(self) -> None:
+        entries = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith(".pdf"):
+                p = os.path.join(self.spill_dir, name)
+                st = os.stat(p)
+                entries.append((st.st_mtime, st.st_size, p))
+        total = sum(e[1] for e in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            os.remove(p)
+            total -= size
+
+    def _load_spilled(self, key: str) -> Optional[bytes]:
+        if not self.spill_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.remove(self._path(key))
+        return data
+
+    # --- memory tier ---
+
+    def _put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            self._spill(key, data)
+            return
+        self._mem[key] = data
+        self._mem_bytes += len(data)
+        while self._mem_bytes > self.max_bytes:
+            old_key, old = self._mem.popitem(last=False)
+            self._mem_bytes -= len(old)
+            self._spill(old_key, old)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return data
+
+            data = self._load_spilled(key)
+            if data is not None:
+                self._stats["disk_hits"] += 1
+                self._put(key, data)
+                return data
+
+            self._stats["misses"] += 1
+            return None
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """Cached bytes for `key`, calling render() only on a miss."""
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        start = time.perf_counter()
+        data = render()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._stats["renders"] += 1
+            self._stats["render_seconds"] += elapsed
+            if key not in self._mem:
+                self._put(key, data)
+        return data
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["entries"] = len(self._mem)
+            s["bytes"] = self._mem_bytes
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        s["hit_rate"] = (s["memory_hits"] + s["disk_hits"]) / lookups if lookups else 0.0
+        s["avg_render_seconds"] = s["render_seconds"] / s["renders"] if s["renders"] else 0.0
+        return s
+
+
+# process-wide cache shared by every session
+statement_cache = StatementCache(
+    STATEMENT_CACHE_MAX_BYTES, STATEMENT_CACHE_DIR, STATEMENT_CACHE_DISK_MAX_BYTES
+)
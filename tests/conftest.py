@@ -0,0 +1,18 @@
+# tests/conftest.py
+"""
+Point the app at a throwaway copy of the bundled workbook before anything from
+src/ is imported (config reads SBP_DATA_FILE at import time).
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_data_dir = tempfile.mkdtemp(prefix="sbp-tests-")
+shutil.copy(os.path.join(ROOT, "data", "state_bank_db.xlsx"), _data_dir)
+os.environ["SBP_DATA_FILE"] = os.path.join(_data_dir, "state_bank_db.xlsx")
+os.environ.pop("SBP_LEDGER_SOCKET", None)
@@ -0,0 +1,94 @@
+# tests/test_archive.py
+
+import os
+
+import pandas as pd
+import pytest
+
+from src import archive, balances, banking, parquet_mirror
+from src.config import SHEET_CUSTOMERS, SHEET_TXNS
+from src.excel_db import file_lock, overwrite_sheet, read_sheet
+from src.journal import compact
+from src.locks import lock, LEDGER
+
+
+NOW = pd.Timestamp("2026-02-15")
+CUT = pd.Timestamp("2026-02-01")  # first day of the month `horizon_days=0` before NOW
+
+
+def _customers():
+    return read_sheet(SHEET_CUSTOMERS)["customer_id"].astype(str).tolist()
+
+
+def _everything(customer_id):
+    return set(banking.get_transactions_between(customer_id, None, None)["txn_id"].astype(str))
+
+
+@pytest.fixture
+def archived(tmp_path, monkeypatch):
+    """Archive everything before CUT into tmp_path; the hot store is put back afterwards."""
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(parquet_mirror, "TXN_MIRROR_DIR", str(tmp_path / "mirror"))
+    banking.deposit("CUST001", 10, "after the cutoff")
+    with lock(LEDGER):
+        compact()
+        hot = read_sheet(SHEET_TXNS)
+
+    before = {
+        cid: (banking.calculate_balance(cid)["current_balance"], _everything(cid)) for cid in _customers()
+    }
+    result = archive.archive_closed_periods(horizon_days=0, now=NOW)
+    yield before, result
+
+    with lock(LEDGER), file_lock():
+        overwrite_sheet(SHEET_TXNS, hot)
+    monkeypatch.undo()
+    archive.segment_cache.clear()
+    balances.rebuild_balances()
+
+
+def test_the_cutoff_is_the_month_start_and_the_old_rows_leave_the_hot_store(archived):
+    _, result = archived
+    assert result["cutoff"] == CUT == archive.cutoff()
+    assert result["rows"] > 0
+    assert all(name.startswith("txns-") and name.endswith(".csv.gz") for name in result["segments"])
+    assert len(read_sheet(SHEET_TXNS)) == result["hot_rows"]
+    assert (read_sheet(SHEET_TXNS)["txn_date"] >= CUT).all()
+
+
+def test_balances_are_unchanged(archived):
+    before, _ = archived
+    balances.rebuild_balances()  # from the hot rows plus the manifest's carry-forward
+    for cid, (balance, _) in before.items():
+        assert banking.calculate_balance(cid)["current_balance"] == pytest.approx(balance)
+
+
+def test_ranges_across_the_cutoff_read_hot_and_cold_rows(archived):
+    before, _ = archived
+    for cid, (_, ids) in before.items():
+        assert _everything(cid) == ids
+        hot = set(banking.get_transactions(cid)["txn_id"].astype(str))
+        cold = set(archive.read_between(pd.Timestamp.min, CUT, cid)["txn_id"].astype(str))
+        assert hot | cold == ids and not hot & cold
+
+    cid = next(c for c, (_, ids) in before.items() if ids - set(banking.get_transactions(c)["txn_id"].astype(str)))
+    rows = banking.get_transactions_between(cid, CUT - pd.Timedelta(days=60), pd.Timestamp.max)
+    assert (rows["txn_date"] < CUT).any() and (rows["txn_date"] >= CUT).any()
+    assert list(rows["txn_date"]) == sorted(rows["txn_date"], reverse=True)
+
+    only_cold = banking.get_transactions_between(cid, None, CUT - pd.Timedelta(1, "us"))
+    assert not only_cold.empty and (only_cold["txn_date"] < CUT).all()
+
+
+def test_postings_dated_before_the_cutoff_are_refused(archived):
+    early = {"customer_id": "CUST001", "txn_date": "2026-01-31 23:59:59", "txn_type": "DEPOSIT", "amount": 1.0}
+    with pytest.raises(ValueError, match="archived period"):
+        banking.write_rows([early])
+    archive.check_postable([dict(early, txn_date="2026-02-01 00:00:00")])
+
+
+def test_a_second_run_never_moves_the_cutoff_back(archived):
+    again = archive.archive_closed_periods(horizon_days=400, now=NOW)
+    assert again["cutoff"] == CUT
+    assert (again["rows"], again["segments"]) == (0, [])
+    assert sorted(os.listdir(archive.ARCHIVE_DIR))[0] == archive.MANIFEST
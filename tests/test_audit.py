@@ -0,0 +1,86 @@
+# tests/test_audit.py
+
+import pandas as pd
+import pytest
+
+from src import audit
+from src.config import SHEET_CUSTOMERS, SHEET_TXNS
+from src.schema import coerce
+
+
+CUSTOMERS = coerce(SHEET_CUSTOMERS, pd.DataFrame({
+    "customer_id": ["C1", "C2"], "opening_balance": [100.0, 50.0],
+}))
+
+
+def _txns(rows):
+    """rows: (txn_id, customer_id, txn_type, amount, balance_after_txn), one second apart."""
+    df = pd.DataFrame(rows, columns=["txn_id", "customer_id", "txn_type", "amount", "balance_after_txn"])
+    df["txn_date"] = pd.Timestamp("2026-03-01") + pd.to_timedelta(range(len(df)), unit="s")
+    return coerce(SHEET_TXNS, df)
+
+
+CLEAN = [
+    ("TXN000001", "C1", "DEPOSIT", 20.0, 120.0),
+    ("TXN000002", "C2", "WITHDRAW", 10.0, 40.0),
+    ("TXN000003", "C1", "WITHDRAW", 70.0, 50.0),
+    ("TXN000004", "C1", "DEPOSIT", 5.0, 55.0),
+]
+
+
+def _issues(txns, **kwargs):
+    report = audit.audit_frames(txns, CUSTOMERS, **kwargs)["issues"]
+    return sorted(zip(report["issue"], report["txn_id"].fillna(report["customer_id"])))
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_a_consistent_ledger_has_no_issues(workers):
+    result = audit.audit_frames(_txns(CLEAN), CUSTOMERS, store={"C1": 55.0, "C2": 40.0}, workers=workers)
+    assert (result["rows"], result["customers"], result["mismatched_rows"]) == (4, 2, 0)
+    assert result["issues"].empty
+    assert list(result["issues"].columns) == audit.ISSUE_COLUMNS
+
+
+def test_a_tampered_balance_is_reported_where_it_breaks():
+    rows = [list(r) for r in CLEAN]
+    rows[2][4] = 60.0  # should be 50; TXN000004 (55) is back on the chain
+    result = audit.audit_frames(_txns(rows), CUSTOMERS)
+    assert _issues(_txns(rows)) == [("balance_drift", "TXN000003"), ("chain_break", "TXN000003")]
+    assert result["mismatched_rows"] == 1
+
+    report = result["issues"].set_index("issue")
+    assert (report.loc["chain_break", "expected"], report.loc["chain_break", "stored"]) == (50.0, 60.0)
+    assert report.loc["chain_break", "difference"] == pytest.approx(10.0)
+
+
+def test_rows_are_chained_in_txn_id_order_not_row_order():
+    assert _issues(_txns(CLEAN[::-1])) == []
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_other_findings(workers):
+    rows = CLEAN + [
+        ("TXN000004", "C2", "DEPOSIT", 1.0, 41.0),
+        ("TXN000005", "C2", "WITHDRAW", 100.0, -59.0),
+        ("TXN000006", "C9", "DEPOSIT", 1.0, 1.0),
+    ]
+    assert _issues(_txns(rows), store={"C1": 99.0, "C2": -59.0}, workers=workers) == [
+        ("duplicate_txn_id", "TXN000004"),
+        ("duplicate_txn_id", "TXN000004"),
+        ("negative_balance", "TXN000005"),
+        ("store_drift", "C1"),
+        ("unknown_customer", "TXN000006"),
+    ]
+
+
+def test_the_carry_forward_starts_the_chain_after_archived_history():
+    rows = [("TXN000010", "C1", "DEPOSIT", 5.0, 135.0)]
+    carry = {"C1": {"total_deposit": 40.0, "total_withdraw": 10.0}}
+    assert _issues(_txns(rows), carry=carry) == []
+    assert _issues(_txns(rows)) == [("balance_drift", "TXN000010"), ("chain_break", "TXN000010")]
+
+
+def test_the_live_ledger_audits_clean():
+    result = audit.run_audit()
+    assert result["issues"].empty, result["issues"]
+    assert result["rows"] > 0 and result["seconds"] >= 0
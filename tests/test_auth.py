@@ -0,0 +1,109 @@
+# tests/test_auth.py
+
+import pytest
+
+from src import auth, banking, journal
+from src.config import SHEET_LOGIN
+from src.excel_db import data_version, overwrite_sheet, read_sheet
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    """Start from an empty index; `mode` picks PASSWORD_VERIFIER."""
+    def reset(mode="plain"):
+        monkeypatch.setattr(auth, "PASSWORD_VERIFIER", mode)
+        monkeypatch.setattr(auth, "_index", {})
+        monkeypatch.setattr(auth, "_unconfirmed", set())
+        monkeypatch.setattr(auth, "_index_version", None)
+        monkeypatch.setattr(auth, "_index_digest", None)
+    return reset
+
+
+@pytest.fixture
+def login_sheet():
+    """The login sheet, restored after the test."""
+    original = read_sheet(SHEET_LOGIN)
+    yield original.copy()
+    overwrite_sheet(SHEET_LOGIN, original)
+
+
+@pytest.fixture
+def derivations(monkeypatch):
+    """Counts PBKDF2 verifiers derived by the index."""
+    calls = []
+    make = auth.make_password_hash
+    monkeypatch.setattr(auth, "make_password_hash", lambda password: calls.append(password) or make(password, 1000))
+    return calls
+
+
+def _post_and_compact(customer_id="CUST001"):
+    banking.deposit(customer_id, 1, "test")
+    journal.compact()
+
+
+def test_plain_logins(fresh_index):
+    fresh_index("plain")
+    assert auth.validate_login("rahul01", "rahul123") == (True, "CUST001")
+    assert auth.validate_login(" rahul01 ", "rahul123 ") == (True, "CUST001")
+    assert auth.validate_login("rahul01", "wrong") == (False, None)
+    assert auth.validate_login("nobody", "rahul123") == (False, None)
+    assert auth.validate_login("", "") == (False, None)
+
+
+def test_transaction_writes_do_not_rebuild_the_index(fresh_index):
+    fresh_index("plain")
+    auth.validate_login("rahul01", "rahul123")
+    index, version = auth._index, data_version(SHEET_LOGIN)
+
+    _post_and_compact()
+    assert data_version(SHEET_LOGIN) != version
+    assert auth.validate_login("anita02", "anita123") == (True, "CUST002")
+    assert auth._index is index
+
+
+def test_pbkdf2_keeps_only_salted_hashes(fresh_index, derivations):
+    fresh_index("pbkdf2")
+    assert auth.validate_login("rahul01", "rahul123") == (True, "CUST001")
+    verifier, _ = auth._index["rahul01"]
+    assert verifier.startswith(auth.HASH_PREFIX + "$")
+    assert all(v is None or v.startswith(auth.HASH_PREFIX + "$") for v, _ in auth._index.values())
+
+    assert auth.validate_login("rahul01", "rahul123") == (True, "CUST001")
+    assert auth.validate_login("rahul01", "wrong") == (False, None)
+    assert derivations == ["rahul123"]
+
+
+def test_pbkdf2_verifiers_survive_transaction_writes(fresh_index, derivations):
+    fresh_index("pbkdf2")
+    auth.validate_login("rahul01", "rahul123")
+    verifier = auth._index["rahul01"][0]
+
+    _post_and_compact()
+    assert auth.validate_login("rahul01", "rahul123") == (True, "CUST001")
+    assert auth._index["rahul01"][0] == verifier
+    assert "rahul01" not in auth._unconfirmed
+    assert derivations == ["rahul123"]
+
+
+def test_a_password_change_in_the_sheet_is_picked_up(fresh_index, derivations, login_sheet):
+    fresh_index("pbkdf2")
+    assert auth.validate_login("rahul01", "rahul123")[0]
+    assert auth.validate_login("anita02", "anita123")[0]
+    anita = auth._index["anita02"][0]
+
+    login_sheet.loc[login_sheet["user_id"] == "rahul01", "password"] = "changed456"
+    overwrite_sheet(SHEET_LOGIN, login_sheet)
+
+    assert auth.validate_login("rahul01", "rahul123") == (False, None)
+    assert auth.validate_login("rahul01", "changed456") == (True, "CUST001")
+    # unchanged users are checked against the sheet once and keep their verifier
+    assert auth.validate_login("anita02", "anita123") == (True, "CUST002")
+    assert auth._index["anita02"][0] == anita
+    assert derivations == ["rahul123", "anita123", "changed456"]
+
+
+def test_users_removed_from_the_sheet_cannot_log_in(fresh_index, login_sheet):
+    fresh_index("plain")
+    assert auth.validate_login("rohit03", "rohit123")[0]
+    overwrite_sheet(SHEET_LOGIN, login_sheet[login_sheet["user_id"] != "rohit03"])
+    assert auth.validate_login("rohit03", "rohit123") == (False, None)
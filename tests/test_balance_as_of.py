@@ -0,0 +1,95 @@
+# tests/test_balance_as_of.py
+
+import os
+
+import pandas as pd
+import pytest
+
+from src import banking, checkpoints
+from src.config import CHECKPOINT_FILE_PATH, SHEET_CUSTOMERS
+from src.excel_db import read_sheet
+
+
+def _customers():
+    return read_sheet(SHEET_CUSTOMERS)["customer_id"].astype(str).tolist()
+
+
+def test_no_checkpoint_store_by_default():
+    assert not os.path.exists(CHECKPOINT_FILE_PATH)
+    assert checkpoints.base_at("CUST001", pd.Timestamp.now(), 25000.0) == (25000.0, None)
+
+
+@pytest.mark.parametrize("customer_id", _customers())
+def test_balance_as_of_without_checkpoints_matches_calculate_balance(customer_id):
+    current = banking.calculate_balance(customer_id)["current_balance"]
+    assert banking.balance_as_of(customer_id, pd.Timestamp.now()) == pytest.approx(current)
+
+
+def test_period_balances_without_checkpoints():
+    now = pd.Timestamp.now()
+    period = banking.LedgerSnapshot().period_balances("CUST001", now - pd.Timedelta(days=30), now)
+    assert period["closing_balance"] == pytest.approx(banking.calculate_balance("CUST001")["current_balance"])
+    assert period["closing_balance"] == pytest.approx(
+        period["opening_balance"] + period["total_deposit"] - period["total_withdraw"]
+    )
+
+
+def test_between_accepts_unrepresentable_bounds():
+    everything = banking.get_transactions_between("CUST001", None, None)
+    assert len(banking.get_transactions_between("CUST001", pd.Timestamp.min, pd.Timestamp.max)) == len(everything)
+    assert len(banking.get_transactions_between("CUST001", "1500-01-01", "2500-01-01")) == len(everything)
+
+
+def _expected(customer_id, ts):
+    """Balance at ts straight from the transactions, no checkpoints involved."""
+    opening = float(banking.calculate_balance(customer_id)["opening_balance"])
+    return opening + checkpoints.net_amount(banking.get_transactions_between(customer_id, None, ts))
+
+
+def _moments(customer_id):
+    dates = banking.get_transactions_between(customer_id, None, None)["txn_date"]
+    month_ends = pd.date_range("2025-12-01", "2027-01-01", freq="MS") - pd.Timedelta(1, "us")
+    return sorted({*dates, *(dates - pd.Timedelta(1, "us")), *month_ends})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_FILE_PATH", str(tmp_path / "checkpoints.json"))
+    monkeypatch.setitem(checkpoints._state, "key", None)
+    monkeypatch.setitem(checkpoints._state, "data", None)
+    return tmp_path / "checkpoints.json"
+
+
+def test_closing_periods_writes_one_checkpoint_per_active_period(store):
+    assert checkpoints.close_periods(now=pd.Timestamp("2026-03-10")) >= 2
+    data = checkpoints._read_store()
+    assert (data["freq"], data["through"], data["through_end"]) == ("M", "2026-02", "2026-02-28 23:59:59")
+    january = _expected("CUST001", pd.Timestamp("2026-01-31 23:59:59"))
+    assert data["accounts"]["CUST001"][0] == ["2026-01", pytest.approx(january)]
+    assert checkpoints.close_periods(now=pd.Timestamp("2026-03-31")) == 0  # nothing new ended
+    assert checkpoints.close_periods(now=pd.Timestamp("2026-04-01")) == 1
+
+
+@pytest.mark.parametrize("customer_id", _customers())
+def test_checkpointed_balances_match_the_full_scan(store, customer_id):
+    checkpoints.close_periods()
+    assert store.exists()
+    for ts in _moments(customer_id):
+        assert banking.balance_as_of(customer_id, ts) == pytest.approx(_expected(customer_id, ts)), ts
+
+    start, end = pd.Timestamp("2026-01-01"), pd.Timestamp.now()
+    period = banking.LedgerSnapshot().period_balances(customer_id, start, end)
+    assert period["opening_balance"] == pytest.approx(_expected(customer_id, start - pd.Timedelta(1, "us")))
+    assert period["closing_balance"] == pytest.approx(_expected(customer_id, end))
+
+
+def test_postings_into_closed_periods_patch_the_checkpoints(store):
+    checkpoints.close_periods()
+    late = {"customer_id": "CUST002", "txn_date": "2026-03-15 10:00:00", "txn_type": "DEPOSIT",
+            "amount": 75.0, "reason": "late import"}
+    banking.write_rows([late])
+
+    marks = dict(checkpoints._read_store()["accounts"]["CUST002"])
+    assert marks["2026-03"] == pytest.approx(_expected("CUST002", pd.Timestamp("2026-03-31 23:59:59")))
+    for ts in _moments("CUST002"):
+        assert banking.balance_as_of("CUST002", ts) == pytest.approx(_expected("CUST002", ts)), ts
@@ -0,0 +1,84 @@
+# tests/test_balances.py
+
+import json
+import os
+
+import pytest
+
+from src import balances, banking
+from src.config import BALANCES_FILE_PATH, SHEET_CUSTOMERS
+from src.excel_db import read_sheet
+
+
+def _log():
+    return balances._log_path(balances._read_store())
+
+
+def _log_lines():
+    with open(_log(), "rb") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _fresh_load():
+    """The store as another process would load it."""
+    _, data, _ = balances._load()
+    return data
+
+
+def _snapshot_key():
+    st = os.stat(BALANCES_FILE_PATH)
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def test_a_posting_appends_only_the_changed_entry():
+    banking.calculate_balance("CUST001")  # make sure the store exists
+    snapshot = _snapshot_key()
+    before = len(_log_lines()) if os.path.exists(_log()) else 0
+
+    row = banking.deposit("CUST002", 7, "balance store test")
+
+    assert _snapshot_key() == snapshot
+    lines = _log_lines()
+    assert len(lines) == before + 1
+    assert list(lines[-1]["accounts"]) == ["CUST002"]
+    assert lines[-1]["accounts"]["CUST002"]["last_txn_id"] == row["txn_id"]
+    assert _fresh_load() == balances._read_store()
+
+
+def test_lines_appended_by_another_process_are_picked_up():
+    entry = balances.get_balance("CUST003")
+    changed = {**entry, "current_balance": entry["current_balance"] + 1, "version": entry["version"] + 1}
+    with open(_log(), "ab") as f:
+        f.write((json.dumps({"high_water": 0, "accounts": {"CUST003": changed}}) + "\n").encode("utf-8"))
+    assert balances.get_balance("CUST003") == changed
+    balances.rebuild_balances()
+
+
+def test_a_torn_line_is_skipped():
+    with open(_log(), "ab") as f:
+        f.write(b'{"high_water": 99999, "accounts": {"CUST001": {"current_ba')
+    banking.deposit("CUST001", 1, "after a crash")
+    assert _fresh_load() == balances._read_store()
+    assert _fresh_load()["high_water"] < 99999
+
+
+def test_the_log_is_folded_into_a_new_snapshot(monkeypatch):
+    banking.calculate_balance("CUST001")
+    old_log = _log()
+    gen = balances._read_store().get("log_gen", 0)
+    monkeypatch.setattr(balances, "BALANCES_LOG_MAX_BYTES", 1)
+
+    banking.withdraw("CUST001", 1, "fold test")
+
+    data = balances._read_store()
+    assert data["log_gen"] == gen + 1
+    assert not os.path.exists(old_log)
+    assert os.path.getsize(_log()) == 0
+    assert _fresh_load() == data
+
+
+@pytest.mark.parametrize("customer_id", read_sheet(SHEET_CUSTOMERS)["customer_id"].astype(str).tolist())
+def test_the_store_matches_a_rebuild(customer_id):
+    stored = balances.get_balance(customer_id)
+    balances.rebuild_balances()
+    assert balances.get_balance(customer_id) == pytest.approx(stored)
@@ -0,0 +1,78 @@
+# tests/test_bulk_import.py
+
+import pandas as pd
+import pytest
+
+from src import banking, bulk, excel_db
+from src.config import SHEET_TXNS
+from src.excel_db import read_sheet
+
+
+@pytest.fixture
+def customer_id():
+    return str(read_sheet(SHEET_TXNS)["customer_id"].iloc[-1])
+
+
+def _import(tmp_path, rows, chunk_rows):
+    src = tmp_path / "in.csv"
+    pd.DataFrame(rows, columns=["customer_id", "txn_date", "txn_type", "amount"]).to_csv(src, index=False)
+    rejects = tmp_path / "rejects.csv"
+    summary = bulk.import_transactions(str(src), chunk_rows=chunk_rows, rejects=str(rejects))
+    return summary, pd.read_csv(rejects, dtype=str, keep_default_na=False)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 100])
+def test_rows_dated_before_the_latest_transaction_are_rejected(tmp_path, customer_id, chunk_rows):
+    latest = banking.get_transactions_between(customer_id, None, None)["txn_date"].max()
+    at = lambda minutes: (latest + pd.Timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+    before = banking.calculate_balance(customer_id)["current_balance"]
+    summary, rejects = _import(
+        tmp_path,
+        [
+            (customer_id, at(-60), "Deposit", "10"),  # before what is stored
+            (customer_id, at(2), "Deposit", "10"),
+            (customer_id, at(1), "Deposit", "10"),  # before an earlier row of the file
+            (customer_id, at(3), "Deposit", "10"),
+        ],
+        chunk_rows,
+    )
+    assert (summary["imported"], summary["rejected"]) == (2, 2)
+    assert rejects["line"].tolist() == ["2", "4"]
+    assert set(rejects["error"]) == {bulk.MSG_OUT_OF_ORDER}
+    assert banking.calculate_balance(customer_id)["current_balance"] == pytest.approx(before + 20)
+    txns = banking.get_transactions_between(customer_id, None, None).sort_values("txn_date")
+    assert txns["balance_after_txn"].iloc[-1] == pytest.approx(before + 20)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 100])
+def test_a_rejected_row_does_not_reset_the_order_check(tmp_path, customer_id, chunk_rows):
+    latest = banking.get_transactions_between(customer_id, None, None)["txn_date"].max()
+    at = lambda minutes: (latest + pd.Timedelta(minutes=minutes)).strftime("%Y-%m-%d %H:%M:%S")
+    before = banking.calculate_balance(customer_id)["current_balance"]
+    summary, rejects = _import(
+        tmp_path,
+        [
+            (customer_id, at(10), "Deposit", "10"),
+            (customer_id, at(11), "Deposit", "-5"),  # rejected: bad amount
+            (customer_id, at(5), "Deposit", "7"),  # still before the first row
+        ],
+        chunk_rows,
+    )
+    assert (summary["imported"], summary["rejected"]) == (1, 2)
+    assert rejects["error"].tolist() == [banking.MSG_BAD_AMOUNT, bulk.MSG_OUT_OF_ORDER]
+    assert banking.calculate_balance(customer_id)["current_balance"] == pytest.approx(before + 10)
+
+
+def test_excel_storage_refuses_imports_past_its_row_limit(tmp_path, customer_id, monkeypatch):
+    stored = len(read_sheet(SHEET_TXNS))
+    monkeypatch.setattr(excel_db, "BULK_EXCEL_MAX_ROWS", stored + 1)
+    assert excel_db.bulk_capacity(SHEET_TXNS) == 1
+    before = banking.calculate_balance(customer_id)["current_balance"]
+    with pytest.raises(ValueError, match="do not fit"):
+        _import(tmp_path, [(customer_id, "", "Deposit", "10")] * 2, 100)
+    assert banking.calculate_balance(customer_id)["current_balance"] == before
+
+
+def test_undated_rejects_keep_a_blank_date(tmp_path, customer_id):
+    _, rejects = _import(tmp_path, [(customer_id, "", "Deposit", "-5")], 100)
+    assert rejects["txn_date"].tolist() == [""]
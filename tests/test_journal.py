@@ -0,0 +1,86 @@
+# tests/test_journal.py
+
+import logging
+
+import pytest
+
+from src import banking, journal, metrics
+from src.config import SHEET_TXNS
+from src.excel_db import append_rows, find_rows
+from src.locks import lock, LEDGER
+
+
+CUSTOMER = "CUST002"
+
+
+def _stored(txn_id):
+    return find_rows(SHEET_TXNS, {"txn_id": txn_id})
+
+
+def test_postings_are_read_from_the_journal_until_compacted():
+    journal.compact()
+    row = banking.deposit(CUSTOMER, 5, "journal test")
+    txn_id = row["txn_id"]
+
+    assert [r["txn_id"] for r in journal.pending_entries()] == [txn_id]
+    assert _stored(txn_id).empty
+    assert (journal.stored_with_journal(CUSTOMER)["txn_id"] == txn_id).sum() == 1
+
+    assert journal.compact() == 1
+    assert journal.pending_entries() == []
+    assert len(_stored(txn_id)) == 1
+    assert (journal.stored_with_journal(CUSTOMER)["txn_id"] == txn_id).sum() == 1
+
+
+def test_rows_left_in_both_places_by_a_crash_are_counted_once():
+    journal.compact()
+    txn_id = banking.deposit(CUSTOMER, 5, "journal test")["txn_id"]
+    # compaction wrote the rows but died before truncating the journal
+    with lock(LEDGER):
+        append_rows(SHEET_TXNS, journal.pending_entries())
+
+    assert (journal.stored_with_journal(CUSTOMER)["txn_id"] == txn_id).sum() == 1
+    assert journal.compact() == 0
+    assert journal.pending_entries() == []
+    assert len(_stored(txn_id)) == 1
+
+
+class _Stop:
+    """Stands in for the compactor's stop event: records waits, stops after `runs`."""
+
+    def __init__(self, runs):
+        self.runs, self.waits = runs, []
+
+    def wait(self, timeout):
+        self.waits.append(timeout)
+        return len(self.waits) > self.runs
+
+
+def test_compactor_logs_counts_and_backs_off(tmp_path, monkeypatch, caplog):
+    pending = tmp_path / "journal"
+    pending.write_text("{}\n")
+    monkeypatch.setattr(journal, "JOURNAL_FILE_PATH", str(pending))
+    monkeypatch.setattr(journal, "JOURNAL_COMPACT_MAX_BACKOFF", 35)
+    monkeypatch.setattr(metrics, "_enabled", True)
+    metrics.reset()
+
+    outcomes = iter([OSError("workbook locked")] * 4 + [None])
+
+    def compact():
+        error = next(outcomes)
+        if error is not None:
+            raise error
+
+    stop = _Stop(runs=5)
+    monkeypatch.setattr(journal, "compact", compact)
+    monkeypatch.setattr(journal, "_stop", stop)
+    with caplog.at_level(logging.ERROR, logger=journal.__name__):
+        journal._compact_loop(10)
+
+    # four failures double the wait up to the cap; a success resets it
+    assert stop.waits == [10, 20, 35, 35, 35, 10]
+    assert len(caplog.records) == 4
+    assert "workbook locked" in caplog.text
+    failures = [c for c in metrics.snapshot()["counters"] if c["name"] == "sbp_journal_compact_failures_total"]
+    assert failures == [{"name": "sbp_journal_compact_failures_total", "labels": {}, "value": 4}]
+    metrics.reset()
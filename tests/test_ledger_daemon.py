@@ -0,0 +1,77 @@
+# tests/test_ledger_daemon.py
+
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+from src import banking
+from src.config import SHEET_TXNS
+from src.excel_db import read_sheet
+from src.ledger_client import LedgerClient, LedgerServerError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("daemon") / "ledger.sock")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.cli", "serve", "--socket", path],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    client = LedgerClient(path)
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            client.ping()
+            break
+        except LedgerServerError:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                proc.kill()
+                pytest.fail(f"ledger daemon did not start: {proc.stderr.read().decode()}")
+            time.sleep(0.1)
+    yield client
+    client.close()
+    proc.terminate()
+    proc.wait(timeout=30)
+
+
+@pytest.fixture
+def customer_id():
+    return str(read_sheet(SHEET_TXNS)["customer_id"].iloc[0])
+
+
+def test_round_trip_matches_the_local_ledger(client, customer_id):
+    assert client.balance(customer_id) == banking.calculate_balance(customer_id)
+    remote = client.transactions(customer_id)
+    local = banking.get_transactions(customer_id)
+    assert remote["txn_id"].tolist() == local["txn_id"].tolist()
+    assert remote["txn_date"].tolist() == local["txn_date"].tolist()
+
+
+def test_open_bounds_mean_unbounded(client, customer_id):
+    everything = banking.get_transactions_between(customer_id, None, None)
+    assert not everything.empty
+    middle = everything["txn_date"].sort_values().iloc[len(everything) // 2]
+
+    assert client.between(customer_id, None, None)["txn_id"].tolist() == everything["txn_id"].tolist()
+    for start, end in ((None, middle), (middle, None)):
+        local = banking.get_transactions_between(customer_id, start, end)
+        assert client.between(customer_id, start, end)["txn_id"].tolist() == local["txn_id"].tolist()
+
+
+def test_balance_as_of_without_a_bound_is_the_current_balance(client, customer_id):
+    current = banking.calculate_balance(customer_id)["current_balance"]
+    assert client.balance_as_of(customer_id, None) == pytest.approx(current)
+    assert banking.balance_as_of(customer_id, None) == pytest.approx(current)
+    latest = banking.get_transactions_between(customer_id, None, None)["txn_date"].max()
+    assert client.balance_as_of(customer_id, latest + pd.Timedelta(days=1)) == pytest.approx(current)
+
+
+def test_server_errors_come_back_as_value_errors(client):
+    with pytest.raises(ValueError, match="Customer not found"):
+        client.customer("NO-SUCH-CUSTOMER")
@@ -0,0 +1,69 @@
+# tests/test_ledger_snapshot.py
+
+import pytest
+
+from src import banking, journal, sequence
+from src.banking import LedgerSnapshot
+
+
+CUSTOMER = "CUST001"
+
+
+def _balance():
+    return LedgerSnapshot().calculate_balance(CUSTOMER)["current_balance"]
+
+
+def test_staged_postings_are_written_together_on_exit():
+    before = _balance()
+    with LedgerSnapshot() as ledger:
+        first = ledger.deposit(CUSTOMER, 100, " salary ")
+        second = ledger.withdraw(CUSTOMER, 30, "rent")
+        assert ledger.calculate_balance(CUSTOMER)["current_balance"] == pytest.approx(before + 70)
+        assert _balance() == pytest.approx(before)  # nothing written yet
+        assert first["txn_id"] is None
+
+    assert sequence.txn_number(second["txn_id"]) == sequence.txn_number(first["txn_id"]) + 1
+    assert first["reason"] == "salary"
+    assert (first["balance_after_txn"], second["balance_after_txn"]) == pytest.approx((before + 100, before + 70))
+    assert _balance() == pytest.approx(before + 70)
+    ids = {r["txn_id"] for r in journal.pending_entries()} | set(banking.get_transactions(CUSTOMER)["txn_id"])
+    assert {first["txn_id"], second["txn_id"]} <= ids
+
+
+def test_an_exception_discards_the_staged_postings():
+    before = _balance()
+    with pytest.raises(RuntimeError):
+        with LedgerSnapshot() as ledger:
+            ledger.deposit(CUSTOMER, 50, "never written")
+            raise RuntimeError("page failed")
+    assert _balance() == pytest.approx(before)
+
+
+def test_each_customer_is_loaded_once_per_snapshot(monkeypatch):
+    loads = []
+    load = banking._load_transactions
+    monkeypatch.setattr(banking, "_load_transactions", lambda cid: loads.append(cid) or load(cid))
+
+    ledger = LedgerSnapshot()
+    first = ledger.get_transactions(CUSTOMER)
+    first["amount"] = -1.0  # callers get their own copy
+    assert (ledger.get_transactions(CUSTOMER)["amount"] != -1.0).all()
+    assert loads == [CUSTOMER]
+
+    row = ledger.deposit(CUSTOMER, 5, "reload after commit")
+    ledger.commit()
+    assert row["txn_id"] in set(ledger.get_transactions(CUSTOMER)["txn_id"])
+    assert loads == [CUSTOMER, CUSTOMER]
+
+
+def test_postings_from_another_session_are_respected():
+    before = _balance()
+    slow, fast = LedgerSnapshot(), LedgerSnapshot()
+    late = slow.deposit(CUSTOMER, 10, "staged first")
+    fast.deposit(CUSTOMER, 20, "committed first")
+    fast.commit()
+    slow.commit()
+
+    # staged against the old balance, chained onto the newer one when written
+    assert late["balance_after_txn"] == pytest.approx(before + 30)
+    assert _balance() == pytest.approx(before + 30)
@@ -0,0 +1,116 @@
+# tests/test_locks.py
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src import locks
+from src.locks import lock
+
+
+def _in_thread(fn):
+    t = threading.Thread(target=fn)
+    t.start()
+    return t
+
+
+def test_locks_are_reentrant_within_a_thread():
+    with lock("test-a"):
+        with lock("test-a"):
+            assert locks.holds("test-a") == "exclusive"
+        assert locks.holds("test-a") == "exclusive"
+    assert locks.holds("test-a") is None
+    assert not locks.holding_any()
+
+
+def test_a_shared_holder_cannot_upgrade():
+    with lock("test-a", shared=True):
+        with lock("test-a", shared=True):
+            pass
+        with pytest.raises(RuntimeError, match="upgrade"):
+            with lock("test-a"):
+                pass
+
+
+def test_exclusive_waits_for_the_holder():
+    order, held = [], threading.Event()
+
+    def other():
+        held.wait()
+        with lock("test-b"):
+            order.append("other")
+
+    t = _in_thread(other)
+    with lock("test-b"):
+        held.set()
+        time.sleep(0.1)
+        order.append("first")
+    t.join()
+    assert order == ["first", "other"]
+
+
+def test_shared_holders_do_not_block_each_other():
+    inside, release = threading.Barrier(2, timeout=5), threading.Event()
+
+    def reader():
+        with lock("test-c", shared=True):
+            inside.wait()
+            release.wait()
+
+    t = _in_thread(reader)
+    with lock("test-c", shared=True):
+        inside.wait()  # both readers hold the lock at once
+    release.set()
+    t.join()
+
+
+def test_other_processes_are_excluded():
+    pytest.importorskip("fcntl")
+    probe = (
+        "import fcntl, os, sys\n"
+        "fd = os.open(sys.argv[1], os.O_RDWR)\n"
+        "try:\n"
+        "    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+        "except BlockingIOError:\n"
+        "    sys.exit(3)\n"
+    )
+    with lock("test-d"):
+        busy = subprocess.run([sys.executable, "-c", probe, locks.lock_path("test-d")])
+    free = subprocess.run([sys.executable, "-c", probe, locks.lock_path("test-d")])
+    assert (busy.returncode, free.returncode) == (3, 0)
+
+
+def test_customer_stripes_are_taken_in_a_fixed_order():
+    customers = [f"CUST{i:03d}" for i in range(40, 0, -1)]
+    with locks.customer_locks(customers):
+        taken = [name for name in locks._held_locks() if name.startswith("stripe-")]
+    assert taken == sorted({locks.stripe_for(c) for c in customers})
+    assert locks.stripe_for("CUST001") == locks.stripe_for("CUST001")
+
+
+def test_opposite_orders_do_not_deadlock():
+    a, b = ["CUST001", "CUST002", "CUST003"], ["CUST003", "CUST002", "CUST001"]
+    done = []
+
+    def run(customers):
+        for _ in range(50):
+            with locks.customer_locks(customers):
+                pass
+        done.append(True)
+
+    threads = [_in_thread(lambda: run(a)), _in_thread(lambda: run(b))]
+    for t in threads:
+        t.join(timeout=10)
+    assert done == [True, True]
+
+
+def test_waits_and_holds_are_recorded():
+    locks.reset_lock_stats()
+    with lock("test-e"):
+        pass
+    stats = locks.lock_stats()["test"]
+    assert stats["acquired"] == 1
+    assert stats["hold_max"] >= 0
@@ -0,0 +1,93 @@
+# tests/test_metrics.py
+
+import pytest
+
+from src import banking, metrics
+
+
+@pytest.fixture
+def on(monkeypatch):
+    """Metrics enabled (without the background exporter) and empty."""
+    monkeypatch.setattr(metrics, "_enabled", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def _counter(name, **labels):
+    for c in metrics.snapshot()["counters"]:
+        if c["name"] == name and c["labels"] == {k: str(v) for k, v in labels.items()}:
+            return c["value"]
+    return None
+
+
+def test_disabled_hooks_record_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", False)
+    metrics.reset()
+    metrics.inc("sbp_test_total")
+    metrics.observe("sbp_test_seconds", 1.0)
+    metrics.set_gauge("sbp_test_depth", 3)
+    assert metrics.timer("sbp_test_seconds") is metrics.timer("sbp_other_seconds")
+    assert metrics.timed("sbp_test_seconds")(lambda x: x + 1)(1) == 2
+    assert metrics.snapshot() == {"histograms": [], "counters": [], "gauges": []}
+
+
+def test_counters_gauges_and_histograms(on):
+    metrics.inc("sbp_test_total", op="a")
+    metrics.inc("sbp_test_total", 2, op="a")
+    metrics.inc("sbp_test_total", op="b")
+    metrics.set_gauge("sbp_test_depth", 5)
+    metrics.set_gauge("sbp_test_depth", 2)
+    for v in (0.001, 0.002, 0.003, 0.2):
+        metrics.observe("sbp_test_seconds", v)
+
+    assert _counter("sbp_test_total", op="a") == 3
+    assert _counter("sbp_test_total", op="b") == 1
+    snap = metrics.snapshot()
+    assert snap["gauges"] == [{"name": "sbp_test_depth", "labels": {}, "value": 2}]
+    (h,) = snap["histograms"]
+    assert (h["count"], h["sum"]) == (4, pytest.approx(0.206))
+    assert 0.001 <= h["p50"] <= 0.0025
+    assert 0.1 <= h["p99"] <= 0.25
+
+
+def test_timed_calls_record_latency_and_errors(on):
+    @metrics.timed("sbp_test_seconds", op="work")
+    def work(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return "done"
+
+    assert work() == "done"
+    with pytest.raises(ValueError):
+        work(fail=True)
+
+    (h,) = metrics.snapshot()["histograms"]
+    assert (h["labels"], h["count"]) == ({"op": "work"}, 2)
+    assert _counter("sbp_errors_total", metric="sbp_test_seconds", op="work") == 1
+
+
+def test_banking_calls_are_instrumented(on):
+    banking.calculate_balance("CUST001")
+    names = {(h["name"], h["labels"].get("op")) for h in metrics.snapshot()["histograms"]}
+    assert ("sbp_banking_seconds", "calculate_balance") in names
+
+
+def test_prometheus_text_and_export(on, tmp_path):
+    metrics.observe("sbp_storage_seconds", 0.003, op="read_sheet")
+    metrics.inc("sbp_storage_bytes_read_total", 1024, op='say "hi"')
+    text = metrics.render_prometheus()
+
+    assert "# HELP sbp_storage_seconds " in text
+    assert "# TYPE sbp_storage_seconds histogram" in text
+    assert 'sbp_storage_seconds_bucket{op="read_sheet",le="0.0025"} 0' in text
+    assert 'sbp_storage_seconds_bucket{op="read_sheet",le="0.005"} 1' in text
+    assert 'sbp_storage_seconds_bucket{op="read_sheet",le="+Inf"} 1' in text
+    assert 'sbp_storage_seconds_count{op="read_sheet"} 1' in text
+    assert "# TYPE sbp_storage_bytes_read_total counter" in text
+    assert 'sbp_storage_bytes_read_total{op="say \\"hi\\""} 1024' in text
+
+    path = metrics.export(str(tmp_path / "sbp.prom"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == text
+    assert list(tmp_path.iterdir()) == [tmp_path / "sbp.prom"]
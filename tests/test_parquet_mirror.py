@@ -0,0 +1,81 @@
+# tests/test_parquet_mirror.py
+
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src import banking, parquet_mirror
+from src.config import SHEET_TXNS
+from src.excel_db import find_rows, read_sheet
+from src.journal import merge_with_journal
+
+
+@pytest.fixture
+def mirror(tmp_path, monkeypatch):
+    monkeypatch.setattr(parquet_mirror, "TXN_READ_PATH", "parquet")
+    monkeypatch.setattr(parquet_mirror, "TXN_MIRROR_DIR", str(tmp_path / "mirror"))
+    monkeypatch.setattr(parquet_mirror, "TXN_MIRROR_MAX_FILES", 2)
+    parquet_mirror.rebuild_mirror()
+    return str(tmp_path / "mirror")
+
+
+@pytest.fixture
+def customer_id():
+    return str(read_sheet(SHEET_TXNS)["customer_id"].iloc[0])
+
+
+def _stored_ids(customer_id):
+    df = merge_with_journal(find_rows(SHEET_TXNS, {"customer_id": customer_id}), customer_id=customer_id)
+    return sorted(df["txn_id"].astype(str))
+
+
+def test_merged_partitions_hold_each_row_once(mirror, customer_id):
+    for _ in range(5):
+        banking.deposit(customer_id, 1, "test")
+
+    d = os.path.dirname(parquet_mirror._partition_dir(mirror, parquet_mirror.bucket_for(customer_id), "x"))
+    files = [f for month in os.listdir(d) for f in os.listdir(os.path.join(d, month)) if f.endswith(".parquet")]
+    assert any(f.startswith("merged-") for f in files)
+
+    ids = parquet_mirror.read_transactions(customer_id)["txn_id"].astype(str).tolist()
+    assert sorted(ids) == _stored_ids(customer_id)
+
+
+def test_readers_never_see_a_merge_half_done(mirror, customer_id):
+    seen, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            ids = parquet_mirror.read_transactions(customer_id)["txn_id"]
+            seen.append(len(ids) - ids.nunique())
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(12):
+            banking.deposit(customer_id, 1, "test")
+    finally:
+        done.set()
+        reader.join()
+    assert seen and set(seen) == {0}
+
+
+@pytest.mark.parametrize("txn_type", ["ALL", "DEPOSIT", "WITHDRAW"])
+def test_bounded_ranges_of_unindexed_customers_come_from_the_mirror(mirror, customer_id, txn_type, monkeypatch):
+    dates = banking.get_transactions_between(customer_id, None, None)["txn_date"]
+    start, end = dates.min(), dates.max()
+    banking.time_index.clear()
+
+    reads = []
+    read = parquet_mirror.read_transactions
+    monkeypatch.setattr(parquet_mirror, "read_transactions", lambda *a, **k: reads.append(a) or read(*a, **k))
+    got = banking.get_transactions_between(customer_id, start, end, txn_type)
+    assert reads == [(customer_id, start, end, txn_type)]
+
+    version = banking.index_version(banking.calculate_balance(customer_id))
+    expected = banking.time_index.between(customer_id, version, start, end, txn_type)
+    assert got["txn_id"].tolist() == expected["txn_id"].tolist()
+    assert got["balance_after_txn"].tolist() == expected["balance_after_txn"].tolist()
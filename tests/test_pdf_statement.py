@@ -0,0 +1,65 @@
+# tests/test_pdf_statement.py
+
+import re
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("reportlab")
+
+from src import pdf_statement
+from src.config import SHEET_CUSTOMERS, STREAM_FIRST_PAGE_ROWS, STREAM_ROWS_PER_PAGE
+from src.excel_db import read_sheet
+
+
+def _txns(n):
+    amounts = pd.Series([100.0 + i for i in range(n)])
+    return pd.DataFrame({
+        "txn_id": [f"TXN{i:06d}" for i in range(1, n + 1)],
+        "customer_id": "CUST001",
+        "txn_date": pd.date_range("2026-01-01", periods=n, freq="h"),
+        "txn_type": "DEPOSIT",
+        "amount": amounts,
+        "reason": "test",
+        "balance_after_txn": 1000.0 + amounts.cumsum(),
+    })
+
+
+def _pages(pdf: bytes) -> int:
+    return len(re.findall(rb"/Type\s*/Page(?!s)", pdf))
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 40, 10_000])
+def test_pages_are_cut_the_same_whatever_the_chunking(chunk_rows):
+    df = _txns(100)
+    pages = list(pdf_statement._iter_pages(pdf_statement.iter_chunks(df, chunk_rows), 14, 32))
+    assert [len(p) for p in pages] == [14, 32, 32, 22]
+    assert pd.concat(pages)["txn_id"].tolist() == df["txn_id"].tolist()
+
+
+def test_a_short_stream_is_one_page():
+    pages = list(pdf_statement._iter_pages(pdf_statement.iter_chunks(_txns(5), 2), 14, 32))
+    assert [len(p) for p in pages] == [5]
+
+
+@pytest.mark.parametrize("chunk_rows", [9, 10_000])
+def test_a_streamed_statement_has_one_page_per_table_page(chunk_rows):
+    n = STREAM_FIRST_PAGE_ROWS + 3 * STREAM_ROWS_PER_PAGE + 5
+    customer = read_sheet(SHEET_CUSTOMERS).iloc[0]
+    balances = {"opening_balance": 1000.0, "total_deposit": 0.0, "total_withdraw": 0.0, "current_balance": 1000.0}
+    sink = BytesIO()
+
+    written = pdf_statement.generate_statement_pdf_stream(
+        customer, pdf_statement.iter_chunks(_txns(n), chunk_rows), balances, sink
+    )
+
+    assert written == n
+    assert _pages(sink.getvalue()) == 5
+
+
+def test_an_empty_stream_still_renders():
+    customer = read_sheet(SHEET_CUSTOMERS).iloc[0]
+    sink = BytesIO()
+    assert pdf_statement.generate_statement_pdf_stream(customer, iter([]), {}, sink) == 0
+    assert _pages(sink.getvalue()) == 1
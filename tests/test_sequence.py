@@ -0,0 +1,54 @@
+# tests/test_sequence.py
+
+import os
+import threading
+
+import pandas as pd
+
+from src import sequence
+from src.journal import stored_with_journal
+
+
+def test_ids_are_formatted_and_parsed():
+    assert sequence.format_txn_id(42) == "TXN000042"
+    assert sequence.txn_number("TXN000042") == 42
+    assert sequence.txn_number(None) == 0
+    assert sequence.txn_number("OTHER7") == 0
+    df = pd.DataFrame({"txn_id": ["TXN000003", "X9", None, "TXN000011"]})
+    assert sequence.max_txn_number(df) == 11
+    assert sequence.max_txn_number(pd.DataFrame()) == 0
+
+
+def test_reservations_are_consecutive_and_persisted():
+    high = sequence.current_high_water()
+    ids = sequence.reserve_txn_ids(3)
+    assert [sequence.txn_number(i) for i in ids] == [high + 1, high + 2, high + 3]
+    assert sequence.current_high_water() == high + 3
+    assert sequence.reserve_txn_ids(0) == []
+    assert sequence.txn_number(sequence.next_txn_id()) == high + 4
+
+
+def test_threads_never_get_the_same_id():
+    got, threads = [], []
+    for _ in range(4):
+        t = threading.Thread(target=lambda: got.extend(sequence.reserve_txn_ids(25)))
+        threads.append(t)
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(got) == len(set(got)) == 100
+
+
+def test_a_missing_sequence_file_is_recovered_from_the_data(tmp_path, monkeypatch):
+    stored = sequence.max_txn_number(stored_with_journal())
+    monkeypatch.setattr(sequence, "SEQUENCE_FILE_PATH", str(tmp_path / "seq"))
+
+    assert sequence.current_high_water() == stored
+    assert os.path.exists(tmp_path / "seq")
+    assert sequence.txn_number(sequence.next_txn_id()) == stored + 1
+
+
+def test_reset_never_moves_backwards():
+    ahead = sequence.txn_number(sequence.reserve_txn_ids(5)[-1])
+    assert sequence.reset_sequence() == ahead
+    assert sequence.current_high_water() == ahead
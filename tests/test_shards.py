@@ -0,0 +1,82 @@
+# tests/test_shards.py
+
+import os
+
+import pytest
+
+from src import banking, journal, locks, shards
+from src.config import DATA_FILE_PATH, SHEET_TXNS
+from src.excel_db import get_backend, read_sheet
+
+
+@pytest.fixture
+def sharded():
+    """Transactions split over 4 shards for the test, folded back afterwards."""
+    before = len(read_sheet(SHEET_TXNS))
+    shards.reshard(4)
+    yield get_backend()
+    shards.reshard(0)
+    assert len(read_sheet(SHEET_TXNS)) >= before
+
+
+def _generation_dirs():
+    parent = os.path.dirname(DATA_FILE_PATH)
+    prefix = os.path.basename(DATA_FILE_PATH) + ".shards-"
+    return {name for name in os.listdir(parent) if name.startswith(prefix)}
+
+
+def test_each_customer_lives_in_one_shard(sharded):
+    engines = sharded.shards()
+    assert len(engines) == 4
+    all_txns = read_sheet(SHEET_TXNS)
+    for i, engine in enumerate(engines):
+        part = engine.read_sheet(SHEET_TXNS)
+        assert {shards.shard_of(cid, 4) for cid in part["customer_id"]} <= {i}
+    assert sum(len(e.read_sheet(SHEET_TXNS)) for e in engines) == len(all_txns)
+
+    for cid in all_txns["customer_id"].unique():
+        rows = sharded.find_rows(SHEET_TXNS, {"customer_id": cid})
+        assert sorted(rows["txn_id"]) == sorted(all_txns.loc[all_txns["customer_id"] == cid, "txn_id"])
+
+
+def test_compaction_writes_a_shard_under_its_own_lock_only(sharded, monkeypatch):
+    journal.compact()
+    row = banking.deposit("CUST001", 3, "shard test")
+    target = shards.shard_of("CUST001", 4)
+    engine = sharded.shards()[target]
+
+    held = []
+    append = engine.append_rows
+
+    def spy(sheet_name, rows):
+        held.append((locks.holds(locks.LEDGER), locks.holds(locks.DATA), locks.holds(engine.lock_name)))
+        return append(sheet_name, rows)
+
+    monkeypatch.setattr(engine, "append_rows", spy)
+    assert journal.compact() == 1
+    # postings (LEDGER) and reads of other shards are not blocked while the shard is written
+    assert held == [(None, "shared", "exclusive")]
+    assert journal.pending_entries() == []
+
+    for i, other in enumerate(sharded.shards()):
+        found = other.find_rows(SHEET_TXNS, {"txn_id": row["txn_id"]})
+        assert len(found) == (1 if i == target else 0)
+
+
+def test_reshard_keeps_the_replaced_generation_until_the_next_one(sharded):
+    first = _generation_dirs()
+    old_engines = sharded.shards()
+    total = len(read_sheet(SHEET_TXNS))
+
+    shards.reshard(2)
+    second = _generation_dirs()
+    assert first < second
+    # a reader still holding the old layout can finish its read
+    assert sum(len(e.read_sheet(SHEET_TXNS)) for e in old_engines) == total
+    assert len(read_sheet(SHEET_TXNS)) == total
+
+    shards.reshard(3)
+    third = _generation_dirs()
+    assert not first & third
+    assert (second - first) <= third
+    assert len(read_sheet(SHEET_TXNS)) == total
@@ -0,0 +1,82 @@
+# tests/test_statement_cache.py
+
+import os
+import stat
+from datetime import datetime
+
+import pytest
+
+from src.statement_cache import StatementCache, statement_key
+
+
+FROM, TO = datetime(2026, 1, 1), datetime(2026, 1, 31, 23, 59, 59)
+
+
+def _key(**changes):
+    args = {
+        "customer_id": "CUST001", "period_from": FROM, "period_to": TO, "txn_type": "ALL",
+        "data_version": ("TXN000010", 10, None, None), "customer": {"customer_name": "Rahul", "account_no": "1"},
+    }
+    args.update(changes)
+    return statement_key(**args)
+
+
+def test_the_key_changes_with_everything_the_statement_shows():
+    base = _key()
+    assert _key() == base
+    assert _key(customer={"account_no": "1", "customer_name": "Rahul"}) == base  # field order is irrelevant
+    for changed in (
+        _key(customer_id="CUST002"),
+        _key(period_to=datetime(2026, 2, 28)),
+        _key(txn_type="DEPOSIT"),
+        _key(data_version=("TXN000011", 11, None, None)),
+        _key(data_version=("TXN000010", 10, "2025-01-01", None)),
+        _key(customer={"customer_name": "Rahul K", "account_no": "1"}),
+    ):
+        assert changed != base
+
+
+def test_renders_once_per_key():
+    cache = StatementCache(1024, None, 0)
+    renders = []
+    render = lambda: renders.append(1) or b"%PDF-one"
+    assert cache.get_or_render("a", render) == b"%PDF-one"
+    assert cache.get_or_render("a", render) == b"%PDF-one"
+    assert len(renders) == 1
+    stats = cache.stats()
+    assert (stats["renders"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(0.5)
+
+
+def test_evicted_entries_spill_to_disk_and_come_back(tmp_path):
+    spill = tmp_path / "spill"
+    cache = StatementCache(10, str(spill), 1000)
+    cache.get_or_render("a", lambda: b"A" * 6)
+    cache.get_or_render("b", lambda: b"B" * 6)  # pushes "a" out of memory
+
+    assert os.listdir(spill) == ["a.pdf"]
+    assert stat.S_IMODE(os.stat(spill).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(spill / "a.pdf").st_mode) == 0o600
+
+    assert cache.get("a") == b"A" * 6
+    assert cache.stats()["disk_hits"] == 1
+    assert os.listdir(spill) == ["b.pdf"]  # promoted back, which spilled "b"
+
+
+def test_without_a_spill_dir_evicted_entries_are_gone():
+    cache = StatementCache(10, None, 0)
+    cache.get_or_render("a", lambda: b"A" * 6)
+    cache.get_or_render("b", lambda: b"B" * 6)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_the_disk_tier_is_trimmed_oldest_first(tmp_path):
+    spill = tmp_path / "spill"
+    cache = StatementCache(0, str(spill), 12)
+    for i, key in enumerate("abc"):
+        cache.get_or_render(key, lambda: b"x" * 6)
+        path = spill / f"{key}.pdf"
+        if path.exists():
+            os.utime(path, (1000 + i, 1000 + i))
+    assert sorted(os.listdir(spill)) == ["b.pdf", "c.pdf"]
@@ -0,0 +1,85 @@
+# tests/test_storage.py
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from src.config import DATA_FILE_PATH, SHEET_CUSTOMERS, SHEET_LOGIN, SHEET_TXNS
+from src.excel_db import open_engine
+from src.sqlite_db import migrate_workbook
+
+
+SHEETS = [SHEET_LOGIN, SHEET_CUSTOMERS, SHEET_TXNS]
+
+
+@pytest.fixture(params=["xlsx", "db"])
+def engine(request, tmp_path):
+    xlsx = tmp_path / "bank.xlsx"
+    shutil.copy(DATA_FILE_PATH, xlsx)
+    path = xlsx
+    if request.param == "db":
+        path = tmp_path / "bank.db"
+        migrate_workbook(str(xlsx), str(path))
+    return open_engine(str(path), lock_name="test-engine")
+
+
+@pytest.fixture
+def workbook():
+    return open_engine(DATA_FILE_PATH, lock_name="test-engine")
+
+
+def _same(a: pd.DataFrame, b: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(
+        a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False, check_categorical=False
+    )
+
+
+@pytest.mark.parametrize("sheet", SHEETS)
+def test_engines_read_the_same_typed_rows(engine, workbook, sheet):
+    _same(engine.read_sheet(sheet), workbook.read_sheet(sheet))
+
+
+def test_find_rows_matches_a_scan(engine):
+    txns = engine.read_sheet(SHEET_TXNS)
+    for cid in txns["customer_id"].unique():
+        expected = txns[txns["customer_id"] == cid].sort_values("txn_date", ascending=False)
+        got = engine.find_rows(SHEET_TXNS, {"customer_id": cid}, order_by="txn_date", descending=True)
+        # rows posted in the same second may come back in either order
+        assert got["txn_date"].tolist() == expected["txn_date"].tolist()
+        assert sorted(got["txn_id"]) == sorted(expected["txn_id"])
+    assert engine.find_rows(SHEET_LOGIN, {"user_id": "nobody"}).empty
+    assert engine.find_rows(SHEET_LOGIN, {"no_such_column": "x"}).empty
+
+
+def test_appended_rows_are_read_back_typed(engine):
+    version = engine.data_version(SHEET_TXNS)
+    row = {
+        "txn_id": "TXN999001", "customer_id": "CUST001", "txn_date": "2026-03-04 05:06:07",
+        "txn_type": "DEPOSIT", "amount": 12.5, "reason": "storage test", "balance_after_txn": 100.0,
+    }
+    engine.append_rows(SHEET_TXNS, [row])
+
+    assert engine.data_version(SHEET_TXNS) != version
+    got = engine.find_rows(SHEET_TXNS, {"txn_id": "TXN999001"})
+    assert len(got) == 1
+    assert got["txn_date"].iloc[0] == pd.Timestamp("2026-03-04 05:06:07")
+    assert got["amount"].iloc[0] == pytest.approx(12.5)
+
+
+def test_overwrite_replaces_the_sheet(engine):
+    customers = engine.read_sheet(SHEET_CUSTOMERS)
+    engine.overwrite_sheet(SHEET_CUSTOMERS, customers.iloc[:1])
+    assert engine.read_sheet(SHEET_CUSTOMERS)["customer_id"].tolist() == customers["customer_id"].iloc[:1].tolist()
+
+
+def test_iter_sheet_yields_the_sheet_in_order(engine):
+    whole = engine.read_sheet(SHEET_TXNS)
+    chunks = list(engine.iter_sheet(SHEET_TXNS, 2))
+    assert all(len(c) <= 2 for c in chunks)
+    _same(pd.concat(chunks), whole)
+
+
+def test_unknown_sheets_raise_value_error(engine):
+    with pytest.raises(ValueError):
+        engine.read_sheet("no_such_sheet")